@@ -0,0 +1,96 @@
+import os, sys, json, time, platform, subprocess
+import numpy as np
+
+# =========================
+# LATENCY / MEMORY HELPERS
+# =========================
+def summarize_latencies(samples_ms, wall_s=None):
+    """
+    samples_ms : list latency per item (ms)
+    wall_s     : total waktu (detik) untuk hitung throughput,
+                 default = jumlah semua latency
+    """
+    if not samples_ms:
+        return {"count": 0}
+
+    arr = np.asarray(samples_ms, dtype=np.float64)
+    total_s = wall_s if wall_s is not None else arr.sum() / 1000.0
+
+    return {
+        "count": int(arr.size),
+        "mean_ms": round(float(arr.mean()), 3),
+        "p50_ms": round(float(np.percentile(arr, 50)), 3),
+        "p95_ms": round(float(np.percentile(arr, 95)), 3),
+        "p99_ms": round(float(np.percentile(arr, 99)), 3),
+        "max_ms": round(float(arr.max()), 3),
+        "throughput_per_s": round(arr.size / total_s, 3) if total_s > 0 else None,
+    }
+
+
+def peak_rss_mb():
+    """Peak RSS proses ini (MB). None kalau platform tidak mendukung."""
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux: KB, macOS: bytes
+        if sys.platform == "darwin":
+            return round(peak / (1024 * 1024), 1)
+        return round(peak / 1024, 1)
+    except ImportError:
+        pass
+
+    try:
+        import psutil
+        info = psutil.Process().memory_info()
+        peak = getattr(info, "peak_wset", None) or info.rss
+        return round(peak / (1024 * 1024), 1)
+    except ImportError:
+        return None
+
+
+class Timer:
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.ms = (time.perf_counter() - self.start) * 1000.0
+        return False
+
+
+# =========================
+# BASELINE METADATA
+# =========================
+def git_revision():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"],
+            stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except Exception:
+        return None
+
+
+def run_metadata(extra=None):
+    meta = {
+        "git_commit": git_revision(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+    if extra:
+        meta.update(extra)
+    return meta
+
+
+def write_json(path, payload):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(payload, f, indent=2)
+    print(f"[BENCH] hasil ditulis ke {path}")
+
+
+def load_json(path):
+    with open(path) as f:
+        return json.load(f)
@@ -0,0 +1,102 @@
+"""
+Akurasi & latency deteksi field per imgsz, plus mode coarse-to-fine
+(processors/detection.py), pada corpus lokal berlabel.
+
+Jalankan dari folder Backend:
+    python -m bench.eval_imgsz --corpus path/ke/corpus
+    python -m bench.eval_imgsz --sizes 320,416,512,640 --coarse 320,416 --full 640
+
+Per konfigurasi: latency YOLO saja (p50/p95), latency process_document,
+akurasi field (sama dengan bench.run_bench) dan, untuk coarse-to-fine,
+porsi gambar yang cukup satu pass kecil.
+"""
+import argparse
+
+from bench.common import Timer, summarize_latencies, run_metadata, write_json
+from bench.synthetic import generate_corpus, load_corpus, DL_FIELDS, PASSPORT_FIELDS
+from bench.run_bench import AccuracyTracker, field_hits, silence_debug
+
+
+def evaluate(samples, coarse, full, min_conf, warmup=1):
+    from runtime import models
+    from runtime.budget import Budget
+    from processors import detection
+    from processors.image_io import decode_image
+    from processors.passport_processor import process_passport
+    from processors.dl_processor import process_driving_license
+
+    detection.COARSE_IMGSZ, detection.DETECT_IMGSZ, detection.COARSE_MIN_CONF = coarse, full, min_conf
+
+    def process(s, budget):
+        img_rgb, gray, hires = decode_image(s["jpeg"])
+        if s["doc_type"] == "passport":
+            return process_passport(img_rgb, models.passport_model(), models.reader(),
+                                    budget=budget, hires=hires)
+        return process_driving_license(img_rgb, models.driving_model(), models.reader(),
+                                       budget=budget, gray=gray, hires=hires, extract_face=False)
+
+    # imgsz baru -> alokasi / graph baru di torch, tidak dihitung
+    for s in samples[:warmup]:
+        process(s, Budget())
+
+    detect_ms, doc_ms, single_pass = [], [], 0
+    acc = AccuracyTracker()
+    for s in samples:
+        budget = Budget()
+        with Timer() as t:
+            parsed = process(s, budget)
+        doc_ms.append(t.ms)
+        detect_ms.append(budget.timings.get("detect_coarse", 0.0) + budget.timings.get("detect_full", 0.0))
+        single_pass += int("detect_full" not in budget.timings)
+        fields = DL_FIELDS if s["doc_type"] == "driving_license" else PASSPORT_FIELDS
+        acc.add(s["doc_type"], field_hits(parsed, s["truth"], fields))
+
+    return {
+        "coarse_imgsz": coarse or None,
+        "imgsz": full,
+        "detect": summarize_latencies(detect_ms),
+        "process_document": summarize_latencies(doc_ms),
+        "accuracy": acc.summary(),
+        "coarse_accepted": round(single_pass / len(samples), 4) if coarse else None,
+    }
+
+
+def print_table(rows):
+    print("\n=== IMGSZ EVAL ===")
+    print(f"{'mode':<16}{'detect p50':>12}{'p95':>9}{'doc p50':>10}{'accuracy':>10}{'coarse ok':>11}")
+    for r in rows:
+        mode = f"{r['coarse_imgsz']}->{r['imgsz']}" if r["coarse_imgsz"] else str(r["imgsz"])
+        ok = r["coarse_accepted"]
+        print(
+            f"{mode:<16}{r['detect']['p50_ms']:>12.1f}{r['detect']['p95_ms']:>9.1f}"
+            f"{r['process_document']['p50_ms']:>10.1f}{r['accuracy']['overall'] or 0:>10.3f}"
+            f"{'' if ok is None else f'{ok:.0%}':>11}"
+        )
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Field detector accuracy / latency per imgsz")
+    ap.add_argument("--corpus", help="folder corpus berlabel (manifest.json), default: sintetis")
+    ap.add_argument("--count", type=int, default=36)
+    ap.add_argument("--seed", type=int, default=1234)
+    ap.add_argument("--sizes", default="320,416,512,640", help="imgsz satu pass")
+    ap.add_argument("--coarse", default="320,416", help="imgsz pass kecil coarse-to-fine")
+    ap.add_argument("--full", type=int, default=640, help="imgsz pass penuh coarse-to-fine")
+    ap.add_argument("--min-conf", type=float, default=0.5)
+    ap.add_argument("--out", default="bench/results/imgsz.json")
+    ap.add_argument("--verbose", action="store_true")
+    args = ap.parse_args()
+
+    if not args.verbose:
+        silence_debug()
+
+    samples = list(load_corpus(args.corpus) if args.corpus else generate_corpus(args.count, args.seed))
+
+    rows = [evaluate(samples, 0, int(size), args.min_conf) for size in args.sizes.split(",") if size]
+    rows += [evaluate(samples, int(c), args.full, args.min_conf) for c in args.coarse.split(",") if c]
+
+    print_table(rows)
+    write_json(args.out, {
+        "results": rows,
+        "meta": run_metadata({"corpus": args.corpus, "count": len(samples), "min_conf": args.min_conf}),
+    })
@@ -0,0 +1,92 @@
+"""
+Benchmark encode foto wajah: waktu encode vs ukuran bytes per setting
+(codec x quality x max edge), dibanding jalur lama (PIL JPEG q90).
+
+    python -m bench.face_encode
+    python -m bench.face_encode --images path/ke/foto_sim --codecs jpeg,webp,avif
+"""
+import io, os, glob, argparse
+import cv2
+import numpy as np
+from PIL import Image
+
+from bench.common import Timer, summarize_latencies, run_metadata, write_json
+from bench.synthetic import generate_corpus
+from processors.face_extractor import detect_and_crop_face, encode_face, CODECS
+
+
+def collect_crops(images_dir=None, count=24, seed=1234):
+    """Crop wajah dari foto asli; untuk corpus sintetis pakai area foto di layout kartu."""
+    crops = []
+    if images_dir:
+        paths = sorted(glob.glob(os.path.join(images_dir, "*.jp*g")) + glob.glob(os.path.join(images_dir, "*.png")))
+        for path in paths:
+            img = cv2.imread(path, cv2.IMREAD_COLOR)
+            if img is None:
+                continue
+            rgb = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+            face = detect_and_crop_face(rgb)
+            if face is not None:
+                crops.append(np.ascontiguousarray(face))
+        return crops
+
+    for s in generate_corpus(count, seed, rotations=(0,), passport_ratio=0.0):
+        rgb = np.asarray(Image.open(io.BytesIO(s["jpeg"])).convert("RGB"))
+        h, w = rgb.shape[:2]
+        crops.append(np.ascontiguousarray(rgb[int(h * 0.2):int(h * 0.8), int(w * 0.03):int(w * 0.31)]))
+    return crops
+
+
+def legacy_pil_jpeg(face_rgb):
+    buf = io.BytesIO()
+    Image.fromarray(face_rgb).save(buf, format="JPEG", quality=90)
+    return buf.getvalue()
+
+
+def measure(crops, fn, repeat):
+    lat, sizes = [], []
+    for crop in crops:
+        for _ in range(repeat):
+            with Timer() as t:
+                data = fn(crop)
+            lat.append(t.ms)
+        sizes.append(len(data))
+    row = summarize_latencies(lat)
+    row["bytes_mean"] = int(sum(sizes) / len(sizes))
+    return row
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Face encode benchmark")
+    ap.add_argument("--images", help="folder foto dokumen asli (default: sintetis)")
+    ap.add_argument("--codecs", default=",".join(CODECS))
+    ap.add_argument("--qualities", default="60,75,90")
+    ap.add_argument("--max-edges", default="0,512,320")
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--out", default="bench/results/face_encode.json")
+    args = ap.parse_args()
+
+    crops = collect_crops(args.images)
+    if not crops:
+        raise SystemExit("tidak ada crop wajah")
+
+    rows = []
+    legacy = measure(crops, legacy_pil_jpeg, args.repeat)
+    legacy.update({"setting": "legacy_pil_jpeg_q90"})
+    rows.append(legacy)
+
+    for codec in args.codecs.split(","):
+        for q in (int(x) for x in args.qualities.split(",")):
+            for edge in (int(x) for x in args.max_edges.split(",")):
+                enc = lambda c: encode_face(c, codec=codec, quality=q, max_edge=edge)
+                media = enc(crops[0])[1]
+                row = measure(crops, lambda c: enc(c)[0], args.repeat)
+                row.update({"setting": f"{codec}_q{q}_edge{edge}", "media_type": media})
+                rows.append(row)
+
+    print(f"{'setting':<24}{'media':<12}{'p50 ms':>9}{'p95 ms':>9}{'bytes':>9}")
+    for r in rows:
+        print(f"{r['setting']:<24}{r.get('media_type', 'image/jpeg'):<12}"
+              f"{r['p50_ms']:>9.2f}{r['p95_ms']:>9.2f}{r['bytes_mean']:>9}")
+
+    write_json(args.out, {"meta": run_metadata({"crops": len(crops)}), "rows": rows})
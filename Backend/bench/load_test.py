@@ -0,0 +1,266 @@
+"""
+Load test untuk service /detect dengan sweep concurrency & ukuran payload.
+
+Jalankan dari folder Backend:
+    python -m bench.load_test --concurrency 1,4,16,64 --sizes 640,1280,2560
+    python -m bench.load_test --url http://127.0.0.1:8000 --server-pid 1234
+
+Tanpa --url, server uvicorn lokal di-start otomatis (--workers N).
+Hasil: latency distribution, error/timeout rate, throughput dan CPU/RSS
+server per titik sweep -> saturation curve (JSON + CSV).
+"""
+import io, os, sys, csv, time, uuid, socket, argparse, threading, subprocess
+import urllib.request, urllib.error
+from concurrent.futures import ThreadPoolExecutor
+from PIL import Image
+
+from bench.common import summarize_latencies, run_metadata, write_json
+from bench.synthetic import generate_corpus, load_corpus
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+
+# =========================
+# SERVER
+# =========================
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(workers=1, port=None, ready_timeout=300, admission=False):
+    port = port or _free_port()
+    # semua request datang dari 127.0.0.1 tanpa key: dengan admission aktif
+    # sweep concurrency tinggi mengukur 429, bukan saturasi pipeline
+    env = dict(os.environ)
+    env["ADMISSION"] = "1" if admission else "0"
+    cmd = [
+        sys.executable, "-m", "uvicorn", "main:app",
+        "--host", "127.0.0.1", "--port", str(port),
+        "--workers", str(workers), "--log-level", "warning",
+    ]
+    proc = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, env=env)
+    url = f"http://127.0.0.1:{port}"
+
+    deadline = time.time() + ready_timeout
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError("uvicorn keluar sebelum siap")
+        try:
+            urllib.request.urlopen(url + "/readyz", timeout=2)
+            return proc, url
+        except (urllib.error.URLError, OSError):
+            time.sleep(1)
+
+    proc.terminate()
+    raise RuntimeError("server tidak siap dalam batas waktu")
+
+
+class ServerSampler(threading.Thread):
+    """Sampling CPU% dan RSS proses server (+ worker children) via psutil."""
+
+    def __init__(self, pid, interval=0.5):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.samples = []
+        self._halt = threading.Event()
+        self.proc = psutil.Process(pid) if (psutil and pid) else None
+
+    def _procs(self):
+        try:
+            return [self.proc] + self.proc.children(recursive=True)
+        except psutil.Error:
+            return []
+
+    def run(self):
+        if not self.proc:
+            return
+        for p in self._procs():
+            try:
+                p.cpu_percent(None)
+            except psutil.Error:
+                pass
+        while not self._halt.wait(self.interval):
+            cpu, rss = 0.0, 0
+            for p in self._procs():
+                try:
+                    cpu += p.cpu_percent(None)
+                    rss += p.memory_info().rss
+                except psutil.Error:
+                    continue
+            self.samples.append((cpu, rss / (1024 * 1024)))
+
+    def stop(self):
+        self._halt.set()
+        self.join(timeout=2)
+        if not self.samples:
+            return {"cpu_percent_mean": None, "cpu_percent_max": None, "rss_mb_max": None}
+        cpus = [c for c, _ in self.samples]
+        return {
+            "cpu_percent_mean": round(sum(cpus) / len(cpus), 1),
+            "cpu_percent_max": round(max(cpus), 1),
+            "rss_mb_max": round(max(r for _, r in self.samples), 1),
+        }
+
+
+# =========================
+# PAYLOAD
+# =========================
+def resize_jpeg(jpeg, max_edge, quality=90):
+    img = Image.open(io.BytesIO(jpeg)).convert("RGB")
+    scale = max_edge / max(img.size)
+    if scale != 1:
+        img = img.resize((int(img.width * scale), int(img.height * scale)), Image.BICUBIC)
+    buf = io.BytesIO()
+    img.save(buf, format="JPEG", quality=quality)
+    return buf.getvalue()
+
+
+def multipart(jpeg, filename="scan.jpg"):
+    boundary = uuid.uuid4().hex
+    head = (
+        f"--{boundary}\r\n"
+        f'Content-Disposition: form-data; name="file"; filename="{filename}"\r\n'
+        "Content-Type: image/jpeg\r\n\r\n"
+    ).encode()
+    tail = f"\r\n--{boundary}--\r\n".encode()
+    return head + jpeg + tail, f"multipart/form-data; boundary={boundary}"
+
+
+def post_detect(url, body, content_type, timeout):
+    req = urllib.request.Request(
+        url + "/detect", data=body, method="POST",
+        headers={"Content-Type": content_type}
+    )
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as resp:
+            resp.read()
+            status = resp.status
+    except urllib.error.HTTPError as e:
+        status = e.code
+    except (socket.timeout, TimeoutError):
+        status = "timeout"
+    except (urllib.error.URLError, OSError):
+        status = "error"
+    return (time.perf_counter() - start) * 1000.0, status
+
+
+# =========================
+# SWEEP
+# =========================
+def run_point(url, payloads, concurrency, requests, timeout, server_pid):
+    sampler = ServerSampler(server_pid)
+    sampler.start()
+
+    jobs = [payloads[i % len(payloads)] for i in range(requests)]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(lambda p: post_detect(url, p[0], p[1], timeout), jobs))
+    wall = time.perf_counter() - start
+
+    server = sampler.stop()
+    ok = [ms for ms, st in results if st == 200]
+    timeouts = sum(1 for _, st in results if st == "timeout")
+    errors = len(results) - len(ok) - timeouts
+
+    row = summarize_latencies(ok, wall)
+    row.update({
+        "concurrency": concurrency,
+        "requests": len(results),
+        "error_rate": round(errors / len(results), 4),
+        "timeout_rate": round(timeouts / len(results), 4),
+        "throughput_per_s": round(len(ok) / wall, 3),
+        "wall_s": round(wall, 3),
+    })
+    row.update(server)
+    return row
+
+
+def saturation_curve(rows):
+    """
+    Titik saturasi = concurrency terkecil dimana throughput naik < 10%
+    dibanding titik sebelumnya (per ukuran payload).
+    """
+    curve = {}
+    for size in sorted({r["payload_edge"] for r in rows}):
+        pts = sorted((r for r in rows if r["payload_edge"] == size), key=lambda r: r["concurrency"])
+        knee = None
+        for prev, cur in zip(pts, pts[1:]):
+            if prev["throughput_per_s"] and cur["throughput_per_s"] < prev["throughput_per_s"] * 1.10:
+                knee = prev["concurrency"]
+                break
+        curve[str(size)] = {
+            "points": [(p["concurrency"], p["throughput_per_s"], p.get("p95_ms")) for p in pts],
+            "saturates_at_concurrency": knee,
+        }
+    return curve
+
+
+def write_csv(path, rows):
+    cols = [
+        "payload_edge", "concurrency", "requests", "throughput_per_s",
+        "p50_ms", "p95_ms", "p99_ms", "error_rate", "timeout_rate",
+        "cpu_percent_mean", "rss_mb_max",
+    ]
+    with open(path, "w", newline="") as f:
+        w = csv.DictWriter(f, fieldnames=cols, extrasaction="ignore")
+        w.writeheader()
+        w.writerows(rows)
+    print(f"[LOAD] CSV ditulis ke {path}")
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Load test /detect")
+    ap.add_argument("--url", help="server yang sudah jalan, default: start uvicorn lokal")
+    ap.add_argument("--server-pid", type=int, help="PID server untuk sampling CPU/RSS (dengan --url)")
+    ap.add_argument("--workers", type=int, default=1)
+    ap.add_argument("--admission", action="store_true",
+                    help="server lokal dengan admission control (ADMISSION=1)")
+    ap.add_argument("--corpus", help="folder corpus (manifest.json), default: generate sintetis")
+    ap.add_argument("--count", type=int, default=12, help="jumlah gambar sintetis")
+    ap.add_argument("--concurrency", default="1,4,16,64")
+    ap.add_argument("--sizes", default="640,1280,2560", help="max edge payload (px)")
+    ap.add_argument("--requests", type=int, default=64, help="request per titik sweep")
+    ap.add_argument("--timeout", type=float, default=30.0)
+    ap.add_argument("--out", default="bench/results/load.json")
+    args = ap.parse_args()
+
+    samples = list(load_corpus(args.corpus) if args.corpus else generate_corpus(args.count))
+
+    proc = None
+    if args.url:
+        url, server_pid = args.url.rstrip("/"), args.server_pid
+    else:
+        proc, url = start_server(workers=args.workers, admission=args.admission)
+        server_pid = proc.pid
+
+    rows = []
+    try:
+        for edge in [int(x) for x in args.sizes.split(",")]:
+            payloads = [multipart(resize_jpeg(s["jpeg"], edge)) for s in samples]
+            for c in [int(x) for x in args.concurrency.split(",")]:
+                row = run_point(url, payloads, c, max(args.requests, c), args.timeout, server_pid)
+                row["payload_edge"] = edge
+                rows.append(row)
+                print(
+                    f"[LOAD] edge={edge:<5} c={c:<3} thr={row['throughput_per_s']:.2f}/s "
+                    f"p95={row.get('p95_ms')}ms err={row['error_rate']} to={row['timeout_rate']} "
+                    f"cpu={row['cpu_percent_mean']} rss={row['rss_mb_max']}"
+                )
+    finally:
+        if proc:
+            proc.terminate()
+            proc.wait(timeout=30)
+
+    result = {
+        "meta": run_metadata({"url": url, "workers": args.workers, "requests": args.requests}),
+        "rows": rows,
+        "saturation": saturation_curve(rows),
+    }
+    write_json(args.out, result)
+    write_csv(os.path.splitext(args.out)[0] + ".csv", rows)
@@ -0,0 +1,120 @@
+"""
+Replay rekaman capture (runtime/capture.py) lewat pipeline saat ini.
+
+Jalankan dari folder Backend:
+    python -m bench.replay captures/
+    python -m bench.replay captures/ --state MARYLAND --diff
+    python -m bench.replay captures/capture-20260101-10-1234-0.zip --id <id> --live
+
+Default: output YOLO / EasyOCR / Tesseract diganti output rekaman (tanpa
+model), jadi yang terukur hanya kode Python di sekitarnya (fallback,
+cleaner, voting). --live: call yang tidak ada di rekaman (kode berubah,
+crop baru) dijalankan dengan model asli.
+
+Output: field yang berubah vs hasil rekaman, cabang fallback lama/baru,
+latency per stage (rekaman vs replay), hit/miss output rekaman.
+"""
+import argparse
+
+from bench.common import Timer, summarize_latencies, run_metadata, write_json
+from bench.run_bench import silence_debug
+
+COMPARED_STAGES = ["extract_text", "detect_doc_type", "process_document", "fallback", "total"]
+
+
+def select(records, ids=None, state=None, doc_type=None, limit=None):
+    n = 0
+    for record, image in records:
+        if ids and record["id"] not in ids:
+            continue
+        if state and record.get("state") != state.upper():
+            continue
+        if doc_type and record.get("detected_type") != doc_type:
+            continue
+        yield record, image
+        n += 1
+        if limit and n >= limit:
+            return
+
+
+def diff_fields(old, new):
+    keys = sorted((set(old) | set(new)) - {"faceImage"})
+    return {k: [old.get(k), new.get(k)] for k in keys if (old.get(k) or "") != (new.get(k) or "")}
+
+
+def replay(records, live=False):
+    import main
+    from runtime import capture
+    from runtime.budget import Budget
+
+    rows = []
+    recorded = {s: [] for s in COMPARED_STAGES}
+    replayed = {s: [] for s in COMPARED_STAGES}
+    for record, image in records:
+        budget = Budget()
+        with capture.replaying(record, live=live) as session:
+            with Timer() as t:
+                result = main.run_pipeline(image, budget)
+
+        for stage in COMPARED_STAGES:
+            if stage in record.get("timings", {}) and stage in result["timings"]:
+                recorded[stage].append(record["timings"][stage])
+                replayed[stage].append(result["timings"][stage])
+
+        rows.append({
+            "id": record["id"],
+            "state": record.get("state"),
+            "changed": diff_fields(record.get("parsed", {}), result["parsed"]),
+            "fallback": [record.get("notes", {}).get("fallback"), session.notes.get("fallback")],
+            "hits": session.hits,
+            "misses": session.misses,
+            "replay_ms": round(t.ms, 2),
+        })
+
+    return rows, {
+        stage: {"recorded": summarize_latencies(recorded[stage]), "replay": summarize_latencies(replayed[stage])}
+        for stage in COMPARED_STAGES if recorded[stage]
+    }
+
+
+def print_report(rows, latency, show_diff=False):
+    changed = [r for r in rows if r["changed"]]
+    print(f"\n=== REPLAY === {len(rows)} rekaman, {len(changed)} berubah, "
+          f"{sum(len(r['misses']) for r in rows)} call tanpa rekaman")
+    print(f"{'stage':<18}{'rec p50':>10}{'replay p50':>12}{'rec p95':>10}{'replay p95':>12}")
+    for stage, lat in latency.items():
+        rec, rep = lat["recorded"], lat["replay"]
+        print(f"{stage:<18}{rec['p50_ms']:>10.1f}{rep['p50_ms']:>12.1f}{rec['p95_ms']:>10.1f}{rep['p95_ms']:>12.1f}")
+    if show_diff:
+        for r in changed:
+            print(f"\n[{r['id']}] state={r['state']} fallback {r['fallback'][0]} -> {r['fallback'][1]}")
+            for field, (old, new) in r["changed"].items():
+                print(f"  {field:<14} {old!r} -> {new!r}")
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Replay captured requests through the current pipeline")
+    ap.add_argument("paths", nargs="+", help="arsip capture (.zip) atau folder CAPTURE_DIR")
+    ap.add_argument("--id", action="append", help="hanya rekaman ini (boleh berulang)")
+    ap.add_argument("--state", help="mis. MARYLAND")
+    ap.add_argument("--doc-type", choices=["driving_license", "passport"])
+    ap.add_argument("--limit", type=int)
+    ap.add_argument("--live", action="store_true", help="call tanpa rekaman dijalankan dengan model asli")
+    ap.add_argument("--diff", action="store_true", help="tampilkan field yang berubah")
+    ap.add_argument("--out", default="bench/results/replay.json")
+    ap.add_argument("--verbose", action="store_true")
+    args = ap.parse_args()
+
+    if not args.verbose:
+        silence_debug()
+
+    from runtime.capture import iter_archive
+    records = select(iter_archive(args.paths), set(args.id or ()), args.state, args.doc_type, args.limit)
+    rows, latency = replay(records, live=args.live)
+
+    print_report(rows, latency, show_diff=args.diff)
+    write_json(args.out, {
+        "results": rows,
+        "latency": latency,
+        "meta": run_metadata({"paths": args.paths, "live": args.live, "state": args.state}),
+    })
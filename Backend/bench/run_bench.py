@@ -0,0 +1,274 @@
+"""
+Benchmark pipeline /detect (full) dan tiap stage secara terpisah.
+
+Jalankan dari folder Backend:
+    python -m bench.run_bench --count 36 --out bench/results/baseline.json
+    python -m bench.run_bench --compare bench/results/baseline.json
+
+Output JSON berisi throughput, latency p50/p95/p99 per stage, peak RSS
+dan field accuracy, supaya bisa dibandingkan antar commit.
+"""
+import re, copy, argparse, tempfile, tracemalloc
+
+from bench.common import (
+    Timer, summarize_latencies, peak_rss_mb, run_metadata, write_json, load_json
+)
+from bench.synthetic import (
+    generate_corpus, load_corpus, DL_FIELDS, PASSPORT_FIELDS, DEFAULT_WIDTHS
+)
+
+STAGES = [
+    "decode", "extract_text", "detect_doc_type", "process_document",
+    "face", "fallback", "pipeline"
+]
+
+DEBUG_MODULES = [
+    "processors.dl_processor",
+    "fallback.general",
+    "fallback.states.maryland",
+    "fallback.states.virginia",
+    "fallback.states.newyork",
+    "fallback.states.pennsylvania",
+    "fallback.states.delaware",
+    "fallback.states.westvirginia",
+]
+
+
+def silence_debug():
+    """Matikan dbg() supaya print tidak ikut terukur."""
+    import importlib
+    for name in DEBUG_MODULES:
+        importlib.import_module(name).DEBUG = False
+
+
+def norm(v):
+    return re.sub(r"[^A-Z0-9]", "", str(v or "").upper())
+
+
+def field_hits(parsed, truth, fields):
+    return {f: norm(parsed.get(f)) == norm(truth.get(f)) for f in fields}
+
+
+class AccuracyTracker:
+    def __init__(self):
+        self.hits = {}
+        self.totals = {}
+
+    def add(self, doc_type, hits):
+        for f, ok in hits.items():
+            key = f"{doc_type}.{f}"
+            self.totals[key] = self.totals.get(key, 0) + 1
+            self.hits[key] = self.hits.get(key, 0) + int(ok)
+
+    def summary(self):
+        per_field = {k: round(self.hits[k] / self.totals[k], 4) for k in sorted(self.totals)}
+        total = sum(self.totals.values())
+        overall = round(sum(self.hits.values()) / total, 4) if total else None
+        return {"overall": overall, "per_field": per_field}
+
+
+# =========================
+# RUNNER
+# =========================
+def trace_memory(samples, fn):
+    """
+    Peak alokasi (numpy / OpenCV / PIL) per request via tracemalloc.
+    Pass terpisah karena tracemalloc memperlambat -> tidak ikut latency.
+    """
+    peaks = []
+    tracemalloc.start()
+    try:
+        for s in samples:
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+            fn(s["jpeg"])
+            peaks.append((tracemalloc.get_traced_memory()[1] - base) / (1024 * 1024))
+    finally:
+        tracemalloc.stop()
+
+    peaks.sort()
+    return {
+        "request_peak_mb_p50": round(peaks[len(peaks) // 2], 2),
+        "request_peak_mb_max": round(peaks[-1], 2),
+    }
+
+
+# batas spool UploadFile di memori (starlette MultiPartParser.max_file_size)
+UPLOAD_SPOOL_BYTES = 1024 * 1024
+
+
+def upload_decode(jpeg):
+    """
+    Jalur upload /detect sampai gambar siap diproses, tanpa model:
+    SpooledTemporaryFile -> read_upload_buffer -> decode_image.
+    """
+    from processors.image_io import read_upload_buffer, decode_image
+
+    with tempfile.SpooledTemporaryFile(max_size=UPLOAD_SPOOL_BYTES) as f:
+        f.write(jpeg)
+        return decode_image(read_upload_buffer(f))
+
+
+def run(samples, stages, warmup=2, trace_mem=False):
+    import main
+    from runtime import models
+    from processors.passport_processor import process_passport
+    from processors.dl_processor import process_driving_license
+    from processors.face_extractor import detect_and_crop_face, encode_face
+    from processors.image_io import decode_image
+    from fallback.router import apply_fallback
+
+    samples = list(samples)
+    lat = {s: [] for s in STAGES}
+    wall = {s: 0.0 for s in STAGES}
+    stage_acc = AccuracyTracker()
+    pipe_acc = AccuracyTracker()
+    doc_type_hits = 0
+
+    # warm-up (JIT / lazy init), tidak dihitung
+    for s in samples[:warmup]:
+        main.run_pipeline(s["jpeg"])
+
+    for s in samples:
+        fields = DL_FIELDS if s["doc_type"] == "driving_license" else PASSPORT_FIELDS
+
+        with Timer() as t:
+            img_rgb, gray, hires = decode_image(s["jpeg"])
+        lat["decode"].append(t.ms)
+
+        text = ""
+        if "extract_text" in stages:
+            with Timer() as t:
+                text = main.extract_text(gray)
+            lat["extract_text"].append(t.ms)
+
+        if "detect_doc_type" in stages:
+            with Timer() as t:
+                main.detect_doc_type(img_rgb, text, gray)
+            lat["detect_doc_type"].append(t.ms)
+
+        parsed = None
+        if "process_document" in stages or "fallback" in stages:
+            # stage terisolasi: pakai doc_type ground truth
+            with Timer() as t:
+                if s["doc_type"] == "passport":
+                    parsed = process_passport(
+                        img_rgb, models.passport_model(), models.reader(), hires=hires
+                    )
+                else:
+                    parsed = process_driving_license(
+                        img_rgb, models.driving_model(), models.reader(), gray=gray, hires=hires
+                    )
+            lat["process_document"].append(t.ms)
+            stage_acc.add(s["doc_type"], field_hits(parsed, s["truth"], fields))
+
+        if "face" in stages:
+            with Timer() as t:
+                face = detect_and_crop_face(img_rgb, gray)
+                if face is not None:
+                    encode_face(face)
+            lat["face"].append(t.ms)
+
+        if "fallback" in stages and parsed is not None:
+            with Timer() as t:
+                apply_fallback(img_rgb, models.reader(), copy.deepcopy(parsed))
+            lat["fallback"].append(t.ms)
+
+        if "pipeline" in stages:
+            with Timer() as t:
+                result = main.run_pipeline(s["jpeg"])
+            lat["pipeline"].append(t.ms)
+            doc_type_hits += int(result["detected_type"] == s["doc_type"])
+            pipe_acc.add(s["doc_type"], field_hits(result["parsed"], s["truth"], fields))
+
+    for name in STAGES:
+        wall[name] = sum(lat[name]) / 1000.0
+
+    return {
+        "memory": {
+            "upload_decode": trace_memory(samples, upload_decode),
+            "pipeline": trace_memory(samples, main.run_pipeline) if "pipeline" in stages else None,
+        } if trace_mem else None,
+        "stages": {
+            name: summarize_latencies(lat[name], wall[name])
+            for name in STAGES if lat[name]
+        },
+        "accuracy": {
+            "doc_type": round(doc_type_hits / len(samples), 4) if "pipeline" in stages else None,
+            "process_document": stage_acc.summary(),
+            "pipeline": pipe_acc.summary(),
+        },
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+# =========================
+# COMPARE
+# =========================
+def _delta(old, new):
+    if old in (None, 0) or new is None:
+        return "    n/a"
+    return f"{(new - old) / old * 100:+7.1f}%"
+
+
+def compare(baseline, current):
+    print("\n=== BENCH COMPARE ===")
+    print(f"baseline: {baseline['meta'].get('git_commit')}  current: {current['meta'].get('git_commit')}")
+    print(f"{'stage':<18}{'p50 ms':>12}{'Δ':>9}{'p95 ms':>12}{'Δ':>9}{'thr/s':>10}{'Δ':>9}")
+    for name, cur in current["stages"].items():
+        old = baseline["stages"].get(name, {})
+        print(
+            f"{name:<18}"
+            f"{cur.get('p50_ms', 0):>12.1f}{_delta(old.get('p50_ms'), cur.get('p50_ms')):>9}"
+            f"{cur.get('p95_ms', 0):>12.1f}{_delta(old.get('p95_ms'), cur.get('p95_ms')):>9}"
+            f"{cur.get('throughput_per_s') or 0:>10.2f}{_delta(old.get('throughput_per_s'), cur.get('throughput_per_s')):>9}"
+        )
+
+    for key in ("process_document", "pipeline"):
+        old = baseline["accuracy"].get(key, {}).get("overall")
+        new = current["accuracy"].get(key, {}).get("overall")
+        print(f"accuracy.{key:<17} {old} -> {new}")
+    print(f"peak_rss_mb               {baseline.get('peak_rss_mb')} -> {current.get('peak_rss_mb')}")
+    for path in ("upload_decode", "pipeline"):
+        old_mem = (baseline.get("memory") or {}).get(path) or {}
+        new_mem = (current.get("memory") or {}).get(path) or {}
+        for key in ("request_peak_mb_p50", "request_peak_mb_max"):
+            name = f"{path}.{key}"
+            print(f"memory.{name:<33}{old_mem.get(key)} -> {new_mem.get(key)}")
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="YOLO-OCR pipeline benchmark")
+    ap.add_argument("--count", type=int, default=36, help="jumlah gambar sintetis")
+    ap.add_argument("--seed", type=int, default=1234)
+    ap.add_argument("--widths", default=",".join(map(str, DEFAULT_WIDTHS)),
+                    help="lebar gambar sintetis (px), mis. 4000 untuk foto HP")
+    ap.add_argument("--corpus", help="folder corpus (manifest.json), default: generate sintetis")
+    ap.add_argument("--stages", default=",".join(STAGES))
+    ap.add_argument("--warmup", type=int, default=2)
+    ap.add_argument("--out", default="bench/results/latest.json")
+    ap.add_argument("--compare", help="baseline JSON untuk dibandingkan")
+    ap.add_argument("--verbose", action="store_true", help="biarkan debug print aktif")
+    ap.add_argument("--trace-memory", action="store_true", help="ukur peak memori per request")
+    args = ap.parse_args()
+
+    if not args.verbose:
+        silence_debug()
+
+    if args.corpus:
+        samples = load_corpus(args.corpus)
+    else:
+        widths = tuple(int(w) for w in args.widths.split(","))
+        samples = generate_corpus(args.count, args.seed, widths=widths)
+
+    stages = set(args.stages.split(","))
+    result = run(samples, stages, warmup=args.warmup, trace_mem=args.trace_memory)
+    result["meta"] = run_metadata({
+        "count": args.count, "seed": args.seed, "widths": args.widths,
+        "corpus": args.corpus, "stages": sorted(stages),
+    })
+
+    write_json(args.out, result)
+
+    if args.compare:
+        compare(load_json(args.compare), result)
@@ -0,0 +1,310 @@
+"""
+Synthetic ID-card generator untuk benchmark.
+
+Render kartu SIM (6 state fallback) dan paspor memakai PIL, lalu
+di-degradasi (resolusi, blur, rotasi). Ground truth memakai nama field
+yang sama dengan output process_driving_license / process_passport.
+
+Usage:
+    python -m bench.synthetic --count 60 --out bench/corpus
+"""
+import os, io, json, random, argparse
+from datetime import date
+from PIL import Image, ImageDraw, ImageFilter, ImageFont
+
+# =========================
+# FIELD POOLS
+# =========================
+FIRST_NAMES = [
+    "JOHN", "MARY", "ROBERT", "LINDA", "MICHAEL", "SARAH", "DAVID",
+    "KAREN", "JAMES", "EMILY", "THOMAS", "JESSICA", "DANIEL", "LAURA"
+]
+LAST_NAMES = [
+    "SMITH", "JOHNSON", "WILLIAMS", "BROWN", "JONES", "MILLER", "DAVIS",
+    "WILSON", "ANDERSON", "TAYLOR", "MOORE", "JACKSON", "MARTIN", "LEE"
+]
+STREETS = ["MAIN ST", "OAK AVE", "PINE RD", "MAPLE DR", "CEDAR LN", "ELM ST"]
+CITIES = ["SPRINGFIELD", "FAIRVIEW", "RIVERSIDE", "GREENVILLE", "MADISON"]
+COUNTRIES = ["UNITED STATES", "INDONESIA", "CANADA", "GERMANY", "JAPAN"]
+
+# Format nomor SIM sesuai regex di fallback/states/*
+STATE_LICENSE_FORMATS = {
+    "MARYLAND": "A############",
+    "VIRGINIA": "A########",
+    "NEW YORK": "#########",
+    "PENNSYLVANIA": "########",
+    "DELAWARE": "########",
+    "WEST VIRGINIA": "A######",
+}
+STATE_CODES = {
+    "MARYLAND": "MD",
+    "VIRGINIA": "VA",
+    "NEW YORK": "NY",
+    "PENNSYLVANIA": "PA",
+    "DELAWARE": "DE",
+    "WEST VIRGINIA": "WV",
+}
+
+DL_FIELDS = [
+    "StateName", "address", "dateOfBirth", "firstName",
+    "lastName", "licenseNumber", "sex"
+]
+PASSPORT_FIELDS = [
+    "authority", "dateOfBirth", "gender", "givenNames",
+    "nationality", "passportNumber", "placeOfBirth", "surname"
+]
+
+DEFAULT_WIDTHS = (640, 1280, 2560)
+DEFAULT_BLURS = (0.0, 1.0, 2.5)
+DEFAULT_ROTATIONS = (0, 3, -6, 90, 180)
+
+MONTHS = ["JAN", "FEB", "MAR", "APR", "MAY", "JUN",
+          "JUL", "AUG", "SEP", "OCT", "NOV", "DEC"]
+
+
+# =========================
+# HELPERS
+# =========================
+def _font(size):
+    for name in ("DejaVuSans-Bold.ttf", "arialbd.ttf", "Arial Bold.ttf", "DejaVuSans.ttf", "arial.ttf"):
+        try:
+            return ImageFont.truetype(name, size)
+        except OSError:
+            continue
+    try:
+        return ImageFont.load_default(size=size)
+    except TypeError:
+        return ImageFont.load_default()
+
+
+def _pattern(rng, fmt):
+    out = []
+    for ch in fmt:
+        if ch == "A":
+            out.append(rng.choice("ABCDEFGHJKLMNPRSTUVWXYZ"))
+        elif ch == "#":
+            out.append(str(rng.randint(0, 9)))
+        else:
+            out.append(ch)
+    return "".join(out)
+
+
+def _random_dob(rng):
+    year_now = date.today().year
+    y = rng.randint(year_now - 70, year_now - 18)
+    return date(y, rng.randint(1, 12), rng.randint(1, 28))
+
+
+def _draw_face(draw, box):
+    x1, y1, x2, y2 = box
+    draw.rectangle(box, fill=(200, 205, 215))
+    w, h = x2 - x1, y2 - y1
+    cx = x1 + w // 2
+    # kepala + bahu sederhana
+    draw.ellipse((cx - w * 0.28, y1 + h * 0.12, cx + w * 0.28, y1 + h * 0.62), fill=(222, 184, 150))
+    draw.ellipse((x1 + w * 0.1, y1 + h * 0.66, x2 - w * 0.1, y2 + h * 0.3), fill=(60, 70, 90))
+    eye_y = y1 + h * 0.34
+    for ex in (cx - w * 0.11, cx + w * 0.11):
+        draw.ellipse((ex - w * 0.03, eye_y - h * 0.015, ex + w * 0.03, eye_y + h * 0.015), fill=(40, 30, 30))
+    draw.line((cx - w * 0.08, y1 + h * 0.5, cx + w * 0.08, y1 + h * 0.5), fill=(150, 60, 60), width=max(1, w // 60))
+
+
+# =========================
+# FIELD GENERATORS
+# =========================
+def make_dl_fields(rng, state):
+    dob = _random_dob(rng)
+    return {
+        "StateName": state,
+        "address": f"{rng.randint(10, 9999)} {rng.choice(STREETS)} {rng.choice(CITIES)} {STATE_CODES[state]}",
+        "dateOfBirth": dob.strftime("%d/%m/%Y"),
+        "firstName": rng.choice(FIRST_NAMES),
+        "lastName": rng.choice(LAST_NAMES),
+        "licenseNumber": _pattern(rng, STATE_LICENSE_FORMATS[state]),
+        "sex": rng.choice(["MALE", "FEMALE"]),
+    }
+
+
+def make_passport_fields(rng):
+    dob = _random_dob(rng)
+    return {
+        "authority": rng.choice(["UNITED STATES DEPARTMENT OF STATE", "IMMIGRATION OFFICE"]),
+        "dateOfBirth": dob.strftime("%d/%m/%Y"),
+        "gender": rng.choice(["MALE", "FEMALE"]),
+        "givenNames": rng.choice(FIRST_NAMES),
+        "nationality": rng.choice(COUNTRIES),
+        "passportNumber": _pattern(rng, "A########"),
+        "placeOfBirth": rng.choice(CITIES),
+        "surname": rng.choice(LAST_NAMES),
+    }
+
+
+# =========================
+# RENDERERS
+# =========================
+def render_driving_license(fields, width=1280):
+    """Kartu ID-1 (85.6 x 54 mm) dengan layout mirip SIM US."""
+    height = int(width * 54 / 85.6)
+    img = Image.new("RGB", (width, height), (236, 240, 246))
+    draw = ImageDraw.Draw(img)
+
+    u = width / 100.0
+    big, mid, small = _font(int(u * 5.2)), _font(int(u * 3.6)), _font(int(u * 2.2))
+
+    draw.rectangle((0, 0, width, int(u * 11)), fill=(32, 64, 128))
+    draw.text((u * 3, u * 2.2), fields["StateName"], font=big, fill=(255, 255, 255))
+    draw.text((u * 62, u * 3.6), "DRIVER LICENSE", font=mid, fill=(255, 255, 255))
+
+    _draw_face(draw, (int(u * 4), int(u * 15), int(u * 30), int(u * 50)))
+
+    x, y, step = u * 35, u * 15, u * 7.4
+    sex_short = "M" if fields["sex"] == "MALE" else "F"
+    rows = [
+        ("DL", fields["licenseNumber"]),
+        ("LN", fields["lastName"]),
+        ("FN", fields["firstName"]),
+        ("", fields["address"]),
+        ("DOB", fields["dateOfBirth"]),
+        ("SEX", sex_short),
+    ]
+    for label, value in rows:
+        if label:
+            draw.text((x, y), label, font=small, fill=(160, 30, 30))
+        draw.text((x + u * 8, y - u * 0.6), value, font=mid, fill=(10, 10, 10))
+        y += step
+
+    return img
+
+
+def render_passport(fields, width=1280):
+    """Halaman data paspor (125 x 88 mm) + 2 baris MRZ."""
+    height = int(width * 88 / 125)
+    img = Image.new("RGB", (width, height), (238, 234, 222))
+    draw = ImageDraw.Draw(img)
+
+    u = width / 100.0
+    mid, small, mrz = _font(int(u * 2.8)), _font(int(u * 1.7)), _font(int(u * 2.6))
+
+    draw.text((u * 3, u * 2), "PASSPORT", font=mid, fill=(20, 40, 90))
+    _draw_face(draw, (int(u * 3), int(u * 8), int(u * 27), int(u * 42)))
+
+    d, m, y = fields["dateOfBirth"].split("/")
+    dob_text = f"{d} {MONTHS[int(m) - 1]} {y}"
+    rows = [
+        ("Passport No.", fields["passportNumber"]),
+        ("Surname", fields["surname"]),
+        ("Given Names", fields["givenNames"]),
+        ("Nationality", fields["nationality"]),
+        ("Date of Birth", dob_text),
+        ("Sex", fields["gender"][0]),
+        ("Place of birth", fields["placeOfBirth"]),
+        ("Authority", fields["authority"]),
+    ]
+    x, yy = u * 31, u * 7
+    for label, value in rows:
+        draw.text((x, yy), label, font=small, fill=(90, 90, 90))
+        draw.text((x, yy + u * 2), value, font=mid, fill=(10, 10, 10))
+        yy += u * 6.2
+
+    line1 = f"P<USA{fields['surname']}<<{fields['givenNames']}".ljust(44, "<")[:44]
+    line2 = f"{fields['passportNumber']}<0USA{y[2:]}{m}{d}0{fields['gender'][0]}".ljust(44, "<")[:44]
+    draw.rectangle((0, int(height - u * 11), width, height), fill=(250, 250, 250))
+    draw.text((u * 3, height - u * 10), line1, font=mrz, fill=(0, 0, 0))
+    draw.text((u * 3, height - u * 5.5), line2, font=mrz, fill=(0, 0, 0))
+
+    return img
+
+
+def degrade(img, blur=0.0, rotation=0):
+    """Blur gaussian + rotasi (dengan background meja)."""
+    if blur > 0:
+        img = img.filter(ImageFilter.GaussianBlur(radius=blur))
+    if rotation:
+        img = img.rotate(rotation, expand=True, fillcolor=(96, 84, 72), resample=Image.BICUBIC)
+    return img
+
+
+def encode_jpeg(img, quality=90):
+    buf = io.BytesIO()
+    img.save(buf, format="JPEG", quality=quality)
+    return buf.getvalue()
+
+
+# =========================
+# CORPUS
+# =========================
+def generate_corpus(count=36, seed=1234, widths=DEFAULT_WIDTHS, blurs=DEFAULT_BLURS,
+                    rotations=DEFAULT_ROTATIONS, passport_ratio=0.25):
+    """
+    Yield dict sample:
+      {id, doc_type, state, width, blur, rotation, jpeg, truth}
+    Deterministik untuk seed yang sama.
+    """
+    rng = random.Random(seed)
+    states = list(STATE_LICENSE_FORMATS)
+
+    for i in range(count):
+        width = rng.choice(widths)
+        blur = rng.choice(blurs)
+        rotation = rng.choice(rotations)
+
+        if rng.random() < passport_ratio:
+            doc_type, state = "passport", None
+            truth = make_passport_fields(rng)
+            img = render_passport(truth, width)
+        else:
+            doc_type = "driving_license"
+            state = states[i % len(states)]
+            truth = make_dl_fields(rng, state)
+            img = render_driving_license(truth, width)
+
+        img = degrade(img, blur=blur, rotation=rotation)
+
+        yield {
+            "id": f"{i:04d}_{doc_type}",
+            "doc_type": doc_type,
+            "state": state,
+            "width": width,
+            "blur": blur,
+            "rotation": rotation,
+            "jpeg": encode_jpeg(img),
+            "truth": truth,
+        }
+
+
+def write_corpus(samples, out_dir):
+    os.makedirs(out_dir, exist_ok=True)
+    manifest = []
+    for s in samples:
+        fname = f"{s['id']}.jpg"
+        with open(os.path.join(out_dir, fname), "wb") as f:
+            f.write(s["jpeg"])
+        entry = {k: v for k, v in s.items() if k != "jpeg"}
+        entry["file"] = fname
+        manifest.append(entry)
+
+    with open(os.path.join(out_dir, "manifest.json"), "w") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def load_corpus(corpus_dir):
+    """Baca corpus hasil write_corpus (format sama dengan generate_corpus)."""
+    with open(os.path.join(corpus_dir, "manifest.json")) as f:
+        manifest = json.load(f)
+    for entry in manifest:
+        with open(os.path.join(corpus_dir, entry["file"]), "rb") as f:
+            sample = dict(entry)
+            sample["jpeg"] = f.read()
+            yield sample
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Generate synthetic ID-card corpus")
+    ap.add_argument("--count", type=int, default=36)
+    ap.add_argument("--seed", type=int, default=1234)
+    ap.add_argument("--out", default="bench/corpus")
+    args = ap.parse_args()
+
+    manifest = write_corpus(generate_corpus(args.count, args.seed), args.out)
+    print(f"[SYNTH] {len(manifest)} gambar ditulis ke {args.out}")
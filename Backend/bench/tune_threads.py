@@ -0,0 +1,126 @@
+"""
+Autotuner thread budget (lihat runtime/threads.py).
+
+Setiap kombinasi dijalankan di subprocess baru (torch interop hanya bisa
+di-set sekali per proses), dengan N worker paralel untuk meniru
+`uvicorn --workers N`. Kombinasi dengan throughput agregat tertinggi
+ditulis ke runtime/thread_config.json.
+
+    python -m bench.tune_threads --workers 2 --count 8
+"""
+import os, sys, json, time, argparse, tempfile, itertools, subprocess
+
+from runtime.threads import CONFIG_PATH, KEYS, save_config
+
+
+def candidate_configs(workers):
+    per_worker = max(1, (os.cpu_count() or 1) // workers)
+    intra = sorted({1, 2, 4, per_worker // 2, per_worker} - {0})
+    intra = [n for n in intra if n <= per_worker]
+
+    configs = []
+    for t, interop, cv in itertools.product(intra, (1, 2), ("same", 1)):
+        configs.append({
+            "torch_intra": t,
+            "torch_interop": interop,
+            "cv2": t if cv == "same" else 1,
+            "tesseract_omp": 1,
+        })
+    # dedupe (cv2 "same" == 1 saat t == 1)
+    seen, out = set(), []
+    for c in configs:
+        key = tuple(c[k] for k in KEYS)
+        if key not in seen:
+            seen.add(key)
+            out.append(c)
+    return out
+
+
+# =========================
+# CHILD (satu worker)
+# =========================
+def child(out_path, count, seed):
+    # main.py apply config dari env THREAD_CONFIG (di-set parent)
+    import main
+    from bench.run_bench import silence_debug
+    from bench.synthetic import generate_corpus
+
+    silence_debug()
+
+    samples = list(generate_corpus(count, seed))
+    main.run_pipeline(samples[0]["jpeg"])  # warm-up
+
+    start = time.perf_counter()
+    for s in samples:
+        main.run_pipeline(s["jpeg"])
+    wall = time.perf_counter() - start
+
+    with open(out_path, "w") as f:
+        json.dump({"images": len(samples), "wall_s": wall}, f)
+
+
+# =========================
+# PARENT
+# =========================
+def measure(cfg, workers, count, seed):
+    tmp = tempfile.mkdtemp(prefix="tune_threads_")
+    cfg_path = os.path.join(tmp, "cfg.json")
+    save_config(cfg, cfg_path)
+
+    # env override dari luar tidak boleh ikut campur
+    env = {k: v for k, v in os.environ.items() if k not in (
+        "TORCH_INTRA_THREADS", "TORCH_INTEROP_THREADS", "CV2_THREADS", "TESSERACT_OMP_THREADS",
+        "OMP_NUM_THREADS", "MKL_NUM_THREADS", "OMP_THREAD_LIMIT",
+    )}
+    env["THREAD_CONFIG"] = cfg_path
+
+    procs, outs = [], []
+    for w in range(workers):
+        out = os.path.join(tmp, f"w{w}.json")
+        outs.append(out)
+        procs.append(subprocess.Popen(
+            [sys.executable, "-m", "bench.tune_threads", "--child-out", out,
+             "--count", str(count), "--seed", str(seed + w)],
+            env=env, stdout=subprocess.DEVNULL
+        ))
+
+    for p in procs:
+        p.wait()
+
+    images, wall = 0, 0.0
+    for out in outs:
+        if not os.path.exists(out):
+            return None
+        with open(out) as f:
+            r = json.load(f)
+        images += r["images"]
+        wall = max(wall, r["wall_s"])
+    return images / wall if wall else None
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Autotune thread budget per worker")
+    ap.add_argument("--workers", type=int, default=int(os.getenv("WEB_CONCURRENCY", "1")))
+    ap.add_argument("--count", type=int, default=8, help="gambar per worker per kombinasi")
+    ap.add_argument("--seed", type=int, default=1234)
+    ap.add_argument("--out", default=CONFIG_PATH)
+    ap.add_argument("--child-out", help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.child_out:
+        child(args.child_out, args.count, args.seed)
+        sys.exit(0)
+
+    results = []
+    for cfg in candidate_configs(args.workers):
+        thr = measure(cfg, args.workers, args.count, args.seed)
+        results.append((thr or 0.0, cfg))
+        print(f"[TUNE] {cfg} -> {thr and round(thr, 3)} img/s")
+
+    best_thr, best = max(results, key=lambda r: r[0])
+    if best_thr <= 0:
+        print("[TUNE] semua kombinasi gagal, config tidak ditulis")
+        sys.exit(1)
+
+    save_config(best, args.out)
+    print(f"[TUNE] terbaik: {best} ({best_thr:.3f} img/s, {args.workers} worker) -> {args.out}")
@@ -7,10 +7,13 @@ from fallback.states import (
     westvirginia
 )
 from fallback import general
+from runtime.budget import Budget
+from runtime import capture
 
 
-def apply_fallback(image_rgb, reader, data):
+def apply_fallback(image_rgb, reader, data, budget=None):
 
+    budget = budget or Budget()
     state = data.get("StateName", "").strip().upper()
 
     state_handled = False  # FLAG
@@ -48,7 +51,8 @@ def apply_fallback(image_rgb, reader, data):
     if state_handled:
         has_missing = any(v == "" for v in data.values())
 
-        if has_missing:
+        ran_ocr = has_missing and budget.allow("fallback_ocr")
+        if ran_ocr:
 
             if state == "WEST VIRGINIA":
                 data = westvirginia.apply(image_rgb, reader, data)
@@ -68,13 +72,17 @@ def apply_fallback(image_rgb, reader, data):
             elif state == "DELAWARE":
                 data = delaware.apply(image_rgb, reader, data)
 
+        capture.note("fallback", {"branch": state, "ocr": ran_ocr})
         # ❗ LANGSUNG RETURN — JANGAN KE GENERAL
         return data
 
     # =========================
     # GENERAL FALLBACK (ONLY IF STATE TIDAK DIKENAL)
     # =========================
-    if any(v == "" for v in data.values()):
+    if any(v == "" for v in data.values()) and budget.allow("fallback_ocr"):
+        capture.note("fallback", {"branch": "general", "state_before": state or None})
         data = general.apply(image_rgb, reader, data)
+    else:
+        capture.note("fallback", {"branch": None})
 
     return data
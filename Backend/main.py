@@ -1,22 +1,56 @@
-import io, base64, os
-import cv2
+from runtime.threads import apply_thread_env
+
+# harus sebelum import cv2 / torch (ultralytics, easyocr)
+THREAD_CONFIG = apply_thread_env()
+
+import base64, os, copy, hmac
+import asyncio
+import threading
+from contextlib import nullcontext
+from typing import List, Optional
 import numpy as np
 import pytesseract
-import easyocr
-import re
 
-from fastapi import FastAPI, File, UploadFile, HTTPException
-from fastapi.responses import JSONResponse
+from fastapi import (
+    FastAPI, File, UploadFile, HTTPException, Request, Query, Header, Depends, WebSocket,
+    WebSocketDisconnect
+)
+from fastapi.responses import JSONResponse, Response
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from ultralytics import YOLO
 
-from processors.passport_processor import process_passport
-from processors.dl_processor import process_driving_license
-from processors.face_extractor import detect_and_crop_face, face_to_base64
+from processors.passport_processor import process_passport, apply_full_ocr, read_passport_number
+from processors.dl_processor import process_driving_license, read_license_number
+from processors.face_extractor import detect_and_crop_face, encode_face
+from processors.image_io import read_upload_buffer, decode_image
+from processors.orientation import apply_orientation
+from processors.doc_classifier import classify_doc_type, MIN_CONFIDENCE as DOC_CLASSIFIER_MIN_CONF
 from fallback.router import apply_fallback
+from runtime.budget import Budget, PipelineCancelled, DEFAULT_DEADLINE_MS
+from runtime import models
+from runtime import jobs
+from runtime import dedup
+from runtime import results_store
+from runtime import profiler
+from runtime import inference_workers
+from runtime import admission
+from runtime import capture
+from runtime import shm_pool
+from runtime.shm_pool import PoolExhausted
+from runtime.burst import (
+    vote_fields, best_frame, CHEAP_PASS_DENIED, BURST_MIN_FRAMES, BURST_MAX_FRAMES
+)
+from runtime.face_store import faces, url_mode_available
+from runtime.responses import build_detect_response
+from runtime.live_scan import (
+    FieldAccumulator, frame_quality, LIVE_DEADLINE_MS, LIVE_MAX_FRAMES, LIVE_MAX_FRAME_BYTES
+)
 
 pytesseract.pytesseract.tesseract_cmd = r"C:\Program Files\Tesseract-OCR\tesseract.exe"
 
+# torch / OpenCV thread pool di-set sebelum model pertama load
+models.configure_threads(THREAD_CONFIG)
+
 app = FastAPI()
 app.add_middleware(
     CORSMiddleware,
@@ -26,77 +60,822 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-passport_model = YOLO("models/passport_model.pt")
-driving_model = YOLO("models/dl_model.pt")
-reader = easyocr.Reader(['en'])
+# token untuk endpoint /admin/* dan /results (kosong = endpoint tersebut mati)
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+
+# YOLO / EasyOCR tidak thread-safe -> pipeline tetap serial,
+# tapi jalan di threadpool supaya event loop bisa pantau disconnect
+PIPELINE_LOCK = threading.Lock()
+
+# rate limit + giliran weighted-fair per client (None kecuali ADMISSION=1)
+ADMISSION = admission.get_controller(slots=max(1, inference_workers.INFERENCE_PROCS))
+
+
+@app.on_event("startup")
+def start_model_warmup():
+    # import saja (tools / benchmark) tidak load model; server warm-up di background
+    if inference_workers.INFERENCE_PROCS > 0:
+        return      # model di-load di proses worker
+    models.start_warmup(PIPELINE_LOCK)
+
+
+@app.on_event("startup")
+def start_inference_workers():
+    # INFERENCE_PROCS > 0: /detect dijalankan di proses worker (hand-off shared memory)
+    inference_workers.start()
+
+
+@app.on_event("shutdown")
+def stop_inference_workers():
+    inference_workers.stop()
+
+
+@app.on_event("startup")
+def start_job_workers():
+    if jobs.JOB_WORKERS > 0:
+        jobs.start_workers(jobs.get_queue(), run_job, jobs.JOB_WORKERS)
+
+
+@app.on_event("startup")
+def start_results_writer():
+    results_store.start_writer()
+
 
+@app.on_event("shutdown")
+def stop_results_writer():
+    results_store.stop_writer()
 
-def extract_text(img: np.ndarray) -> str:
-    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+
+@app.on_event("startup")
+def start_capture_writer():
+    capture.start_writer()
+
+
+@app.on_event("shutdown")
+def stop_capture_writer():
+    capture.stop_writer()
+
+
+@app.get("/healthz")
+def healthz():
+    return {"status": "ok"}
+
+
+@app.get("/readyz")
+def readyz():
+    status = models.status()
+    pool = inference_workers.get_pool()
+    if pool is not None:
+        status = dict(status, inference=pool.status())
+        status["ready"] = status["inference"]["ready"]
+    return JSONResponse(status, status_code=200 if status["ready"] else 503)
+
+
+def extract_text(gray: np.ndarray) -> str:
     return pytesseract.image_to_string(gray).lower()
 
 
-def detect_doc_type(img: np.ndarray, text: str):
+# teks Tesseract minimal segini baru dipakai memastikan "driving_license"
+TEXT_CHECK_MIN_CHARS = 20
+
 
-    passport_boxes = passport_model.predict(
+def detect_doc_type(img: np.ndarray, text: str, gray: np.ndarray = None):
+    """
+    Returns (doc_type, info). Classifier thumbnail dulu; dua detector YOLO
+    hanya dijalankan kalau classifier ragu.
+    """
+    doc_type, confidence, feats = classify_doc_type(img, gray)
+    info = {"method": "classifier", "confidence": round(confidence, 3)}
+
+    passport_text = "passport" in text or "<<<" in text
+    if confidence >= DOC_CLASSIFIER_MIN_CONF and not (doc_type == "driving_license" and passport_text):
+        return doc_type, info
+
+    # tanpa MRZ classifier tidak bisa membedakan SIM dari paspor yang MRZ-nya
+    # terlewat (confidence dibatasi): teks Tesseract yang memastikan, kedua
+    # detector hanya kalau teks bilang paspor atau hampir kosong
+    if (doc_type == "driving_license" and not feats["mrz_lines"]
+            and len(text.strip()) >= TEXT_CHECK_MIN_CHARS and not passport_text):
+        info["method"] = "classifier+text"
+        return doc_type, info
+
+    info["method"] = "detectors"
+
+    passport_boxes = models.passport_model().predict(
         img, conf=0.25, iou=0.35, verbose=False
     )[0].boxes or []
 
-    driving_boxes = driving_model.predict(
+    driving_boxes = models.driving_model().predict(
         img, conf=0.25, iou=0.35, verbose=False
     )[0].boxes or []
 
     if len(passport_boxes) > len(driving_boxes):
-        return "passport"
-    return "driving_license"
+        return "passport", info
+    return "driving_license", info
 
 
-@app.post("/detect")
-async def detect_document(file: UploadFile = File(...)):
+# pengganti faceImage selama fallback saat face_format="bytes"
+FACE_PLACEHOLDER = "[FACE]"
 
-    contents = await file.read()
-    img = cv2.imdecode(np.frombuffer(contents, np.uint8), cv2.IMREAD_COLOR)
 
-    if img is None:
+def attach_face(img_rgb, gray, parsed, budget: Budget, face_format: str):
+    """Crop + encode wajah sekali; isi parsed.faceImage. Returns (face, media_type)."""
+    face = None
+    face_media_type = None
+
+    if budget.allow("face"):
+        face_crop = detect_and_crop_face(img_rgb, gray)
+        if face_crop is not None:
+            face, face_media_type = encode_face(face_crop)
+            if face_format != "bytes":
+                face = base64.b64encode(face).decode("utf-8")
+
+    if "faceImage" in parsed:
+        if face is None:
+            parsed["faceImage"] = ""
+        else:
+            parsed["faceImage"] = FACE_PLACEHOLDER if face_format == "bytes" else face
+
+    return face, face_media_type
+
+
+def run_pipeline(contents, budget: Budget = None, face_format: str = "base64",
+                 dedup_scope: str = None) -> dict:
+    """
+    contents    : bytes / ndarray uint8 berisi file gambar terenkode, atau
+                  shm_pool.FrameHandle (proses worker, lihat runtime/inference_workers.py)
+    face_format : "base64" (default, untuk JSON) atau "bytes" -> `face` berisi
+                  gambar mentah dan parsed.faceImage placeholder; caller yang
+                  menentukan cara kirim (lihat runtime/responses.py)
+    dedup_scope : client/session id; kalau diisi, foto yang near-duplicate
+                  dengan hasil sebelumnya di scope ini dipakai ulang / di-merge
+    """
+    budget = budget or Budget()
+
+    # CAPTURE_RATE > 0: sebagian request direkam untuk replay offline
+    with capture.recording(contents) as recorder:
+        result = _run_pipeline(contents, budget, face_format, dedup_scope)
+        if recorder is not None:
+            recorder.finish(result)
+    return result
+
+
+def _run_pipeline(contents, budget: Budget, face_format: str, dedup_scope: str) -> dict:
+    with budget.stage("decode"):
+        if isinstance(contents, shm_pool.FrameHandle):
+            # sudah di-decode proses API ke shared memory: view zero-copy
+            img_rgb, gray, hires = shm_pool.attach(contents)
+        else:
+            img_rgb, gray, hires = decode_image(contents)
+
+    if img_rgb is None:
         raise HTTPException(status_code=400, detail="Invalid image file")
 
-    img_rgb = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-    text = extract_text(img)
+    # foto terputar 90/180 diputar sekali di sini, sebelum hash & deteksi
+    with budget.stage("orientation"):
+        img_rgb, gray, orientation = apply_orientation(img_rgb, gray, hires)
+
+    # =========================
+    # NEAR-DUPLICATE (foto ulang kartu yang sama)
+    # =========================
+    dup, img_hash = None, None
+    if dedup_scope and dedup.DEDUP_ENABLED:
+        dedup_scope = f"{dedup_scope}:{face_format}"
+        img_hash = dedup.phash(gray)
+        dup, distance = dedup.index.lookup(dedup_scope, img_hash)
+        if dup is not None and dedup.is_complete(dup.result):
+            # pHash mirip belum tentu kartu yang sama (template sama, orang lain):
+            # nomor dokumen di foto ini harus sama persis sebelum hasil dipakai ulang
+            with budget.stage("dedup_check"):
+                doc_id = read_document_id(img_rgb, dup.result, budget, hires)
+            if dedup.same_document(dup.result, doc_id):
+                dedup.index.count("reused")
+                result = copy.deepcopy(dup.result)
+                result["duplicate_of"] = {"id": dup.id, "distance": distance, "reused": True}
+                result["timings"] = budget.timings_ms()
+                return result
+            dedup.index.count("id_mismatch")
+            dup = None
+
+    with budget.stage("extract_text"):
+        text = extract_text(gray)
 
-    doc_type = detect_doc_type(img_rgb, text)
+    budget.check()
+    with budget.stage("detect_doc_type"):
+        doc_type, doc_type_info = detect_doc_type(img_rgb, text, gray)
 
     # =========================
     # DOCUMENT PROCESSING
     # =========================
-    if doc_type == "passport":
-        parsed = process_passport(
-            img_rgb, passport_model, reader
+    budget.check()
+    field_conf = {}
+    with budget.stage("process_document"):
+        if doc_type == "passport":
+            parsed = process_passport(
+                img_rgb, models.passport_model(), models.reader(), budget=budget, hires=hires,
+                confidences=field_conf
+            )
+        else:
+            parsed = process_driving_license(
+                img_rgb, models.driving_model(), models.reader(), budget=budget, gray=gray,
+                hires=hires, extract_face=False, confidences=field_conf
+            )
+
+    # =========================
+    # FACE DETECTION (sekali, dipakai untuk `face` dan parsed.faceImage)
+    # =========================
+    with budget.stage("face"):
+        face, face_media_type = attach_face(img_rgb, gray, parsed, budget, face_format)
+
+    # =========================
+    # FALLBACK PIPELINE
+    # =========================
+    with budget.stage("fallback"):
+        parsed = apply_fallback(img_rgb, models.reader(), parsed, budget=budget)
+
+    result = {
+        "success": True,
+        "detected_type": doc_type,
+        "doc_type_method": doc_type_info["method"],
+        "doc_type_confidence": doc_type_info["confidence"],
+        "orientation": orientation,
+        "face": face,
+        "face_media_type": face_media_type,
+        "parsed": parsed,
+        # confidence box YOLO per field; field dari fallback tidak punya
+        "field_confidence": {k: round(v, 3) for k, v in field_conf.items() if parsed.get(k)},
+        "partial": budget.partial,
+        "skipped_stages": budget.skipped,
+        "timings": budget.timings_ms(),
+        "model_versions": models.versions()
+    }
+
+    if img_hash is not None:
+        if dup is not None and not dedup.same_document(dup.result, dedup.document_id(result)):
+            # dokumen lain: jangan isi field dari hasil orang lain
+            dedup.index.count("id_mismatch")
+            dup = None
+        if dup is None:
+            dedup.index.add(dedup_scope, img_hash, result)
+        else:
+            # field yang kosong di foto ini diisi dari foto sebelumnya (dan sebaliknya
+            # entry index diperbarui dengan gabungannya)
+            merged = dedup.merge_fields(result, dup.result)
+            if merged:
+                dedup.index.count("merged")
+            dedup.index.update(dup, result)
+            result["duplicate_of"] = {
+                "id": dup.id, "distance": distance, "reused": False, "merged_fields": merged
+            }
+
+    return result
+
+
+def read_document_id(img_rgb, previous, budget: Budget, hires=None) -> str:
+    """Nomor dokumen di foto ini, dibaca dari crop-nya saja (cek near-duplicate)."""
+    if previous.get("detected_type") == "passport":
+        return read_passport_number(img_rgb, models.passport_model(), models.reader(), budget, hires)
+    return read_license_number(
+        img_rgb, models.driving_model(), models.reader(), budget, hires,
+        state=previous.get("parsed", {}).get("StateName", "")
+    )
+
+
+def admit(headers, host):
+    """Ticket admission (None kalau mati); 429 / 503 + Retry-After kalau ditolak."""
+    if ADMISSION is None:
+        return None
+    try:
+        return ADMISSION.admit(admission.client_key(headers, host, ADMISSION.config))
+    except admission.Rejected as e:
+        status = 503 if e.reason == "queue_full" else 429
+        raise HTTPException(
+            status_code=status, detail=f"Too many requests ({e.reason})",
+            headers={"Retry-After": str(e.retry_after)}
         )
-    else:
-        parsed = process_driving_license(
-            img_rgb, driving_model, reader
+
+
+def release(ticket):
+    if ADMISSION is not None:
+        ADMISSION.release(ticket)
+
+
+def fair_turn(ticket, budget: Budget):
+    return ADMISSION.turn(ticket, budget) if ADMISSION is not None else nullcontext()
+
+
+def run_pipeline_locked(fileobj, budget: Budget, face_format: str = "base64",
+                        dedup_scope: str = None, profile: bool = False, ticket=None) -> dict:
+    contents = read_upload_buffer(fileobj)
+    with fair_turn(ticket, budget):
+        return _run_admitted(contents, budget, face_format, dedup_scope, profile)
+
+
+def _run_admitted(contents, budget: Budget, face_format, dedup_scope, profile) -> dict:
+    pool = inference_workers.get_pool()
+    if pool is not None and not profile:
+        result, error = pool.run(contents, budget, face_format, dedup_scope)
+        if error is not None:
+            raise HTTPException(status_code=error[0], detail=error[1])
+        # decode terjadi di proses API, sisanya di worker
+        result["timings"] = dict(
+            result["timings"], handoff_decode=budget.timings["decode"], total=round(budget.elapsed_ms(), 2)
         )
+        return result
+
+    with PIPELINE_LOCK, models.pin():
+        budget.check()
+        if not profile:
+            return run_pipeline(contents, budget, face_format, dedup_scope)
+
+        # hanya request ?profile=1 (admin); tunggu lock tidak ikut di-sample
+        with profiler.sample(budget) as sampler:
+            result = run_pipeline(contents, budget, face_format, dedup_scope)
+    result["profile"] = profiler.save(sampler, result["timings"])
+    return result
+
+
+def run_burst(frames, budget: Budget = None, face_format: str = "base64") -> dict:
+    """
+    frames : list bytes / ndarray (2..BURST_MAX_FRAMES foto dokumen yang sama)
+
+    Tiap frame: crop OCR saja (fallback, full OCR paspor & wajah dimatikan).
+    Kandidat per field di-vote (runtime/burst.py); wajah + fallback mahal
+    dijalankan sekali di frame terbaik, hanya untuk field yang masih kosong.
+    """
+    budget = budget or Budget()
+
+    decoded, orientations = [], []
+    for i, contents in enumerate(frames):
+        with budget.stage("decode"):
+            img_rgb, gray, hires = decode_image(contents)
+        if img_rgb is None:
+            raise HTTPException(status_code=400, detail=f"Invalid image file (frame {i})")
+        with budget.stage("orientation"):
+            img_rgb, gray, orientation = apply_orientation(img_rgb, gray, hires)
+        decoded.append((img_rgb, gray, hires))
+        orientations.append(orientation["angle"])
+
+    # doc type: vote classifier (murah), detector hanya kalau semua frame ragu
+    budget.check()
+    with budget.stage("detect_doc_type"):
+        scores = {}
+        for img_rgb, gray, _ in decoded:
+            t, conf, _ = classify_doc_type(img_rgb, gray)
+            scores.setdefault(t, []).append(conf)
+        doc_type = max(scores, key=lambda t: sum(scores[t]))
+        doc_type_info = {"method": "classifier_vote", "confidence": round(max(scores[doc_type]), 3)}
+        if doc_type_info["confidence"] < DOC_CLASSIFIER_MIN_CONF:
+            doc_type, doc_type_info = detect_doc_type(decoded[0][0], "", decoded[0][1])
 
     # =========================
-    # FACE DETECTION
+    # CHEAP PASS PER FRAME
     # =========================
-    face_image = detect_and_crop_face(img_rgb)
-    face_base64 = None
+    candidates = []
+    budget.denied = set(CHEAP_PASS_DENIED)
+    try:
+        for img_rgb, gray, hires in decoded:
+            budget.check()
+            conf = {}
+            with budget.stage("process_document"):
+                if doc_type == "passport":
+                    parsed = process_passport(
+                        img_rgb, models.passport_model(), models.reader(), budget=budget, hires=hires,
+                        confidences=conf
+                    )
+                else:
+                    parsed = process_driving_license(
+                        img_rgb, models.driving_model(), models.reader(), budget=budget, gray=gray,
+                        hires=hires, extract_face=False, confidences=conf
+                    )
+            candidates.append((parsed, conf))
+    finally:
+        budget.denied = set()
 
-    if face_image:
-        face_base64 = face_to_base64(face_image)
+    parsed, votes = vote_fields(candidates)
+    best = best_frame(votes, len(decoded))
+    img_rgb, gray, _ = decoded[best]
 
     # =========================
-    # FALLBACK PIPELINE
+    # FACE + FALLBACK (SEKALI, FRAME TERBAIK)
     # =========================
-    parsed = apply_fallback(img_rgb, reader, parsed)
+    with budget.stage("face"):
+        face, face_media_type = attach_face(img_rgb, gray, parsed, budget, face_format)
 
-    return JSONResponse({
+    with budget.stage("fallback"):
+        if doc_type == "passport":
+            if not parsed.get("dateOfBirth") or not parsed.get("gender"):
+                parsed = apply_full_ocr(img_rgb, models.reader(), parsed, budget)
+                parsed = {k: (v.upper() if isinstance(v, str) else v) for k, v in parsed.items()}
+        else:
+            parsed = apply_fallback(img_rgb, models.reader(), parsed, budget=budget)
+
+    return {
         "success": True,
         "detected_type": doc_type,
-        "face": face_base64,
-        "parsed": parsed
-    })
+        "doc_type_method": doc_type_info["method"],
+        "doc_type_confidence": doc_type_info["confidence"],
+        "face": face,
+        "face_media_type": face_media_type,
+        "parsed": parsed,
+        "field_confidence": {
+            k: round(v["score"] / len(decoded), 3) for k, v in votes.items() if parsed.get(k)
+        },
+        "field_votes": {k: v["frames"] for k, v in votes.items()},
+        "orientation": orientations,
+        "frames": len(decoded),
+        "best_frame": best,
+        "partial": budget.partial,
+        "skipped_stages": budget.skipped,
+        "timings": budget.timings_ms(),
+        "model_versions": models.versions()
+    }
+
+
+def run_frame_locked(buf: np.ndarray, budget: Budget, ticket=None) -> dict:
+    # INFERENCE_PROCS > 0: lewat proses worker seperti /detect
+    with fair_turn(ticket, budget):
+        return _run_admitted(buf, budget, "base64", None, False)
+
+
+def run_job(payload: bytes, deadline_ms: Optional[int]) -> dict:
+    budget = Budget(deadline_ms)
+    result = _run_admitted(payload, budget, "base64", None, False)
+    results_store.record(result, "job")
+    return result
+
+
+def require_local_models():
+    """
+    409 kalau INFERENCE_PROCS > 0: model ada di proses worker, jadi swap model,
+    profiling dan burst di proses API tidak berefek / memuat salinan model kedua.
+    """
+    if inference_workers.INFERENCE_PROCS > 0:
+        raise HTTPException(
+            status_code=409,
+            detail="Not available with INFERENCE_PROCS > 0: models run in inference worker processes"
+        )
+
+
+async def watch_disconnect(request: Request, budget: Budget, interval=0.1):
+    while not budget.cancelled:
+        if await request.is_disconnected():
+            budget.cancel()
+            return
+        await asyncio.sleep(interval)
+
+
+def face_url_for(request: Request, media_type):
+    """face=url -> callable(bytes) -> URL /faces/{id}; None (inline) kalau multi-worker."""
+    if not url_mode_available():
+        return None
+    return lambda data: str(request.url_for("get_face", face_id=faces.put(data, media_type)))
+
+
+@app.post("/detect")
+async def detect_document(
+    request: Request,
+    file: UploadFile = File(...),
+    deadline_ms: Optional[int] = Query(None, gt=0),
+    x_deadline_ms: Optional[int] = Header(None, gt=0),
+    x_session_id: Optional[str] = Header(None, max_length=128),
+    face: str = Query("inline", pattern="^(inline|url|omit)$"),
+    profile: bool = Query(False),
+    x_admin_token: Optional[str] = Header(None)
+):
+    if profile:
+        require_admin(x_admin_token)
+        # sampler hanya melihat proses API, pipeline-nya jalan di worker
+        require_local_models()
+
+    ticket = admit(request.headers, request.client and request.client.host)
+    budget = Budget(deadline_ms or x_deadline_ms or DEFAULT_DEADLINE_MS)
+
+    watcher = asyncio.create_task(watch_disconnect(request, budget))
+
+    try:
+        result = await run_in_threadpool(
+            run_pipeline_locked, file.file, budget, "bytes", x_session_id, profile, ticket
+        )
+    except PipelineCancelled:
+        # client sudah pergi, status ini tidak akan sampai ke siapa pun
+        return Response(status_code=499)
+    except PoolExhausted:
+        raise HTTPException(status_code=503, detail="Inference workers busy", headers={"Retry-After": "1"})
+    finally:
+        watcher.cancel()
+        release(ticket)
+
+    results_store.record(result, "detect")
+
+    face_bytes = result.pop("face")
+    media_type = result["face_media_type"]
+    return build_detect_response(
+        result, face_bytes, request, face_mode=face, face_media_type=media_type,
+        face_url=face_url_for(request, media_type)
+    )
+
+
+# burst butuh pass murah per frame + voting, belum ada di protokol worker
+@app.post("/detect/burst", dependencies=[Depends(require_local_models)])
+async def detect_burst(
+    request: Request,
+    files: List[UploadFile] = File(...),
+    deadline_ms: Optional[int] = Query(None, gt=0),
+    x_deadline_ms: Optional[int] = Header(None, gt=0),
+    face: str = Query("inline", pattern="^(inline|url|omit)$")
+):
+    if not BURST_MIN_FRAMES <= len(files) <= BURST_MAX_FRAMES:
+        raise HTTPException(
+            status_code=400, detail=f"Send {BURST_MIN_FRAMES}-{BURST_MAX_FRAMES} frames"
+        )
+
+    ticket = admit(request.headers, request.client and request.client.host)
+    budget = Budget(deadline_ms or x_deadline_ms or DEFAULT_DEADLINE_MS)
+    watcher = asyncio.create_task(watch_disconnect(request, budget))
+
+    def run():
+        frames = [read_upload_buffer(f.file) for f in files]
+        with fair_turn(ticket, budget), PIPELINE_LOCK, models.pin():
+            budget.check()
+            return run_burst(frames, budget, "bytes")
+
+    try:
+        result = await run_in_threadpool(run)
+    except PipelineCancelled:
+        return Response(status_code=499)
+    finally:
+        watcher.cancel()
+        release(ticket)
+
+    results_store.record(result, "burst")
+
+    face_bytes = result.pop("face")
+    media_type = result["face_media_type"]
+    return build_detect_response(
+        result, face_bytes, request, face_mode=face, face_media_type=media_type,
+        face_url=face_url_for(request, media_type)
+    )
+
+
+@app.get("/metrics")
+def metrics():
+    return {
+        "models": models.status(),
+        "dedup": dedup.index.stats(),
+        "results_store": results_store.stats(),
+        "capture": capture.stats(),
+        "admission": ADMISSION.status() if ADMISSION is not None else {"enabled": False},
+        "inference": inference_workers.get_pool().status() if inference_workers.get_pool() else None,
+    }
+
+
+# =========================
+# ADMIN
+# =========================
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    """Endpoint admin (/admin/*, /results, ?profile=1) mati kalau ADMIN_TOKEN tidak di-set."""
+    if not ADMIN_TOKEN or not x_admin_token or not hmac.compare_digest(x_admin_token, ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Admin token required")
+
+
+@app.get("/admin/models", dependencies=[Depends(require_admin)])
+def admin_models():
+    return models.status()
+
+
+@app.post("/admin/models/{name}/reload", status_code=202,
+          dependencies=[Depends(require_admin), Depends(require_local_models)])
+def admin_reload_model(name: str, path: Optional[str] = Query(None)):
+    try:
+        return models.reload(name, path)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+
+@app.post("/admin/models/{name}/rollback", dependencies=[Depends(require_admin), Depends(require_local_models)])
+def admin_rollback_model(name: str):
+    try:
+        return {"name": name, "version": models.rollback(name)}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+
+@app.get("/admin/profiles/{profile_id}", dependencies=[Depends(require_admin)])
+def admin_profile(profile_id: str):
+    """Collapsed stacks (flamegraph.pl / speedscope) dari /detect?profile=1."""
+    item = profiler.get(profile_id)
+    if item is None:
+        raise HTTPException(status_code=404, detail="Profile expired or not found")
+    return Response(content=item[0], media_type="text/plain")
+
+
+# =========================
+# STORED RESULTS (tanpa menyentuh pipeline OCR)
+# =========================
+def _results_store():
+    store = results_store.get_store()
+    if store is None:
+        raise HTTPException(status_code=503, detail="Results store disabled (set RESULTS_STORE)")
+    return store
+
+
+# hasil berisi PII (nama, DOB, nomor SIM / paspor): hanya dengan token admin
+@app.get("/results", dependencies=[Depends(require_admin)])
+async def query_results(
+    license_number: Optional[str] = None,
+    passport_number: Optional[str] = None,
+    dob: Optional[str] = None,
+    first_name: Optional[str] = None,
+    last_name: Optional[str] = None,
+    doc_type: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=500)
+):
+    store = _results_store()
+    rows = await run_in_threadpool(
+        store.query, limit, license_number=license_number, passport_number=passport_number,
+        dob=dob, first_name=first_name, last_name=last_name, doc_type=doc_type
+    )
+    return {"results": rows, "count": len(rows)}
+
+
+@app.get("/results/{result_id}", dependencies=[Depends(require_admin)])
+async def get_result(result_id: str):
+    row = await run_in_threadpool(_results_store().get, result_id)
+    if row is None:
+        raise HTTPException(status_code=404, detail="Result not found")
+    return row
+
+
+@app.get("/faces/{face_id}")
+def get_face(face_id: str):
+    item = faces.get(face_id)
+    if item is None:
+        raise HTTPException(status_code=404, detail="Face expired or not found")
+    data, media_type = item
+    return Response(content=data, media_type=media_type, headers={"Cache-Control": "private, max-age=60"})
+
+
+# =========================
+# LIVE SCAN (WEBSOCKET)
+# =========================
+@app.websocket("/ws/scan")
+async def live_scan(websocket: WebSocket):
+    """
+    Client kirim frame JPEG (binary message) terus-menerus; text "reset"
+    mengosongkan akumulasi. Server membalas JSON per frame yang diproses:
+    {"type": "rejected" | "partial" | "complete" | "incomplete", ...}.
+    Frame yang datang saat pipeline sibuk hanya menimpa slot `latest`.
+    """
+    await websocket.accept()
+
+    try:
+        ticket = admit(websocket.headers, websocket.client and websocket.client.host)
+    except HTTPException as e:
+        await websocket.send_json({
+            "type": "rejected", "detail": e.detail, "retry_after": int(e.headers["Retry-After"])
+        })
+        await websocket.close(code=1013)    # try again later
+        return
+
+    acc = FieldAccumulator()
+    latest = {"frame": None, "budget": None}
+    stats = {"received": 0, "dropped": 0, "rejected": 0, "processed": 0}
+    new_frame = asyncio.Event()
+    closed = asyncio.Event()
+
+    async def receive():
+        try:
+            while True:
+                msg = await websocket.receive()
+                if msg["type"] == "websocket.disconnect":
+                    break
+                data = msg.get("bytes")
+                if data is not None:
+                    if len(data) > LIVE_MAX_FRAME_BYTES:
+                        stats["rejected"] += 1
+                        continue
+                    stats["received"] += 1
+                    if latest["frame"] is not None:
+                        stats["dropped"] += 1
+                    latest["frame"] = data
+                    new_frame.set()
+                elif (msg.get("text") or "").strip().lower() == "reset":
+                    acc.reset()
+        except WebSocketDisconnect:
+            pass
+        finally:
+            closed.set()
+            new_frame.set()
+            if latest["budget"] is not None:
+                latest["budget"].cancel()
+
+    receiver = asyncio.create_task(receive())
+    frame_no = 0
+
+    try:
+        while not closed.is_set() and stats["processed"] < LIVE_MAX_FRAMES:
+            await new_frame.wait()
+            new_frame.clear()
+            data, latest["frame"] = latest["frame"], None
+            if data is None:
+                continue
+
+            frame_no += 1
+            buf = np.frombuffer(data, np.uint8)
+            quality = await run_in_threadpool(frame_quality, buf)
+            if not quality["ok"]:
+                stats["rejected"] += 1
+                await websocket.send_json({"type": "rejected", "frame": frame_no, "quality": quality})
+                continue
+
+            latest["budget"] = budget = Budget(LIVE_DEADLINE_MS)
+            try:
+                result = await run_in_threadpool(run_frame_locked, buf, budget, ticket)
+            except (HTTPException, PoolExhausted):
+                stats["rejected"] += 1
+                continue
+            except PipelineCancelled:
+                break
+            finally:
+                latest["budget"] = None
+
+            stats["processed"] += 1
+            changed = acc.update(result, quality["score"], frame_no)
+
+            msg = acc.snapshot(include_face="faceImage" in changed or acc.complete)
+            msg.update({
+                "type": "complete" if acc.complete else "partial",
+                "frame": frame_no,
+                "changed": changed,
+                "quality": quality,
+                "stats": stats,
+            })
+            await websocket.send_json(msg)
+            if acc.complete:
+                results_store.record(dict(msg, success=True), "live", models.versions())
+                break
+
+        if not closed.is_set() and not acc.complete:
+            msg = acc.snapshot()
+            msg.update({"type": "incomplete", "frame": frame_no, "stats": stats})
+            await websocket.send_json(msg)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        receiver.cancel()
+        release(ticket)
+
+    if not closed.is_set():
+        await websocket.close()
+
+
+# =========================
+# ASYNC JOB API
+# =========================
+@app.post("/jobs", status_code=202)
+async def submit_job(
+    request: Request,
+    file: UploadFile = File(...),
+    priority: Optional[str] = Query(None, description="interactive | normal | bulk | int (0-10)"),
+    callback_url: Optional[str] = Query(None),
+    deadline_ms: Optional[int] = Query(None, gt=0)
+):
+    try:
+        prio = jobs.parse_priority(priority)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid priority")
+    if callback_url and not jobs.callback_allowed(callback_url):
+        raise HTTPException(status_code=400, detail="callback_url host not allowed")
+
+    # job async: cukup rate limit (token bucket), antrian job yang mengatur urutan
+    release(admit(request.headers, request.client and request.client.host))
+
+    contents = await file.read()
+    job_id = await run_in_threadpool(
+        jobs.get_queue().enqueue, contents, prio, callback_url, deadline_ms
+    )
+    return {"job_id": job_id, "status": "queued"}
+
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str, wait: float = Query(0, ge=0, le=30)):
+    queue = jobs.get_queue()
+    deadline = asyncio.get_running_loop().time() + wait
+
+    while True:
+        job = await run_in_threadpool(queue.get, job_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail="Job not found")
+        if job["status"] in ("done", "failed"):
+            return job
+        if asyncio.get_running_loop().time() >= deadline:
+            return job
+        await asyncio.sleep(0.25)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,80 @@
+"""
+Post-processing box YOLO sebelum OCR.
+
+- satu transfer tensor -> numpy per hasil (boxes.data: x1 y1 x2 y2 conf cls),
+  bukan box.cls.item() / box.xyxy.cpu() per box
+- seleksi per class: kandidat urut confidence (default maksimal
+  BOX_CANDIDATES per field), atau box yang overlap digabung jadi satu
+  (field multi-baris seperti address)
+"""
+import os
+import numpy as np
+
+# kandidat box per field yang boleh di-OCR (berikutnya hanya kalau
+# kandidat sebelumnya tidak menghasilkan value valid)
+BOX_CANDIDATES = int(os.getenv("BOX_CANDIDATES", "2"))
+
+# padding (px) saat menentukan box yang bersinggungan untuk mode merge
+MERGE_PAD = 4
+
+
+def boxes_to_numpy(boxes):
+    """Returns (xyxy int32 Nx4, conf float32 N, cls int32 N)."""
+    if boxes is None or len(boxes) == 0:
+        return np.zeros((0, 4), np.int32), np.zeros(0, np.float32), np.zeros(0, np.int32)
+    data = boxes.data.cpu().numpy()
+    return data[:, :4].astype(np.int32), data[:, 4].astype(np.float32), data[:, 5].astype(np.int32)
+
+
+def _merge_overlapping(xyxy, conf):
+    """Gabung box yang overlap / bersinggungan. Returns list (conf max, box) urut conf."""
+    groups = []
+    for i in np.argsort(-conf):
+        box = xyxy[i].copy()
+        c = float(conf[i])
+        for g in groups:
+            gb = g[1]
+            if (box[0] - MERGE_PAD <= gb[2] and gb[0] - MERGE_PAD <= box[2]
+                    and box[1] - MERGE_PAD <= gb[3] and gb[1] - MERGE_PAD <= box[3]):
+                g[1] = np.array([min(gb[0], box[0]), min(gb[1], box[1]),
+                                 max(gb[2], box[2]), max(gb[3], box[3])])
+                break
+        else:
+            groups.append([c, box])
+    return [(c, tuple(int(v) for v in b)) for c, b in groups]
+
+
+def select_candidates(xyxy, conf, cls, names, fields, merge_classes=(), limit=None, unlimited=()):
+    """
+    names     : model.names (id -> nama class)
+    fields    : nama class yang dipakai (class lain dibuang sebelum OCR)
+    unlimited : class yang semua kandidatnya dikembalikan (tanpa `limit`)
+    Returns {class: [(conf, (x1, y1, x2, y2)), ...]} urut confidence turun,
+    key urut sesuai `fields`.
+    """
+    limit = limit or BOX_CANDIDATES
+    out = {}
+    for name in fields:
+        ids = [i for i, n in names.items() if n == name]
+        mask = np.isin(cls, ids)
+        if not mask.any():
+            continue
+        if name in merge_classes:
+            cands = _merge_overlapping(xyxy[mask], conf[mask])
+        else:
+            order = np.argsort(-conf[mask], kind="stable")
+            cands = [(float(c), tuple(int(v) for v in b))
+                     for c, b in zip(conf[mask][order], xyxy[mask][order])]
+        out[name] = cands if name in unlimited else cands[:limit]
+    return out
+
+
+def crop_box(image_rgb, box, hires=None):
+    """Crop (clip ke batas gambar); hires -> crop kecil diambil dari full-res."""
+    h, w = image_rgb.shape[:2]
+    x1, y1, x2, y2 = box
+    x1, y1 = max(0, x1), max(0, y1)
+    x2, y2 = min(w, x2), min(h, y2)
+    if hires is not None:
+        return hires.crop(image_rgb, x1, y1, x2, y2)
+    return image_rgb[y1:y2, x1:x2]
@@ -0,0 +1,74 @@
+"""
+Deteksi field YOLO coarse-to-fine.
+
+Sebagian besar scan SIM cukup bersih sehingga input kecil (mis. imgsz 416)
+sudah menemukan semua field. Mode coarse-to-fine menjalankan model di
+COARSE_IMGSZ dulu dan menerima hasilnya kalau SEMUA class yang diharapkan
+ada dengan confidence >= COARSE_MIN_CONF; kalau ada class yang hilang
+atau ragu, model dijalankan ulang di DETECT_IMGSZ (ukuran penuh).
+
+    COARSE_IMGSZ=0    -> mati, satu pass di DETECT_IMGSZ (default)
+    COARSE_IMGSZ=416  -> pass kecil dulu
+
+DETECT_IMGSZ=0 (default) -> imgsz tidak dikirim ke predict, model memakai
+ukurannya sendiri (imgsz training di checkpoint), sama seperti sebelum
+modul ini ada.
+
+Koordinat box selalu di gambar input (ultralytics men-scale balik), jadi
+crop OCR tidak berubah. Pilih ukuran dengan `python -m bench.eval_imgsz`.
+"""
+import os
+from contextlib import nullcontext
+from processors.boxes import boxes_to_numpy
+
+# 0 = default model (tidak ada argumen imgsz)
+DETECT_IMGSZ = int(os.getenv("DETECT_IMGSZ", "0"))
+COARSE_IMGSZ = int(os.getenv("COARSE_IMGSZ", "0"))
+COARSE_MIN_CONF = float(os.getenv("COARSE_MIN_CONF", "0.5"))
+
+
+def predict_numpy(model, image_rgb, conf, iou, imgsz=None):
+    """imgsz None / 0 -> tidak dikirim, ultralytics memakai default model."""
+    kwargs = {"imgsz": imgsz} if imgsz else {}
+    results = model.predict(image_rgb, conf=conf, iou=iou, verbose=False, **kwargs)
+    return boxes_to_numpy(results[0].boxes)
+
+
+def model_imgsz(model):
+    """imgsz default model: args training di checkpoint, 640 (default ultralytics) kalau tidak ada."""
+    imgsz = (getattr(model, "overrides", None) or {}).get("imgsz") or 640
+    return max(imgsz) if isinstance(imgsz, (list, tuple)) else int(imgsz)
+
+
+def missing_classes(scores, cls_ids, names, expected, min_conf):
+    """Class di `expected` yang tidak ada box-nya dengan confidence >= min_conf."""
+    best = {}
+    for c, s in zip(cls_ids, scores):
+        name = names[int(c)]
+        best[name] = max(best.get(name, 0.0), float(s))
+    return [f for f in expected if best.get(f, 0.0) < min_conf]
+
+
+def detect_fields(model, image_rgb, expected, conf, iou, budget=None):
+    """
+    Returns (xyxy, scores, cls_ids, info); info = {"imgsz", "passes", "coarse_missing"}.
+    Durasi tiap pass dicatat di budget.timings (detect_coarse / detect_full).
+    """
+    coarse, full = COARSE_IMGSZ, DETECT_IMGSZ
+    info = {"imgsz": full or model_imgsz(model), "passes": 1}
+
+    if coarse and coarse < info["imgsz"]:
+        with _stage(budget, "detect_coarse"):
+            xyxy, scores, cls_ids = predict_numpy(model, image_rgb, conf, iou, coarse)
+        missing = missing_classes(scores, cls_ids, model.names, expected, COARSE_MIN_CONF)
+        if not missing:
+            return xyxy, scores, cls_ids, {"imgsz": coarse, "passes": 1}
+        info = dict(info, passes=2, coarse_missing=missing)
+
+    with _stage(budget, "detect_full"):
+        xyxy, scores, cls_ids = predict_numpy(model, image_rgb, conf, iou, full)
+    return xyxy, scores, cls_ids, info
+
+
+def _stage(budget, name):
+    return budget.stage(name) if budget is not None else nullcontext()
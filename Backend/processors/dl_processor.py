@@ -4,7 +4,12 @@ import numpy as np
 import difflib
 from datetime import datetime
 from processors.face_extractor import detect_and_crop_face, face_to_base64
+from processors.ocr_profiles import get_profile, read_field, validate
+from processors.boxes import select_candidates, crop_box
+from processors.detection import detect_fields
 from fallback.config import VALID_STATES
+from runtime.budget import Budget
+from runtime.ocr_pool import map_ordered, readtext
 
 pytesseract.pytesseract.tesseract_cmd = r"C:\Program Files\Tesseract-OCR\tesseract.exe"
 
@@ -35,15 +40,23 @@ def dbg(tag, payload=None):
         else:
             print(to_python(payload))
 
-def read_text(img, reader):
+def read_text(img, reader, budget=None, profile=None):
+    if profile is not None:
+        txt = read_field(img, reader, profile, budget)
+        dbg("OCR_PROFILE_RESULT", {"pattern": profile.get("pattern"), "text": txt})
+        return txt
+
     try:
-        res = reader.readtext(img, detail=0, paragraph=False)
+        res = readtext(reader, img, detail=0, paragraph=False)
         dbg("OCR_EASYOCR_RESULT", res)
         if res:
             return " ".join(res).strip()
     except Exception as e:
         dbg("OCR_EASYOCR_ERROR", str(e))
 
+    if budget is not None and not budget.allow("tesseract_retry"):
+        return ""
+
     txt = pytesseract.image_to_string(
         img, config="--oem 1 --psm 7"
     ).strip()
@@ -116,7 +129,103 @@ def normalize_state(txt):
     dbg("STATE_INVALID", t)
     return ""
 
-def process_driving_license(image_rgb, model, reader, conf=0.35, iou=0.45):
+def merge_field(data, confidences, cls, raw, box_conf):
+    """Bersihkan hasil OCR satu crop dan gabungkan ke `data` (dipanggil urut box)."""
+    txt = re.sub(r"[^A-Za-z0-9\s/]", "", raw).strip()
+
+    if not txt:
+        return
+
+    if cls == "licenseNumber":
+        txt = clean_license_number(txt)
+
+    elif cls == "sex":
+        txt = clean_sex(txt)
+
+    elif cls == "dateOfBirth":
+        d = clean_date(txt)
+        if not d:
+            return
+
+        if not is_valid_dob(d):
+            dbg("DOB_REJECTED_INVALID", d)
+            return
+
+        if not data["dateOfBirth"]:
+            data["dateOfBirth"] = d
+            confidences["dateOfBirth"] = box_conf
+        else:
+            old_year = int(data["dateOfBirth"].split("/")[-1])
+            new_year = int(d.split("/")[-1])
+            if new_year < old_year:
+                data["dateOfBirth"] = d
+                confidences["dateOfBirth"] = box_conf
+
+        return
+
+    if cls == "StateName":
+        normalized = normalize_state(txt)
+        if normalized:
+            data["StateName"] = normalized
+            confidences["StateName"] = box_conf
+        return
+
+    if not data[cls]:
+        data[cls] = txt.upper()
+        confidences[cls] = box_conf
+
+# field yang value-nya sudah lolos cleaner ketat (non-kosong = valid)
+CLEANER_VALIDATED = {"StateName", "dateOfBirth", "sex"}
+
+# field yang semua kandidatnya di-OCR walau sudah valid (tanpa batas
+# BOX_CANDIDATES): merge_field yang memilih antar box (dateOfBirth: tahun
+# tertua menang, aturan baseline)
+COMPARE_ALL = {"dateOfBirth"}
+
+# box overlap class ini digabung jadi satu crop (alamat bisa 2 baris)
+MERGE_CLASSES = {"address"}
+
+
+def field_valid(cls, value, state=""):
+    if not value:
+        return False
+    if cls in CLEANER_VALIDATED:
+        return True
+    profile = get_profile("driving_license", cls, state)
+    if profile and profile.get("pattern"):
+        return bool(validate(value, profile))
+    return True
+
+
+def read_license_number(image_rgb, model, reader, budget=None, hires=None, state="",
+                        conf=0.35, iou=0.45):
+    """
+    OCR crop licenseNumber saja (box confidence tertinggi), dibersihkan sama
+    seperti di process_driving_license. Dipakai cek near-duplicate
+    (runtime/dedup.py); "" kalau box tidak ketemu.
+    """
+    xyxy, scores, cls_ids, _ = detect_fields(model, image_rgb, ["licenseNumber"], conf, iou, budget)
+    candidates = select_candidates(xyxy, scores, cls_ids, model.names, ["licenseNumber"], limit=1)
+    if "licenseNumber" not in candidates:
+        return ""
+    crop = crop_box(image_rgb, candidates["licenseNumber"][0][1], hires)
+    if crop.size == 0:
+        return ""
+    raw = read_text(crop, reader, budget, get_profile("driving_license", "licenseNumber", state))
+    txt = re.sub(r"[^A-Za-z0-9\s/]", "", raw).strip()
+    return clean_license_number(txt) if txt else ""
+
+
+def process_driving_license(image_rgb, model, reader, conf=0.35, iou=0.45,
+                            budget=None, gray=None, hires=None, extract_face=True,
+                            confidences=None):
+    """
+    confidences : dict opsional, diisi {field: confidence box YOLO} untuk
+                  field yang terisi dari crop (dipakai live scan)
+    """
+    budget = budget or Budget()
+    if confidences is None:
+        confidences = {}
 
     dbg("PROCESS_START", {
         "conf": conf,
@@ -124,15 +233,6 @@ def process_driving_license(image_rgb, model, reader, conf=0.35, iou=0.45):
         "image_shape": image_rgb.shape
     })
 
-    results = model.predict(image_rgb, conf=conf, iou=iou, verbose=False)
-    boxes = results[0].boxes
-    names = model.names
-
-    dbg("YOLO_RESULT", {
-        "total_boxes": len(boxes),
-        "classes": [names[int(b.cls.item())] for b in boxes]
-    })
-
     data = {
         "StateName": "",
         "address": "",
@@ -143,70 +243,70 @@ def process_driving_license(image_rgb, model, reader, conf=0.35, iou=0.45):
         "sex": "",
         "faceImage": ""
     }
+    fields = [k for k in data if k != "faceImage"]
 
-    for idx, box in enumerate(boxes):
-        cls = names[int(box.cls.item())]
-
-        if cls not in data:
-            continue
-
-        x1, y1, x2, y2 = box.xyxy.cpu().numpy().astype(int).reshape(-1)
+    # coarse-to-fine: imgsz kecil dulu, ukuran penuh kalau ada field hilang / ragu
+    xyxy, scores, cls_ids, det = detect_fields(model, image_rgb, fields, conf, iou, budget)
+    names = model.names
 
-        h, w, _ = image_rgb.shape
-        x1, y1 = max(0, x1), max(0, y1)
-        x2, y2 = min(w, x2), min(h, y2)
+    dbg("YOLO_RESULT", {
+        "total_boxes": len(cls_ids),
+        "classes": [names[int(c)] for c in cls_ids],
+        "detect": det
+    })
 
-        crop = image_rgb[y1:y2, x1:x2]
+    # kandidat per field (urut confidence) dipilih sebelum OCR; class lain dibuang
+    candidates = select_candidates(
+        xyxy, scores, cls_ids, names, fields, merge_classes=MERGE_CLASSES, unlimited=COMPARE_ALL
+    )
 
+    def ocr(job):
+        cls, _, box = job
+        budget.check()
+        crop = crop_box(image_rgb, box, hires)
         if crop.size == 0:
-            continue
-
-        raw = read_text(crop, reader)
-        txt = re.sub(r"[^A-Za-z0-9\s/]", "", raw).strip()
-
-        if not txt:
-            continue
-
-        if cls == "licenseNumber":
-            txt = clean_license_number(txt)
-
-        elif cls == "sex":
-            txt = clean_sex(txt)
-
-        elif cls == "dateOfBirth":
-            d = clean_date(txt)
-            if not d:
-                continue
-            
-            if not is_valid_dob(d):
-                dbg("DOB_REJECTED_INVALID", d)
+            return ""
+        profile = get_profile("driving_license", cls, data["StateName"])
+        return read_text(crop, reader, budget, profile)
+
+    def run_round(jobs):
+        # OCR boleh paralel (OCR_THREADS), merge tetap urut job
+        for (cls, box_conf, _), raw in zip(jobs, map_ordered(ocr, jobs)):
+            if cls in COMPARE_ALL:
+                # value lama ikut dibandingkan di merge_field
+                merge_field(data, confidences, cls, raw, box_conf)
                 continue
-
-            if not data["dateOfBirth"]:
-                data["dateOfBirth"] = d
-            else:
-                old_year = int(data["dateOfBirth"].split("/")[-1])
-                new_year = int(d.split("/")[-1])
-                if new_year < old_year:
-                    data["dateOfBirth"] = d
-
-            continue
-
-        if cls == "StateName":
-            normalized = normalize_state(txt)
-            if normalized:
-                data["StateName"] = normalized
-            continue
-
-        if not data[cls]:
-            data[cls] = txt.upper()
-
-    try:
-        face_img = detect_and_crop_face(image_rgb)
-        if face_img:
-            data["faceImage"] = face_to_base64(face_img)
-    except:
-        pass
+            prev = data[cls], confidences.get(cls)
+            data[cls] = ""
+            merge_field(data, confidences, cls, raw, box_conf)
+            # kandidat berikutnya hanya menggantikan value lama kalau valid
+            if prev[0] and not field_valid(cls, data[cls], data["StateName"]):
+                data[cls] = prev[0]
+                confidences[cls] = prev[1]
+
+    # StateName dulu (profil OCR field lain tergantung state), lalu field
+    # lain per putaran: putaran k meng-OCR kandidat ke-k untuk field yang
+    # belum valid; selesai begitu semua field valid
+    for group in (["StateName"], [k for k in candidates if k != "StateName"]):
+        pending = [k for k in group if k in candidates]
+        for rank in range(max((len(candidates[k]) for k in pending), default=0)):
+            jobs = [(k, *candidates[k][rank]) for k in pending if rank < len(candidates[k])]
+            if not jobs:
+                break
+            run_round(jobs)
+            pending = [k for k in pending
+                       if k in COMPARE_ALL or not field_valid(k, data[k], data["StateName"])]
+            if not pending:
+                break
+
+    # extract_face=False: caller (main.run_pipeline) sudah crop wajah sendiri
+    if extract_face and budget.allow("face"):
+        try:
+            face_img = detect_and_crop_face(image_rgb, gray)
+            if face_img is not None:
+                data["faceImage"] = face_to_base64(face_img)
+        except:
+            pass
 
     # Debug result TANPA base64
     safe_result = data.copy()
@@ -0,0 +1,247 @@
+"""
+Klasifikasi passport vs driving_license dari thumbnail (beberapa ms),
+pengganti menjalankan dua detector YOLO lalu membandingkan jumlah box.
+
+Fitur hand-crafted:
+  - jumlah baris MRZ (garis teks panjang & rapat di bagian bawah),
+    dicari ulang setelah deskew kalau foto miring
+  - lebar MRZ relatif terhadap gambar
+  - aspect ratio dokumen (ID-1 ~1.59, halaman data paspor ~1.42), dari
+    region dokumen di foto; aspect gambar kalau dokumen memenuhi frame
+  - rata-rata saturasi warna
+
+Digabung dengan logistic regression -> p(passport). Bobot default di bawah,
+bisa diganti hasil `python -m bench.train_doc_classifier`.
+
+Tanpa MRZ, "driving_license" hanya berarti MRZ tidak ketemu (blur, glare,
+crop): confidence-nya dibatasi NO_MRZ_MAX_CONF (< MIN_CONFIDENCE) supaya
+caller memastikan dulu (teks Tesseract / detector).
+"""
+import os
+import json
+import math
+import cv2
+import numpy as np
+
+THUMB_WIDTH = 400
+# di bawah confidence ini caller sebaiknya pakai kedua detector
+MIN_CONFIDENCE = float(os.getenv("DOC_CLASSIFIER_MIN_CONF", "0.8"))
+WEIGHTS_PATH = os.getenv("DOC_CLASSIFIER_WEIGHTS", "models/doc_classifier.json")
+# confidence maksimum "driving_license" kalau tidak ada baris MRZ
+NO_MRZ_MAX_CONF = float(os.getenv("DOC_CLASSIFIER_NO_MRZ_MAX_CONF", "0.75"))
+
+# document_aspect: dokumen minimal sekian bagian thumbnail, mengisi
+# minimal sekian bagian minAreaRect-nya; beda warna maksimum dengan latar
+DOC_MIN_AREA = 0.25
+DOC_MIN_FILL = 0.9
+DOC_BG_TOLERANCE = 24
+
+# kemiringan maksimum (derajat) yang dikoreksi sebelum mencari MRZ ulang
+MAX_SKEW = 12.0
+
+FEATURES = ["bias", "mrz_lines", "mrz_width", "aspect", "saturation"]
+# hasil `python -m bench.train_doc_classifier --count 300 --seed 99`
+# (fit 210 sampel sintetis, held-out 90: akurasi 1.0, 0 salah-tapi-yakin;
+# coverage 0.478 = paspor dengan MRZ, SIM dipastikan teks Tesseract karena
+# NO_MRZ_MAX_CONF); ganti dengan hasil fit corpus asli lewat WEIGHTS_PATH
+DEFAULT_WEIGHTS = {
+    "bias": -3.215,
+    "mrz_lines": 2.8276,
+    "mrz_width": 1.5669,
+    "aspect": -0.303,
+    "saturation": -0.171,
+}
+
+_weights = None
+
+
+def load_weights(path=WEIGHTS_PATH):
+    global _weights
+    weights = dict(DEFAULT_WEIGHTS)
+    if path and os.path.exists(path):
+        with open(path) as f:
+            weights.update({k: float(v) for k, v in json.load(f).items() if k in FEATURES})
+    _weights = weights
+    return weights
+
+
+def _thumbnail(img, width=THUMB_WIDTH):
+    h, w = img.shape[:2]
+    if w <= width:
+        return img
+    return cv2.resize(img, (width, max(1, round(h * width / w))), interpolation=cv2.INTER_AREA)
+
+
+def mrz_lines(thumb_gray):
+    """
+    Deteksi baris MRZ di 45% bawah gambar (blackhat + gradien-x + closing).
+    Returns (jumlah baris, lebar baris terpanjang / lebar gambar).
+    """
+    h, w = thumb_gray.shape
+    roi = thumb_gray[int(h * 0.55):, :]
+    if roi.size == 0:
+        return 0, 0.0
+
+    rect = cv2.getStructuringElement(cv2.MORPH_RECT, (max(3, w // 30), max(3, w // 130)))
+    wide = cv2.getStructuringElement(cv2.MORPH_RECT, (max(5, w // 20), 3))
+
+    blackhat = cv2.morphologyEx(roi, cv2.MORPH_BLACKHAT, rect)
+    grad = np.absolute(cv2.Sobel(blackhat, cv2.CV_32F, 1, 0, ksize=-1))
+    grad = cv2.normalize(grad, None, 0, 255, cv2.NORM_MINMAX).astype(np.uint8)
+    grad = cv2.morphologyEx(grad, cv2.MORPH_CLOSE, rect)
+    _, th = cv2.threshold(grad, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)
+    th = cv2.morphologyEx(th, cv2.MORPH_CLOSE, wide)
+    th = cv2.erode(th, None, iterations=1)
+
+    contours, _ = cv2.findContours(th, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    count, widest = 0, 0.0
+    for c in contours:
+        _, _, bw, bh = cv2.boundingRect(c)
+        if bh == 0:
+            continue
+        if bw > 0.6 * w and bw / bh > 12:
+            count += 1
+            widest = max(widest, bw / w)
+    return count, widest
+
+
+def skew_angle(thumb_gray, max_skew=MAX_SKEW):
+    """
+    Kemiringan kecil dokumen dari garis hampir-horizontal (tepi kartu, baris
+    teks, MRZ): median berbobot panjang dari HoughLinesP. 0.0 kalau tidak ada.
+    """
+    h, w = thumb_gray.shape
+    edges = cv2.Canny(thumb_gray, 50, 150)
+    lines = cv2.HoughLinesP(edges, 1, np.pi / 360, threshold=w // 8,
+                            minLineLength=w // 4, maxLineGap=w // 40)
+    if lines is None:
+        return 0.0
+
+    x1, y1, x2, y2 = lines[:, 0].astype(np.float64).T
+    angles = np.degrees(np.arctan2(y2 - y1, x2 - x1))
+    keep = np.abs(angles) <= max_skew
+    if not keep.any():
+        return 0.0
+    angles, lengths = angles[keep], np.hypot(x2 - x1, y2 - y1)[keep]
+    order = np.argsort(angles)
+    cum = np.cumsum(lengths[order])
+    return float(angles[order][np.searchsorted(cum, cum[-1] / 2)])
+
+
+def mrz_lines_deskewed(thumb_gray):
+    """
+    mrz_lines; kalau tidak ada baris di gambar apa adanya, diluruskan dulu
+    (skew_angle) lalu dicari ulang. Foto miring beberapa derajat memecah
+    baris MRZ sehingga lolos dari deteksi.
+    """
+    count, widest = mrz_lines(thumb_gray)
+    if count:
+        return count, widest
+
+    angle = skew_angle(thumb_gray)
+    if abs(angle) < 0.5:
+        return 0, 0.0
+    h, w = thumb_gray.shape
+    m = cv2.getRotationMatrix2D((w / 2, h / 2), angle, 1.0)
+    return mrz_lines(cv2.warpAffine(thumb_gray, m, (w, h), flags=cv2.INTER_LINEAR,
+                                    borderMode=cv2.BORDER_REPLICATE))
+
+
+def document_region(thumb_rgb, min_area=DOC_MIN_AREA):
+    """
+    Region dokumen di foto sebagai minAreaRect ((cx, cy), (w, h), angle).
+    Background = piksel yang warnanya mirip tepi gambar dan tersambung ke
+    tepi (flood fill); dokumen = komponen sisa terbesar yang mengisi
+    minAreaRect-nya (segi-empat padat). None kalau tidak ketemu, mis.
+    dokumen memenuhi frame.
+    """
+    h, w = thumb_rgb.shape[:2]
+    img = cv2.GaussianBlur(thumb_rgb, (5, 5), 0).astype(np.int16)
+    border = np.concatenate([img[0], img[-1], img[:, 0], img[:, -1]])
+    bg_color = np.median(border, axis=0)
+    similar = (np.abs(img - bg_color).max(axis=2) < DOC_BG_TOLERANCE).astype(np.uint8)
+    # tepi yang tidak seragam (bukan meja / latar) -> tidak ada background
+    if similar[0].mean() < 0.6 or similar[-1].mean() < 0.6:
+        return None
+
+    # hanya area mirip yang tersambung ke tepi yang dihitung background
+    n, labels = cv2.connectedComponents(similar)
+    edge_labels = set(np.unique(np.concatenate([labels[0], labels[-1], labels[:, 0], labels[:, -1]])))
+    background = np.isin(labels, [l for l in edge_labels if l != 0] if n > 1 else [])
+    doc = cv2.morphologyEx((~background).astype(np.uint8), cv2.MORPH_OPEN, np.ones((3, 3), np.uint8))
+
+    contours, _ = cv2.findContours(doc, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    if not contours:
+        return None
+    c = max(contours, key=cv2.contourArea)
+    area = cv2.contourArea(c)
+    (_, _), (rw, rh), _ = cv2.minAreaRect(c)
+    if area < min_area * h * w or area < DOC_MIN_FILL * rw * rh or area > 0.98 * h * w:
+        return None
+    return cv2.minAreaRect(c)
+
+
+def document_aspect(thumb_rgb):
+    """Aspect ratio (sisi panjang / sisi pendek) dokumen di foto, None kalau tidak ketemu."""
+    region = document_region(thumb_rgb)
+    if region is None:
+        return None
+    rw, rh = region[1]
+    return max(rw, rh) / min(rw, rh)
+
+
+def extract_features(image_rgb, gray=None):
+    if gray is None:
+        gray = cv2.cvtColor(image_rgb, cv2.COLOR_RGB2GRAY)
+
+    thumb_gray = _thumbnail(gray)
+    thumb_rgb = _thumbnail(image_rgb)
+
+    region = document_region(thumb_rgb)
+    if region is None:
+        h, w = gray.shape[:2]
+        aspect = max(h, w) / min(h, w)
+    else:
+        rw, rh = region[1]
+        aspect = max(rw, rh) / min(rw, rh)
+        # MRZ dicari di dokumen saja: lebar baris relatif terhadap dokumen,
+        # bukan terhadap foto yang ikut memuat meja / latar
+        x, y, bw, bh = cv2.boundingRect(cv2.boxPoints(region).astype(np.int32))
+        x, y = max(0, x), max(0, y)
+        thumb_gray = thumb_gray[y:y + bh, x:x + bw]
+
+    n_lines, width = mrz_lines_deskewed(thumb_gray)
+    sat = cv2.cvtColor(thumb_rgb, cv2.COLOR_RGB2HSV)[:, :, 1].mean() / 255.0
+
+    return {
+        "bias": 1.0,
+        "mrz_lines": float(min(n_lines, 2)),
+        "mrz_width": float(width),
+        "aspect": aspect - 1.5,
+        "saturation": float(sat),
+    }
+
+
+def confidence(p_passport, feats):
+    """(doc_type, confidence) dari p(passport); tanpa MRZ dibatasi NO_MRZ_MAX_CONF."""
+    if p_passport >= 0.5:
+        return "passport", p_passport
+    conf = 1.0 - p_passport
+    if not feats["mrz_lines"]:
+        conf = min(conf, NO_MRZ_MAX_CONF)
+    return "driving_license", conf
+
+
+def classify_doc_type(image_rgb, gray=None):
+    """
+    Returns (doc_type, confidence, features).
+    confidence di [0.5, 1]; < MIN_CONFIDENCE berarti classifier ragu.
+    """
+    weights = _weights or load_weights()
+    feats = extract_features(image_rgb, gray)
+
+    z = sum(weights[k] * feats[k] for k in FEATURES)
+    p_passport = 1.0 / (1.0 + math.exp(-max(-30.0, min(30.0, z))))
+
+    doc_type, conf = confidence(p_passport, feats)
+    return doc_type, conf, feats
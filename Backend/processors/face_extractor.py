@@ -1,14 +1,33 @@
+import os
 import cv2
 import base64
-import io
-from PIL import Image
 
 face_cascade = cv2.CascadeClassifier(
     cv2.data.haarcascades + "haarcascade_frontalface_default.xml"
 )
 
-def detect_and_crop_face(image_rgb):
-    gray = cv2.cvtColor(image_rgb, cv2.COLOR_RGB2GRAY)
+# =========================
+# FACE OUTPUT CONFIG
+# =========================
+FACE_MAX_EDGE = int(os.getenv("FACE_MAX_EDGE", "512"))     # 0 = ukuran asli
+FACE_CODEC = os.getenv("FACE_CODEC", "jpeg").lower()       # jpeg | webp | avif
+FACE_QUALITY = int(os.getenv("FACE_QUALITY", "90"))
+
+CODECS = {
+    "jpeg": (".jpg", "image/jpeg", cv2.IMWRITE_JPEG_QUALITY),
+    "webp": (".webp", "image/webp", cv2.IMWRITE_WEBP_QUALITY),
+    # AVIF hanya ada di OpenCV >= 4.11 yang di-build dengan libavif
+    "avif": (".avif", "image/avif", getattr(cv2, "IMWRITE_AVIF_QUALITY", None)),
+}
+# kalau codec tidak didukung build OpenCV ini, turun ke codec berikutnya
+CODEC_FALLBACK = {"avif": "webp", "webp": "jpeg"}
+
+
+def detect_and_crop_face(image_rgb, gray=None):
+    """Return crop wajah (ndarray RGB, view ke image_rgb) atau None."""
+    # gray boleh dikirim dari caller supaya tidak convert ulang
+    if gray is None:
+        gray = cv2.cvtColor(image_rgb, cv2.COLOR_RGB2GRAY)
 
     faces = face_cascade.detectMultiScale(
         gray,
@@ -35,12 +54,42 @@ def detect_and_crop_face(image_rgb):
     x2 = min(image_rgb.shape[1], x + w + padding_x)
     y2 = min(image_rgb.shape[0], y + h + padding_y)
 
-    img = Image.fromarray(image_rgb)
-    face = img.crop((x1, y1, x2, y2))
+    return image_rgb[y1:y2, x1:x2]
+
+def encode_face(face_rgb, codec=None, quality=None, max_edge=None):
+    """
+    Resize ke max_edge lalu encode langsung dari ndarray (tanpa PIL).
+    Returns (bytes, media_type).
+    """
+    codec = codec or FACE_CODEC
+    quality = FACE_QUALITY if quality is None else quality
+    max_edge = FACE_MAX_EDGE if max_edge is None else max_edge
+
+    h, w = face_rgb.shape[:2]
+    if max_edge and max(h, w) > max_edge:
+        scale = max_edge / max(h, w)
+        face_rgb = cv2.resize(
+            face_rgb, (max(1, round(w * scale)), max(1, round(h * scale))),
+            interpolation=cv2.INTER_AREA
+        )
+
+    # hanya crop kecil yang dikonversi
+    face_bgr = cv2.cvtColor(face_rgb, cv2.COLOR_RGB2BGR)
+
+    while codec:
+        ext, media_type, flag = CODECS.get(codec, CODECS["jpeg"])
+        if flag is not None:
+            try:
+                ok, buf = cv2.imencode(ext, face_bgr, [flag, quality])
+                if ok:
+                    return buf.tobytes(), media_type
+            except cv2.error:
+                pass
+        codec = CODEC_FALLBACK.get(codec)
 
-    return face
+    ok, buf = cv2.imencode(".jpg", face_bgr, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    return buf.tobytes(), "image/jpeg"
 
-def face_to_base64(face_img: Image.Image):
-    buf = io.BytesIO()
-    face_img.save(buf, format="JPEG", quality=90)
-    return base64.b64encode(buf.getvalue()).decode("utf-8")
+def face_to_base64(face_rgb):
+    data, _ = encode_face(face_rgb)
+    return base64.b64encode(data).decode("utf-8")
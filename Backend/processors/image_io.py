@@ -0,0 +1,178 @@
+import io
+import os
+import threading
+import cv2
+import numpy as np
+
+# Resolusi kerja pipeline (sisi terpanjang). JPEG yang >= 2x target
+# di-decode langsung di domain DCT (1/2, 1/4, 1/8). 0 = selalu full-res.
+DECODE_TARGET_EDGE = int(os.getenv("DECODE_TARGET_EDGE", "1600"))
+
+# Crop OCR yang lebih pendek dari ini (px, di gambar reduced) diambil
+# ulang dari decode full-res
+MIN_OCR_CROP_PX = int(os.getenv("MIN_OCR_CROP_PX", "32"))
+
+REDUCED_FLAGS = {
+    2: cv2.IMREAD_REDUCED_COLOR_2,
+    4: cv2.IMREAD_REDUCED_COLOR_4,
+    8: cv2.IMREAD_REDUCED_COLOR_8,
+}
+
+# SOF0..SOF15 kecuali DHT (C4), JPG (C8), DAC (CC)
+_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7,
+                0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+
+def read_upload_buffer(fileobj):
+    """
+    Ambil isi upload sebagai array uint8 tanpa `await file.read()`.
+
+    fileobj = `UploadFile.file` (SpooledTemporaryFile) atau file-like lain.
+    BytesIO dipakai langsung lewat getbuffer() (view, tanpa salinan); file
+    lain dibaca sekali dengan readinto() ke array yang dialokasikan sesuai
+    ukurannya, tanpa objek bytes perantara.
+    """
+    if isinstance(fileobj, io.BytesIO):
+        return np.frombuffer(fileobj.getbuffer(), np.uint8)
+
+    fileobj.seek(0, io.SEEK_END)
+    size = fileobj.tell()
+    fileobj.seek(0)
+    if not hasattr(fileobj, "readinto"):
+        return np.frombuffer(fileobj.read(), np.uint8)
+
+    buf = np.empty(size, np.uint8)
+    view, n = memoryview(buf), 0
+    while n < size:
+        got = fileobj.readinto(view[n:])
+        if not got:
+            break
+        n += got
+    return buf[:n]
+
+
+def jpeg_size(buf):
+    """
+    Baca (width, height) dari header JPEG (marker SOF) tanpa decode.
+    None kalau bukan JPEG / header rusak.
+    """
+    data = memoryview(buf).cast("B")
+    n = len(data)
+    if n < 4 or data[0] != 0xFF or data[1] != 0xD8:
+        return None
+
+    i = 2
+    while i + 4 <= n:
+        if data[i] != 0xFF:
+            return None
+        marker = data[i + 1]
+        if marker == 0xFF:          # padding
+            i += 1
+            continue
+        if marker in (0xD8, 0x01) or 0xD0 <= marker <= 0xD7:
+            i += 2
+            continue
+
+        length = (data[i + 2] << 8) | data[i + 3]
+        if marker in _SOF_MARKERS:
+            if i + 9 > n:
+                return None
+            h = (data[i + 5] << 8) | data[i + 6]
+            w = (data[i + 7] << 8) | data[i + 8]
+            return w, h
+        i += 2 + length
+
+    return None
+
+
+def choose_reduction(size, target_edge=DECODE_TARGET_EDGE):
+    """Faktor 1/2/4/8 terbesar yang hasilnya masih >= target_edge."""
+    if not size or not target_edge:
+        return 1
+    long_edge = max(size)
+    for factor in (8, 4, 2):
+        if long_edge // factor >= target_edge:
+            return factor
+    return 1
+
+
+# rotasi searah jarum jam (derajat) -> flag cv2.rotate
+ROTATIONS = {
+    90: cv2.ROTATE_90_CLOCKWISE,
+    180: cv2.ROTATE_180,
+    270: cv2.ROTATE_90_COUNTERCLOCKWISE,
+}
+
+
+class HiResSource:
+    """
+    Decode full-resolution secara lazy, hanya kalau ada crop OCR yang
+    terlalu kecil di gambar reduced. Hasil decode di-cache per request.
+    """
+
+    def __init__(self, buf, factor):
+        self.buf = buf
+        self.factor = factor
+        self._full = None
+        self._decoded = False
+        # rotasi (searah jarum jam) yang sudah diterapkan ke gambar reduced
+        # (processors/orientation.py); full-res diputar sama saat decode
+        self.rotation = 0
+        # crop bisa diambil dari thread OCR (runtime/ocr_pool) -> decode sekali saja
+        self._lock = threading.Lock()
+
+    def full(self):
+        with self._lock:
+            if not self._decoded:
+                img = cv2.imdecode(self.buf, cv2.IMREAD_COLOR)
+                if img is not None:
+                    cv2.cvtColor(img, cv2.COLOR_BGR2RGB, dst=img)
+                    if self.rotation:
+                        img = cv2.rotate(img, ROTATIONS[self.rotation])
+                self._full = img
+                self._decoded = True
+        return self._full
+
+    def crop(self, image_rgb, x1, y1, x2, y2):
+        """Crop koordinat gambar reduced; full-res kalau crop terlalu kecil."""
+        crop = image_rgb[y1:y2, x1:x2]
+        if self.factor == 1 or (y2 - y1) >= MIN_OCR_CROP_PX:
+            return crop
+
+        full = self.full()
+        if full is None:
+            return crop
+        f = self.factor
+        return full[y1 * f:y2 * f, x1 * f:x2 * f]
+
+
+def decode_image(buf, target_edge=DECODE_TARGET_EDGE, alloc=None):
+    """
+    Decode SEKALI, lalu turunkan semua representasi dari buffer yang sama.
+
+    Returns (image_rgb, gray, hires) atau (None, None, None) kalau bukan gambar:
+      - image_rgb : HxWx3 RGB (BGR hasil decode di-swap in-place), sudah
+                    di-reduce ke sekitar target_edge untuk JPEG besar
+      - gray      : HxW, dipakai bersama oleh Tesseract & face detector
+      - hires     : HiResSource untuk crop OCR halus
+
+    alloc(h, w) -> (rgb HxWx3, gray HxW) opsional: konversi warna ditulis
+    langsung ke buffer itu (mis. slot shared memory, runtime/shm_pool.py).
+    """
+    if not isinstance(buf, np.ndarray):
+        buf = np.frombuffer(buf, np.uint8)
+
+    factor = choose_reduction(jpeg_size(buf), target_edge)
+    img = cv2.imdecode(buf, REDUCED_FLAGS.get(factor, cv2.IMREAD_COLOR))
+    if img is None:
+        return None, None, None
+
+    if alloc is not None:
+        rgb, gray = alloc(*img.shape[:2])
+        cv2.cvtColor(img, cv2.COLOR_BGR2GRAY, dst=gray)
+        cv2.cvtColor(img, cv2.COLOR_BGR2RGB, dst=rgb)
+        return rgb, gray, HiResSource(buf, factor)
+
+    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+    cv2.cvtColor(img, cv2.COLOR_BGR2RGB, dst=img)
+    return img, gray, HiResSource(buf, factor)
@@ -0,0 +1,152 @@
+"""
+Profil OCR per field: allowlist karakter, engine, psm Tesseract dan pola
+yang diharapkan. Field dengan alfabet kecil (nomor SIM, tanggal, sex)
+dibatasi saat recognition, bukan diperbaiki belakangan.
+
+  allowlist : karakter yang boleh dikenali (None = bebas)
+  engine    : "easyocr" (default) atau "tesseract" -> engine pertama dicoba
+  psm       : page segmentation mode Tesseract (7 = satu baris, 10 = satu karakter)
+  pattern   : regex yang dicari di teks ter-normalisasi; kalau tidak ketemu,
+              engine berikutnya dicoba
+  normalize : "alnum" (buang semua selain A-Z0-9) atau "nospace" (default)
+
+Override per state di STATE_PROFILES, atau lewat JSON (OCR_PROFILES_PATH):
+    {"driving_license": {"sex": {...}}, "states": {"MARYLAND": {"licenseNumber": {...}}}}
+"""
+import os
+import re
+import json
+import pytesseract
+from runtime.ocr_pool import readtext
+
+OCR_PROFILES_PATH = os.getenv("OCR_PROFILES_PATH", "models/ocr_profiles.json")
+# OCR_PROFILES=0 -> read_text lama (EasyOCR umum lalu Tesseract --psm 7)
+OCR_PROFILES_ENABLED = os.getenv("OCR_PROFILES", "1") != "0"
+
+UPPER = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+LOWER = UPPER.lower()
+DIGITS = "0123456789"
+NAME_CHARS = UPPER + LOWER + " -'"
+
+DEFAULT_PROFILES = {
+    "driving_license": {
+        "licenseNumber": {"allowlist": UPPER + DIGITS + "- ", "psm": 7,
+                          "pattern": r"[A-Z0-9]{5,20}", "normalize": "alnum"},
+        "dateOfBirth": {"allowlist": DIGITS + "/-. ", "psm": 7, "pattern": r"\d{2}\D\d{2}\D\d{4}"},
+        "sex": {"allowlist": "MF", "engine": "tesseract", "psm": 10, "pattern": r"^[MF]$"},
+        "firstName": {"allowlist": NAME_CHARS, "psm": 7},
+        "lastName": {"allowlist": NAME_CHARS, "psm": 7},
+        "StateName": {"allowlist": UPPER + LOWER + " ", "psm": 7},
+    },
+    "passport": {
+        "passportNumber": {"allowlist": UPPER + DIGITS, "psm": 7,
+                           "pattern": r"[A-Z0-9]{6,9}", "normalize": "alnum"},
+        "gender": {"allowlist": UPPER + LOWER + "/", "psm": 7},
+        "givenNames": {"allowlist": NAME_CHARS + "<", "psm": 7},
+        "surname": {"allowlist": NAME_CHARS + "<", "psm": 7},
+        "nationality": {"allowlist": UPPER + LOWER + " ", "psm": 7},
+    },
+}
+
+# format nomor SIM per state (sama dengan validasi di fallback/states/*)
+STATE_PROFILES = {
+    "MARYLAND": {"licenseNumber": {"pattern": r"[A-Z]\d{12}"}},
+    "VIRGINIA": {"licenseNumber": {"pattern": r"[A-Z]\d{8}"}},
+    "NEW YORK": {"licenseNumber": {"pattern": r"\d{9}|[A-Z]\d{8}"}},
+    "PENNSYLVANIA": {"licenseNumber": {"allowlist": DIGITS + " ", "pattern": r"\d{8}"}},
+    "DELAWARE": {"licenseNumber": {"allowlist": DIGITS + " ", "pattern": r"\d{8}"}},
+    "WEST VIRGINIA": {"licenseNumber": {"pattern": r"[A-Z]\d{6}"}},
+}
+
+_profiles = None
+
+
+def load_profiles(path=OCR_PROFILES_PATH):
+    global _profiles
+    profiles = {
+        "doc": {d: {f: dict(p) for f, p in fields.items()} for d, fields in DEFAULT_PROFILES.items()},
+        "states": {s: {f: dict(p) for f, p in fields.items()} for s, fields in STATE_PROFILES.items()},
+    }
+    if path and os.path.exists(path):
+        with open(path) as f:
+            override = json.load(f)
+        for section, groups in (("states", override.pop("states", {})), ("doc", override)):
+            for group, fields in groups.items():
+                for field, prof in fields.items():
+                    profiles[section].setdefault(group, {}).setdefault(field, {}).update(prof)
+    _profiles = profiles
+    return profiles
+
+
+def get_profile(doc_type, field, state=None):
+    """Profil gabungan (default doc_type + override state), None kalau tidak ada."""
+    if not OCR_PROFILES_ENABLED:
+        return None
+    profiles = _profiles or load_profiles()
+    prof = dict(profiles["doc"].get(doc_type, {}).get(field, {}))
+    if state:
+        prof.update(profiles["states"].get(state.strip().upper(), {}).get(field, {}))
+    return prof or None
+
+
+def validate(txt, profile):
+    """Teks yang cocok dengan pattern (substring yang match), "" kalau tidak cocok."""
+    if profile.get("normalize") == "alnum":
+        norm = re.sub(r"[^A-Z0-9]", "", txt.upper())
+    else:
+        norm = re.sub(r"\s+", "", txt.upper())
+    m = re.search(profile["pattern"], norm)
+    return m.group(0) if m else ""
+
+
+def tesseract_config(profile):
+    cfg = f"--oem 1 --psm {profile.get('psm', 7)}"
+    allow = profile.get("allowlist")
+    if allow:
+        # spasi / quote merusak parsing config (shlex); spasi tetap dikenali
+        allow = "".join(c for c in allow if c not in " '\"")
+        cfg += f" -c tessedit_char_whitelist={allow}"
+    return cfg
+
+
+def _easyocr(img, reader, profile):
+    res = readtext(reader, img, detail=0, paragraph=False, allowlist=profile.get("allowlist"))
+    return " ".join(res).strip()
+
+
+def _tesseract(img, profile):
+    return pytesseract.image_to_string(img, config=tesseract_config(profile)).strip()
+
+
+def read_field(img, reader, profile, budget=None, allow_tesseract=True):
+    """
+    Recognition dengan profil. Engine utama dulu; engine kedua hanya kalau
+    hasil pertama kosong atau tidak cocok pattern. Returns teks tervalidasi,
+    atau teks mentah pertama kalau tidak ada yang cocok ("" kalau kosong).
+    """
+    engines = ["tesseract", "easyocr"] if profile.get("engine") == "tesseract" else ["easyocr", "tesseract"]
+    pattern = profile.get("pattern")
+    first = ""
+
+    for i, engine in enumerate(engines):
+        if engine == "tesseract":
+            if not allow_tesseract:
+                continue
+            # tesseract sebagai engine kedua = retry, ikut latency budget
+            if i > 0 and budget is not None and not budget.allow("tesseract_retry"):
+                continue
+        try:
+            txt = _tesseract(img, profile) if engine == "tesseract" else _easyocr(img, reader, profile)
+        except Exception:
+            txt = ""
+
+        if not txt:
+            continue
+        if not pattern:
+            return txt
+        valid = validate(txt, profile)
+        if valid:
+            return valid
+        first = first or txt
+
+    return first
@@ -0,0 +1,155 @@
+"""
+Estimasi orientasi (0 / 90 / 180 / 270) dari thumbnail sebelum inference.
+
+Foto kartu yang terputar membuat YOLO hanya menemukan sedikit box, lalu
+semua fallback mahal ikut jalan. Estimator ini murah (beberapa ms):
+
+  1. arah baris teks: blackhat -> threshold -> closing horizontal vs
+     vertikal; teks yang terputar 90° menghasilkan "batang" vertikal.
+     Kalau ragu, aspect ratio (kartu / halaman paspor selalu landscape).
+  2. terbalik atau tidak (0 vs 180 setelah langkah 1): Haar frontal face
+     hanya menemukan wajah yang tegak, MRZ paspor selalu di bawah.
+  3. opsional (ORIENTATION_OSD=1): Tesseract OSD kalau langkah 2 ragu.
+
+Gambar hanya diputar kalau langkah 2 / 3 memberi bukti atas/bawah; tanpa
+itu angle 0 (dokumen dipakai apa adanya), bukan tebakan dari sumbu teks.
+
+angle = rotasi searah jarum jam yang membuat dokumen tegak.
+"""
+import os
+import re
+import cv2
+import pytesseract
+from processors.face_extractor import face_cascade
+from processors.doc_classifier import mrz_lines
+from processors.image_io import ROTATIONS
+
+# ORIENTATION=0 -> gambar dipakai apa adanya
+ORIENTATION_ENABLED = os.getenv("ORIENTATION", "1") != "0"
+# Tesseract OSD (~100 ms+) hanya kalau wajah / MRZ tidak bisa memutuskan
+ORIENTATION_OSD = os.getenv("ORIENTATION_OSD", "0") == "1"
+
+THUMB_EDGE = 400
+# skor teks vertikal harus sekian kali skor horizontal untuk dianggap 90°
+AXIS_RATIO = 1.5
+# di bawah ini (panjang batang teks / sisi gambar) dianggap tidak ada teks
+MIN_TEXT_SCORE = 0.5
+
+
+def rotate(img, angle):
+    """Rotasi searah jarum jam (kelipatan 90); 0 -> gambar yang sama."""
+    if not angle:
+        return img
+    return cv2.rotate(img, ROTATIONS[angle % 360])
+
+
+def _thumbnail(gray, edge=THUMB_EDGE):
+    h, w = gray.shape[:2]
+    scale = edge / max(h, w)
+    if scale >= 1:
+        return gray
+    return cv2.resize(gray, (max(1, round(w * scale)), max(1, round(h * scale))),
+                      interpolation=cv2.INTER_AREA)
+
+
+def text_axis(thumb):
+    """
+    Returns (horizontal, vertical): total panjang komponen memanjang setelah
+    closing searah sumbu itu, relatif terhadap sisi gambar.
+    """
+    h, w = thumb.shape
+    k = max(3, min(h, w) // 60)
+    rect = cv2.getStructuringElement(cv2.MORPH_RECT, (k * 3, k * 3))
+    blackhat = cv2.morphologyEx(thumb, cv2.MORPH_BLACKHAT, rect)
+    _, mask = cv2.threshold(blackhat, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)
+
+    scores = []
+    for kw, kh, side in ((k * 4, 1, w), (1, k * 4, h)):
+        closed = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, cv2.getStructuringElement(cv2.MORPH_RECT, (kw, kh)))
+        _, _, stats, _ = cv2.connectedComponentsWithStats(closed)
+        long_side = stats[1:, 2] if kw > 1 else stats[1:, 3]
+        short_side = stats[1:, 3] if kw > 1 else stats[1:, 2]
+        bars = (long_side > 4 * short_side) & (long_side > 0.05 * side)
+        scores.append(float(long_side[bars].sum()) / side)
+    return scores[0], scores[1]
+
+
+def upright_votes(thumb):
+    """+ = tegak, - = terbalik, 0 = tidak ada petunjuk."""
+    flipped = cv2.rotate(thumb, cv2.ROTATE_180)
+    min_face = max(20, min(thumb.shape) // 8)
+    votes = 0
+    for img, sign in ((thumb, 1), (flipped, -1)):
+        faces = face_cascade.detectMultiScale(img, scaleFactor=1.15, minNeighbors=4,
+                                              minSize=(min_face, min_face))
+        if len(faces):
+            votes += sign
+    mrz_up, _ = mrz_lines(thumb)
+    mrz_down, _ = mrz_lines(flipped)
+    if mrz_up != mrz_down:
+        votes += 1 if mrz_up > mrz_down else -1
+    return votes
+
+
+def osd_angle(thumb):
+    """Rotasi dari Tesseract OSD, None kalau gagal (teks terlalu sedikit dll)."""
+    try:
+        osd = pytesseract.image_to_osd(thumb, config="--psm 0")
+    except Exception:
+        return None
+    m = re.search(r"Rotate:\s*(\d+)", osd)
+    return int(m.group(1)) % 360 if m else None
+
+
+def estimate_orientation(gray):
+    """Returns info {"angle", "method", "scores"}; angle 0 kalau tidak yakin."""
+    thumb = _thumbnail(gray)
+    h, w = thumb.shape
+    horizontal, vertical = text_axis(thumb)
+    info = {"angle": 0, "method": "text_axis",
+            "scores": {"horizontal": round(horizontal, 2), "vertical": round(vertical, 2)}}
+
+    if max(horizontal, vertical) < MIN_TEXT_SCORE:
+        sideways = h > w * 1.15
+        info["method"] = "aspect"
+    else:
+        sideways = vertical > horizontal * AXIS_RATIO
+
+    # 90 vs 270: putar ke teks horizontal, lalu cek terbalik seperti biasa
+    base = 90 if sideways else 0
+    upright = rotate(thumb, base)
+    votes = upright_votes(upright)
+    info["scores"]["upright"] = votes
+
+    if votes > 0:
+        info["angle"] = base
+    elif votes < 0:
+        info["angle"] = (base + 180) % 360
+    else:
+        # tanpa petunjuk atas/bawah sumbu saja tidak cukup (90 bisa 270, 0 bisa
+        # 180): hanya OSD yang boleh memutuskan, selain itu tidak diputar
+        angle = osd_angle(upright) if ORIENTATION_OSD else None
+        if angle is not None:
+            info["method"] += "+osd"
+            info["angle"] = (base + angle) % 360
+        else:
+            info["method"] += "+unsure"
+    return info
+
+
+def apply_orientation(img_rgb, gray, hires=None):
+    """
+    Estimasi + rotasi SEKALI untuk semua representasi.
+    Returns (img_rgb, gray, info); hires ikut diputar secara lazy.
+    """
+    if not ORIENTATION_ENABLED:
+        return img_rgb, gray, {"angle": 0, "method": "disabled"}
+
+    info = estimate_orientation(gray)
+    angle = info["angle"]
+    if angle:
+        img_rgb = rotate(img_rgb, angle)
+        gray = rotate(gray, angle)
+        if hires is not None:
+            hires.rotation = angle
+    return img_rgb, gray, info
@@ -1,6 +1,10 @@
 import cv2, re, datetime
 import pytesseract
-import numpy as np
+from runtime.budget import Budget
+from runtime.ocr_pool import map_ordered, readtext
+from processors.ocr_profiles import get_profile, read_field, validate
+from processors.boxes import select_candidates, crop_box, BOX_CANDIDATES
+from processors.detection import detect_fields
 
 # -----------------------
 # Helpers
@@ -15,14 +19,16 @@ def enhance_for_ocr(img):
     )
     return th
 
-def read_text(img_crop, reader, allow_tesseract_fallback=True):
+def read_text(img_crop, reader, allow_tesseract_fallback=True, budget=None, hires=None, profile=None):
+    if profile is not None:
+        return read_field(img_crop, reader, profile, budget, allow_tesseract=allow_tesseract_fallback)
     try:
-        result = reader.readtext(img_crop, detail=0, paragraph=False)
+        result = readtext(reader, img_crop, detail=0, paragraph=False)
         if result:
             return " ".join(result).strip()
     except Exception:
         pass
-    if allow_tesseract_fallback:
+    if allow_tesseract_fallback and (budget is None or budget.allow("tesseract_retry")):
         cfg = "--oem 1 --psm 7"
         txt = pytesseract.image_to_string(img_crop, config=cfg)
         return txt.strip()
@@ -86,22 +92,41 @@ def fallback_extract_dob_gender(full_text_lines):
                 break
     return dob, gender
 
+# -----------------------
+# Box selection
+# -----------------------
+# box overlap class ini digabung jadi satu crop (teks bisa 2 baris)
+MERGE_CLASSES = {"Authority", "Place of birth"}
+
+
+def field_valid(key, value):
+    if not value:
+        return False
+    if key == "gender":
+        return value in ("Male", "Female")
+    profile = get_profile("passport", key)
+    if profile and profile.get("pattern"):
+        return bool(validate(value, profile))
+    return True
+
 # -----------------------
 # Main Processing
 # -----------------------
-def process_passport(image_rgb, model, reader, conf=0.35, iou=0.45, allow_tesseract_fallback=True):
+def process_passport(image_rgb, model, reader, conf=0.35, iou=0.45, allow_tesseract_fallback=True, budget=None, hires=None,
+                     confidences=None):
     """
     Input:
       - image_rgb: numpy array RGB
       - model: YOLO model for passport (loaded)
       - reader: easyocr.Reader instance
-    Returns: dict (parsed fields), annotated_rgb (numpy)
+      - budget: runtime.budget.Budget (opsional), stage opsional di-skip kalau habis
+      - hires: image_io.HiResSource (opsional), crop kecil diambil dari full-res
+      - confidences: dict (opsional), diisi {field: confidence box YOLO}
+    Returns: dict (parsed fields)
     """
-    annotated = image_rgb.copy()
-    results = model.predict(source=image_rgb, conf=conf, iou=iou, verbose=False)
-    boxes = results[0].boxes
-    names = model.names
-
+    budget = budget or Budget()
+    if confidences is None:
+        confidences = {}
     # hanya ambil field tertentu
     fields_map = {
         "Authority": "authority",
@@ -114,52 +139,93 @@ def process_passport(image_rgb, model, reader, conf=0.35, iou=0.45, allow_tesser
         "Surname": "surname"
     }
     data_out = {v: "" for v in fields_map.values()}
+    # DOB ambil dari fallback full OCR
+    fields = [c for c in fields_map if c != "Date of Birth"]
+
+    # coarse-to-fine: imgsz kecil dulu, ukuran penuh kalau ada field hilang / ragu
+    xyxy, scores, cls_ids, _ = detect_fields(model, image_rgb, fields, conf, iou, budget)
+    names = model.names
+
+    # kandidat per class (urut confidence) dipilih sebelum OCR
+    candidates = select_candidates(
+        xyxy, scores, cls_ids, names, fields, merge_classes=MERGE_CLASSES
+    )
+
+    def ocr(job):
+        cls_name, _, box = job
+        budget.check()
+        crop = crop_box(image_rgb, box, hires)
+        if crop.size == 0:
+            return ""
+        return read_text(crop, reader, allow_tesseract_fallback=allow_tesseract_fallback, budget=budget,
+                         profile=get_profile("passport", fields_map[cls_name]))
+
+    # putaran k meng-OCR kandidat ke-k untuk field yang belum valid
+    pending = list(candidates)
+    for rank in range(BOX_CANDIDATES):
+        jobs = [(c, *candidates[c][rank]) for c in pending if rank < len(candidates[c])]
+        if not jobs:
+            break
+
+        # OCR boleh paralel (OCR_THREADS), merge tetap urut job
+        for (cls_name, box_conf, _), txt in zip(jobs, map_ordered(ocr, jobs)):
+            txt = re.sub(r"[^A-Za-z0-9\s/<>-]", "", txt)
+
+            # cleaning khusus
+            if cls_name == "Passport No-":
+                txt = clean_passport_number(txt)
+            elif cls_name == "Gender":
+                txt = clean_gender(txt)
+
+            key = fields_map[cls_name]
+            old = data_out[key]
+            # value valid menang; sama-sama (tidak) valid -> yang terpanjang
+            if (field_valid(key, txt), len(txt)) > (field_valid(key, old), len(old)):
+                data_out[key] = txt
+                confidences[key] = box_conf
+
+        pending = [c for c in pending if not field_valid(fields_map[c], data_out[fields_map[c]])]
+        if not pending:
+            break
 
-    for box in boxes:
+    data_out = apply_full_ocr(image_rgb, reader, data_out, budget)
+
+    data_out = {k: (v.upper() if isinstance(v, str) else v) for k, v in data_out.items()}
+
+    return data_out
+
+
+def read_passport_number(image_rgb, model, reader, budget=None, hires=None, conf=0.35, iou=0.45):
+    """
+    OCR crop nomor paspor saja (box confidence tertinggi), dibersihkan sama
+    seperti di process_passport. Dipakai cek near-duplicate (runtime/dedup.py).
+    """
+    xyxy, scores, cls_ids, _ = detect_fields(model, image_rgb, ["Passport No-"], conf, iou, budget)
+    candidates = select_candidates(xyxy, scores, cls_ids, model.names, ["Passport No-"], limit=1)
+    if "Passport No-" not in candidates:
+        return ""
+    crop = crop_box(image_rgb, candidates["Passport No-"][0][1], hires)
+    if crop.size == 0:
+        return ""
+    txt = read_text(crop, reader, budget=budget, profile=get_profile("passport", "passportNumber"))
+    return clean_passport_number(re.sub(r"[^A-Za-z0-9\s/<>-]", "", txt))
+
+
+def apply_full_ocr(image_rgb, reader, data_out, budget=None):
+    """
+    Full OCR fallback untuk DOB dan Gender (DOB paspor selalu dari sini).
+    Dipisah supaya burst multi-frame cukup menjalankannya sekali.
+    """
+    budget = budget or Budget()
+    full_text = []
+    if budget.allow("passport_full_ocr"):
         try:
-            cls_id = int(box.cls.item())
-            cls_name = names.get(cls_id, str(cls_id))
+            full_text = reader.readtext(image_rgb, detail=0, paragraph=False)
         except Exception:
-            continue
-        if cls_name not in fields_map:
-            continue
-        if cls_name == "Date of Birth":
-            continue  # DOB ambil dari fallback
-
-        coords = box.xyxy.cpu().numpy().reshape(-1).astype(int)
-        x1, y1, x2, y2 = coords
-        crop = image_rgb[y1:y2, x1:x2]
-        txt = read_text(crop, reader, allow_tesseract_fallback=allow_tesseract_fallback)
-        txt = re.sub(r"[^A-Za-z0-9\s/<>-]", "", txt)
-
-        # cleaning khusus
-        if cls_name == "Passport No-":
-            txt = clean_passport_number(txt)
-        elif cls_name == "Gender":
-            txt = clean_gender(txt)
-
-        key = fields_map[cls_name]
-        if not data_out[key] or len(txt) > len(data_out[key]):
-            data_out[key] = txt
-
-        # gambar bbox
-        cv2.rectangle(annotated, (x1, y1), (x2, y2), (0, 255, 0), 2)
-        cv2.putText(
-            annotated, cls_name, (x1, max(15, y1 - 5)),
-            cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 0), 2
-        )
-
-    # Full OCR fallback untuk DOB dan Gender
-    try:
-        full_text = reader.readtext(image_rgb, detail=0, paragraph=False)
-    except Exception:
-        full_text = []
+            full_text = []
     dob_ocr, gender_fallback = fallback_extract_dob_gender(full_text)
     if dob_ocr:
         data_out["dateOfBirth"] = dob_ocr
     if not data_out.get("gender") and gender_fallback:
         data_out["gender"] = gender_fallback
-
-    data_out = {k: (v.upper() if isinstance(v, str) else v) for k, v in data_out.items()}
-
     return data_out
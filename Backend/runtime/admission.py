@@ -0,0 +1,241 @@
+"""
+Admission control per client di depan pipeline (in-process, tanpa service luar).
+
+Client = header X-API-Key yang terdaftar di ADMIT_CLIENTS_PATH, selain itu
+IP (X-Forwarded-For hanya kalau ADMIT_TRUST_FORWARDED=1). Key yang tidak
+dikenal diperlakukan seperti tanpa key: kalau tidak, client cukup mengirim
+key acak per request untuk mendapat bucket baru setiap kali.
+
+  1. token bucket per client (rate / burst)            -> 429 + Retry-After
+  2. batas request bersamaan per client (max_concurrent) -> 429 + Retry-After
+  3. weighted fair queuing: request yang sudah diterima menunggu giliran
+     pipeline berdasarkan finish tag virtual (1/weight per request), jadi
+     satu client bulk tidak bisa mendorong client interaktif ke timeout
+
+Default per client dari env; override per API key lewat JSON
+(ADMIT_CLIENTS_PATH):
+    {"mobile-app": {"weight": 4, "rate": 10, "burst": 20, "max_concurrent": 4},
+     "bulk-reverify": {"weight": 1, "rate": 2, "max_concurrent": 1}}
+"""
+import os
+import json
+import math
+import time
+import heapq
+import itertools
+import threading
+from contextlib import contextmanager
+
+# opt-in: di belakang reverse proxy / NAT tanpa ADMIT_TRUST_FORWARDED=1 semua
+# client berbagi satu bucket (IP proxy) dan mulai kena 429 bersama-sama
+ADMISSION_ENABLED = os.getenv("ADMISSION", "0") == "1"
+ADMIT_RATE = float(os.getenv("ADMIT_RATE", "5"))               # request / detik
+ADMIT_BURST = float(os.getenv("ADMIT_BURST", "20"))
+ADMIT_MAX_CONCURRENT = int(os.getenv("ADMIT_MAX_CONCURRENT", "4"))
+ADMIT_WEIGHT = float(os.getenv("ADMIT_WEIGHT", "1"))
+# total request yang menunggu giliran (semua client)
+ADMIT_MAX_QUEUE = int(os.getenv("ADMIT_MAX_QUEUE", "64"))
+ADMIT_CLIENTS_PATH = os.getenv("ADMIT_CLIENTS_PATH", "models/admission_clients.json")
+ADMIT_TRUST_FORWARDED = os.getenv("ADMIT_TRUST_FORWARDED", "0") == "1"
+# state client idle dibuang kalau jumlah client melebihi ini
+ADMIT_MAX_CLIENTS = 10000
+
+
+class Rejected(Exception):
+    def __init__(self, reason, retry_after):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = max(1, math.ceil(retry_after))
+
+
+def load_client_config(path=ADMIT_CLIENTS_PATH):
+    if path and os.path.exists(path):
+        with open(path) as f:
+            return json.load(f)
+    return {}
+
+
+class ClientState:
+    def __init__(self, key, cfg):
+        self.key = key
+        self.rate = float(cfg.get("rate", ADMIT_RATE))
+        self.burst = float(cfg.get("burst", ADMIT_BURST))
+        self.max_concurrent = int(cfg.get("max_concurrent", ADMIT_MAX_CONCURRENT))
+        self.weight = float(cfg.get("weight", ADMIT_WEIGHT))
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+        self.active = 0
+        self.finish = 0.0           # finish tag virtual request terakhir
+        self.admitted = 0
+        self.rejected = 0
+
+    def refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def idle(self):
+        return self.active == 0 and self.tokens >= self.burst
+
+
+class Ticket:
+    __slots__ = ("client", "tag", "cancelled", "released")
+
+    def __init__(self, client):
+        self.client = client
+        self.tag = None
+        self.cancelled = False
+        self.released = False
+
+
+class AdmissionController:
+    def __init__(self, slots=1, clients=None):
+        self.slots = slots                  # request yang boleh jalan bersamaan
+        self.config = load_client_config() if clients is None else clients
+        self._clients = {}
+        self._cond = threading.Condition()
+        self._waiting = []                  # heap (tag, seq, ticket)
+        self._seq = itertools.count()
+        self._running = 0
+        self._vtime = 0.0
+        self.stats = {"admitted": 0, "rate_limited": 0, "concurrency_limited": 0, "queue_full": 0}
+
+    def _client(self, key):
+        state = self._clients.get(key)
+        if state is None:
+            if len(self._clients) >= ADMIT_MAX_CLIENTS:
+                now = time.monotonic()
+                for k, c in list(self._clients.items()):
+                    c.refill(now)
+                    if c.idle():
+                        del self._clients[k]
+            # config per API key / IP, tanpa prefix "key:" / "ip:"
+            state = self._clients[key] = ClientState(key, self.config.get(key.split(":", 1)[-1], {}))
+        return state
+
+    def admit(self, key):
+        """Returns Ticket (wajib release), atau raise Rejected."""
+        now = time.monotonic()
+        with self._cond:
+            client = self._client(key)
+            client.refill(now)
+            if client.tokens < 1:
+                client.rejected += 1
+                self.stats["rate_limited"] += 1
+                raise Rejected("rate_limited", (1 - client.tokens) / client.rate if client.rate > 0 else 60)
+            if client.active >= client.max_concurrent:
+                client.rejected += 1
+                self.stats["concurrency_limited"] += 1
+                raise Rejected("concurrency_limited", 1)
+            if len(self._waiting) >= ADMIT_MAX_QUEUE:
+                self.stats["queue_full"] += 1
+                raise Rejected("queue_full", 1)
+            client.tokens -= 1
+            client.active += 1
+            client.admitted += 1
+            self.stats["admitted"] += 1
+        return Ticket(client)
+
+    def release(self, ticket):
+        if ticket is None or ticket.released:
+            return
+        with self._cond:
+            ticket.released = True
+            ticket.client.active -= 1
+
+    @contextmanager
+    def turn(self, ticket, budget=None):
+        """
+        Tunggu giliran (finish tag terkecil dulu) sebelum masuk pipeline.
+        budget.check() dipanggil selama menunggu: client yang disconnect
+        keluar dari antrian.
+        """
+        if ticket is None:
+            yield
+            return
+
+        with self._cond:
+            client = ticket.client
+            ticket.tag = max(self._vtime, client.finish) + 1.0 / client.weight
+            client.finish = ticket.tag
+            heapq.heappush(self._waiting, (ticket.tag, next(self._seq), ticket))
+            try:
+                while True:
+                    while self._waiting and self._waiting[0][2].cancelled:
+                        heapq.heappop(self._waiting)
+                    if self._running < self.slots and self._waiting[0][2] is ticket:
+                        break
+                    self._cond.wait(0.1)
+                    if budget is not None:
+                        budget.check()
+            except BaseException:
+                ticket.cancelled = True
+                self._cond.notify_all()
+                raise
+            heapq.heappop(self._waiting)
+            self._running += 1
+            self._vtime = ticket.tag
+
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._running -= 1
+                self._cond.notify_all()
+
+    def status(self):
+        with self._cond:
+            busiest = sorted(self._clients.values(), key=lambda c: -c.admitted)[:10]
+            return dict(
+                self.stats,
+                enabled=True,
+                slots=self.slots,
+                running=self._running,
+                waiting=len(self._waiting),
+                clients=len(self._clients),
+                top_clients=[
+                    {"client": _masked(c.key), "weight": c.weight, "active": c.active,
+                     "admitted": c.admitted, "rejected": c.rejected}
+                    for c in busiest
+                ],
+            )
+
+
+def _masked(key):
+    # /metrics tidak pakai auth: API key tidak ditampilkan utuh
+    if key.startswith("key:"):
+        return key[:8] + "..."
+    return key
+
+
+_proxy_warned = False
+
+
+def client_key(headers, client_host, known_keys=()):
+    """API key kalau terdaftar di known_keys (config client), selain itu IP."""
+    global _proxy_warned
+    api_key = headers.get("x-api-key")
+    if api_key and api_key in known_keys:
+        return f"key:{api_key}"
+    if headers.get("x-forwarded-for"):
+        if ADMIT_TRUST_FORWARDED:
+            return "ip:" + headers["x-forwarded-for"].split(",")[0].strip()
+        if not _proxy_warned:
+            _proxy_warned = True
+            print(f"[ADMISSION] request lewat proxy {client_host} (X-Forwarded-For) tapi "
+                  f"ADMIT_TRUST_FORWARDED=0: semua client di belakangnya berbagi satu bucket")
+    return f"ip:{client_host or 'unknown'}"
+
+
+_controller = None
+_lock = threading.Lock()
+
+
+def get_controller(slots=1):
+    """None kecuali ADMISSION=1."""
+    global _controller
+    if not ADMISSION_ENABLED:
+        return None
+    with _lock:
+        if _controller is None:
+            _controller = AdmissionController(slots)
+    return _controller
@@ -0,0 +1,86 @@
+import os
+import time
+import threading
+from contextlib import contextmanager
+
+# Default deadline kalau client tidak kirim (None = tanpa batas)
+DEFAULT_DEADLINE_MS = int(os.getenv("DETECT_DEADLINE_MS", "0")) or None
+
+
+class PipelineCancelled(Exception):
+    """Client sudah disconnect, sisa pekerjaan dibuang."""
+
+
+class Budget:
+    """
+    Latency budget per request.
+
+    - allow(stage): False kalau waktu sudah habis -> stage opsional di-skip
+      dan dicatat di `skipped`
+    - check(): raise PipelineCancelled kalau client sudah disconnect
+    - stage(name): context manager, durasi (ms) dicatat di `timings`;
+      stage yang sedang jalan ada di `current` (dipakai runtime/profiler.py)
+    - denied: stage yang sengaja dimatikan caller (mis. pass murah multi-frame),
+      allow() False tanpa dicatat sebagai skipped
+    """
+
+    def __init__(self, deadline_ms=None):
+        self.start = time.monotonic()
+        self.deadline_ms = deadline_ms
+        self.deadline = self.start + deadline_ms / 1000.0 if deadline_ms else None
+        self.skipped = []
+        self.denied = set()
+        self.timings = {}
+        self.current = None
+        self._cancelled = threading.Event()
+
+    def elapsed_ms(self):
+        return (time.monotonic() - self.start) * 1000.0
+
+    def remaining_ms(self):
+        if self.deadline is None:
+            return float("inf")
+        return max(0.0, (self.deadline - time.monotonic()) * 1000.0)
+
+    def expired(self):
+        return self.remaining_ms() <= 0
+
+    def cancel(self):
+        self._cancelled.set()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def check(self):
+        if self.cancelled:
+            raise PipelineCancelled()
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        outer, self.current = self.current, name
+        try:
+            yield
+        finally:
+            self.current = outer
+            ms = (time.perf_counter() - start) * 1000.0
+            self.timings[name] = round(self.timings.get(name, 0.0) + ms, 2)
+
+    def timings_ms(self):
+        return dict(self.timings, total=round(self.elapsed_ms(), 2))
+
+    def allow(self, stage, min_ms=0):
+        """True kalau stage opsional masih boleh jalan."""
+        self.check()
+        if stage in self.denied:
+            return False
+        if self.remaining_ms() > min_ms:
+            return True
+        if stage not in self.skipped:
+            self.skipped.append(stage)
+        return False
+
+    @property
+    def partial(self):
+        return bool(self.skipped)
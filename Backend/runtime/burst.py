@@ -0,0 +1,60 @@
+"""
+Burst multi-frame: 2-5 foto dokumen yang sama, masing-masing hanya crop
+OCR (murah), lalu kandidat per field digabung dengan voting. Fallback
+full-frame (mahal) cukup sekali, hanya untuk field yang kosong di semua frame.
+"""
+import os
+
+BURST_MIN_FRAMES = 2
+BURST_MAX_FRAMES = int(os.getenv("BURST_MAX_FRAMES", "5"))
+
+# stage mahal yang dimatikan saat pass per frame
+CHEAP_PASS_DENIED = {"fallback_ocr", "passport_full_ocr", "face"}
+
+# bobot vote untuk value tanpa confidence box (mis. hasil normalisasi)
+UNSCORED_CONF = 0.3
+
+
+def vote_fields(candidates):
+    """
+    candidates : list (parsed, confidences) per frame, urut frame
+    Returns (merged, votes):
+      merged : {field: value pemenang atau ""}
+      votes  : {field: {"value", "frames", "score"}} untuk field yang terisi
+
+    Skor value = jumlah confidence box dari frame yang menghasilkan value
+    itu; seri -> value yang muncul di frame paling awal.
+    """
+    fields = []
+    for parsed, _ in candidates:
+        fields += [k for k in parsed if k not in fields]
+
+    merged, votes = {}, {}
+    for k in fields:
+        tally = {}
+        for i, (parsed, conf) in enumerate(candidates):
+            value = parsed.get(k)
+            if not value:
+                continue
+            entry = tally.setdefault(value, {"value": value, "frames": [], "score": 0.0})
+            entry["frames"].append(i)
+            entry["score"] += conf.get(k, UNSCORED_CONF)
+
+        if not tally:
+            merged[k] = ""
+            continue
+
+        best = max(tally.values(), key=lambda e: (e["score"], -e["frames"][0]))
+        best["score"] = round(best["score"], 3)
+        merged[k] = best["value"]
+        votes[k] = best
+    return merged, votes
+
+
+def best_frame(votes, n_frames):
+    """Frame yang paling banyak menyumbang value pemenang (untuk fallback & wajah)."""
+    counts = [0] * n_frames
+    for v in votes.values():
+        for i in v["frames"]:
+            counts[i] += 1
+    return max(range(n_frames), key=lambda i: (counts[i], -i))
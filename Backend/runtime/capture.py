@@ -0,0 +1,407 @@
+"""
+Record-and-replay: capture sampled request produksi untuk kerja performa offline.
+
+Mode capture (CAPTURE_RATE > 0, mis. 0.02 = 2% request) merekam per request:
+  - hash + bytes gambar input
+  - output model: box YOLO per predict (passport / driving), baris EasyOCR,
+    teks Tesseract -- masing-masing dengan hash array input, argumen & durasi
+  - catatan pipeline (cabang fallback per state yang diambil, dll.)
+  - hasil akhir + stage timings
+
+Rekaman ditulis background thread (queue terbatas, penuh -> dibuang) ke
+arsip zip di CAPTURE_DIR: `<id>.json` (deflate) + `<id>.img` (file asli).
+
+Replay (bench/replay.py) menjalankan ulang pipeline saat ini; model dan OCR
+diganti output rekaman (dicocokkan lewat hash input + argumen), jadi
+perubahan fallback/states/* bisa di-benchmark dan di-diff tanpa model.
+
+Sisi request memakai session thread-local: models._get memberi proxy
+perekam, dan hook pytesseract hanya dipasang kalau capture / replay aktif.
+Request yang tidak di-sample tidak membayar apa pun selain satu lookup.
+"""
+import os
+import json
+import time
+import uuid
+import queue
+import random
+import hashlib
+import zipfile
+import threading
+from collections import deque
+from contextlib import contextmanager
+import numpy as np
+
+CAPTURE_RATE = float(os.getenv("CAPTURE_RATE", "0"))
+CAPTURE_DIR = os.getenv("CAPTURE_DIR", "captures")
+CAPTURE_QUEUE_MAX = int(os.getenv("CAPTURE_QUEUE_MAX", "16"))
+# arsip baru setelah ukuran ini (MB)
+CAPTURE_ARCHIVE_MB = int(os.getenv("CAPTURE_ARCHIVE_MB", "256"))
+
+_local = threading.local()
+
+
+def current():
+    """Session capture / replay milik thread ini, atau None."""
+    return getattr(_local, "session", None)
+
+
+def note(key, value):
+    """Catatan pipeline (mis. cabang fallback), no-op kalau tidak direkam."""
+    session = current()
+    if session is not None:
+        session.notes[key] = value
+
+
+def bind(fn, session):
+    """fn yang menjalankan session di thread lain (runtime/ocr_pool)."""
+    def run(*args, **kwargs):
+        prev = current()
+        _local.session = session
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _local.session = prev
+    return run
+
+
+def array_key(img):
+    """Hash pendek isi array (shape + dtype + bytes)."""
+    arr = np.ascontiguousarray(np.asarray(img))
+    h = hashlib.blake2b(digest_size=8)
+    h.update(f"{arr.shape}{arr.dtype.str}".encode())
+    h.update(arr.data)
+    return h.hexdigest()
+
+
+def jsonable(value):
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, (list, tuple)):
+        return [jsonable(v) for v in value]
+    if isinstance(value, dict):
+        return {str(k): jsonable(v) for k, v in value.items()}
+    return value
+
+
+def _call_id(kind, key, args):
+    return f"{kind}|{key}|{json.dumps(args, sort_keys=True)}"
+
+
+# =========================
+# PROXY MODEL / OCR
+# =========================
+class _ReplayTensor:
+    def __init__(self, data):
+        self._data = data
+
+    def cpu(self):
+        return self
+
+    def numpy(self):
+        return self._data
+
+
+class ReplayBoxes:
+    """Pengganti Results.boxes ultralytics (yang dipakai repo ini: .data, len())."""
+
+    def __init__(self, data):
+        self.data = _ReplayTensor(np.asarray(data, np.float32).reshape(-1, 6))
+
+    def __len__(self):
+        return len(self.data.numpy())
+
+
+class ReplayResult:
+    def __init__(self, data):
+        self.boxes = ReplayBoxes(data)
+
+
+def _encode_results(results):
+    boxes = results[0].boxes
+    if boxes is None or len(boxes) == 0:
+        return []
+    return boxes.data.cpu().numpy().tolist()
+
+
+def _decode_results(out):
+    return [ReplayResult(out or [])]
+
+
+class ModelProxy:
+    def __init__(self, name, model, session):
+        self.name = name
+        self._model = model
+        self._session = session
+
+    @property
+    def names(self):
+        if self._model is not None:
+            return self._model.names
+        return self._session.names[self.name]
+
+    def predict(self, source=None, **kwargs):
+        args = {k: kwargs.get(k) for k in ("conf", "iou", "imgsz")}
+        return self._session.call(
+            f"predict.{self.name}", source, args, lambda: self._model.predict(source, **kwargs),
+            encode=_encode_results, decode=_decode_results
+        )
+
+    def __getattr__(self, attr):
+        return getattr(self._model, attr)
+
+
+class ReaderProxy:
+    def __init__(self, reader, session):
+        self._reader = reader
+        self._session = session
+
+    def readtext(self, image, **kwargs):
+        return self._session.call(
+            "easyocr.readtext", image, kwargs, lambda: self._reader.readtext(image, **kwargs),
+            decode=lambda out: out or []
+        )
+
+    def __getattr__(self, attr):
+        return getattr(self._reader, attr)
+
+
+_hook_lock = threading.Lock()
+
+
+def install_tesseract_hook():
+    """Bungkus pytesseract.image_to_string / image_to_osd (sekali per proses)."""
+    import pytesseract
+    with _hook_lock:
+        for name in ("image_to_string", "image_to_osd"):
+            orig = getattr(pytesseract, name)
+            if getattr(orig, "_captured", False):
+                continue
+
+            def wrapper(image, *args, _orig=orig, _name=name, **kwargs):
+                session = current()
+                if session is None:
+                    return _orig(image, *args, **kwargs)
+                return session.call(
+                    f"tesseract.{_name}", image, {"args": list(args), **kwargs},
+                    lambda: _orig(image, *args, **kwargs), decode=lambda out: out or ""
+                )
+
+            wrapper._captured = True
+            setattr(pytesseract, name, wrapper)
+
+
+# =========================
+# SESSION
+# =========================
+class Recorder:
+    def __init__(self, contents):
+        self.id = uuid.uuid4().hex
+        self.image = bytes(contents)
+        self.calls = []
+        self.notes = {}
+        self.names = {}
+
+    def model(self, name, load):
+        instance = load()
+        if name == "reader":
+            return ReaderProxy(instance, self)
+        self.names[name] = {int(k): v for k, v in instance.names.items()}
+        return ModelProxy(name, instance, self)
+
+    def call(self, kind, source, args, run, encode=jsonable, decode=None):
+        start = time.perf_counter()
+        out = run()
+        self.calls.append({
+            "kind": kind,
+            "key": array_key(source),
+            "args": jsonable(args),
+            "out": encode(out),
+            "ms": round((time.perf_counter() - start) * 1000.0, 2),
+        })
+        return out
+
+    def finish(self, result):
+        parsed = dict(result.get("parsed") or {})
+        if parsed.get("faceImage"):
+            parsed["faceImage"] = "[FACE]"
+        record = {
+            "id": self.id,
+            "ts": time.time(),
+            "image_sha256": hashlib.sha256(self.image).hexdigest(),
+            "image_bytes": len(self.image),
+            "detected_type": result.get("detected_type"),
+            "state": (parsed.get("StateName") or "").strip().upper() or None,
+            "parsed": parsed,
+            "field_confidence": result.get("field_confidence"),
+            "orientation": result.get("orientation"),
+            "timings": result.get("timings"),
+            "model_versions": result.get("model_versions"),
+            "names": self.names,
+            "calls": self.calls,
+            "notes": self.notes,
+        }
+        if _writer is not None:
+            _writer.submit(record, self.image)
+
+
+class Replayer:
+    """
+    live=False: output rekaman saja (tanpa model); call yang tidak ada di
+    rekaman (mis. crop baru dari kode yang berubah) -> hasil kosong, dicatat
+    di `misses`. live=True: call yang tidak cocok dijalankan dengan model asli.
+    """
+
+    def __init__(self, record, live=False):
+        self.live = live
+        self.names = {m: {int(k): v for k, v in names.items()} for m, names in record.get("names", {}).items()}
+        self.notes = {}
+        self.hits = 0
+        self.misses = []
+        self.recorded_ms = 0.0
+        self._recorded = {}
+        for c in record.get("calls", []):
+            self._recorded.setdefault(_call_id(c["kind"], c["key"], c["args"]), deque()).append(c)
+
+    def model(self, name, load):
+        instance = load() if self.live else None
+        if name == "reader":
+            return ReaderProxy(instance, self)
+        return ModelProxy(name, instance, self)
+
+    def call(self, kind, source, args, run, encode=jsonable, decode=None):
+        found = self._recorded.get(_call_id(kind, array_key(source), jsonable(args)))
+        if found:
+            c = found.popleft()
+            self.hits += 1
+            self.recorded_ms += c.get("ms", 0.0)
+            return decode(c["out"]) if decode else c["out"]
+        self.misses.append(kind)
+        if self.live:
+            return run()
+        return decode(None) if decode else None
+
+
+@contextmanager
+def recording(contents):
+    """Session perekam untuk request ini kalau ter-sample, selain itu None."""
+    if (_writer is None or current() is not None or random.random() >= CAPTURE_RATE
+            or not isinstance(contents, (bytes, bytearray, np.ndarray))):
+        yield None
+        return
+    session = Recorder(contents)
+    _local.session = session
+    try:
+        yield session
+    finally:
+        _local.session = None
+
+
+@contextmanager
+def replaying(record, live=False):
+    install_tesseract_hook()
+    session = Replayer(record, live)
+    _local.session = session
+    try:
+        yield session
+    finally:
+        _local.session = None
+
+
+# =========================
+# ARSIP
+# =========================
+class CaptureWriter(threading.Thread):
+    def __init__(self, out_dir=CAPTURE_DIR, max_queue=CAPTURE_QUEUE_MAX, archive_mb=CAPTURE_ARCHIVE_MB):
+        super().__init__(name="capture-writer", daemon=True)
+        self.out_dir = out_dir
+        self.archive_bytes = archive_mb << 20
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._halt = threading.Event()
+        self._part = 0
+        self.stats = {"queued": 0, "written": 0, "dropped": 0, "errors": 0}
+
+    def submit(self, record, image):
+        try:
+            self._queue.put_nowait((record, image))
+            self.stats["queued"] += 1
+        except queue.Full:
+            self.stats["dropped"] += 1
+
+    def _archive_path(self):
+        # satu arsip per jam per proses; dipecah kalau melebihi CAPTURE_ARCHIVE_MB
+        stem = f"capture-{time.strftime('%Y%m%d-%H')}-{os.getpid()}"
+        while True:
+            path = os.path.join(self.out_dir, f"{stem}-{self._part}.zip")
+            if not os.path.exists(path) or os.path.getsize(path) < self.archive_bytes:
+                return path
+            self._part += 1
+
+    def _write(self, record, image):
+        os.makedirs(self.out_dir, mode=0o700, exist_ok=True)
+        with zipfile.ZipFile(self._archive_path(), "a") as zf:
+            zf.writestr(f"{record['id']}.json", json.dumps(record), compress_type=zipfile.ZIP_DEFLATED)
+            zf.writestr(f"{record['id']}.img", image, compress_type=zipfile.ZIP_STORED)
+
+    def run(self):
+        while not (self._halt.is_set() and self._queue.empty()):
+            try:
+                record, image = self._queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            try:
+                self._write(record, image)
+                self.stats["written"] += 1
+            except Exception as e:
+                self.stats["errors"] += 1
+                print(f"[CAPTURE] gagal menulis {record['id']}: {e}")
+
+    def stop(self, timeout=5.0):
+        self._halt.set()
+        self.join(timeout)
+
+
+def iter_archive(paths):
+    """Yield (record, image bytes) dari file zip / folder berisi zip."""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files += sorted(os.path.join(path, f) for f in os.listdir(path) if f.endswith(".zip"))
+        else:
+            files.append(path)
+    for path in files:
+        with zipfile.ZipFile(path) as zf:
+            for name in zf.namelist():
+                if name.endswith(".json"):
+                    record = json.loads(zf.read(name))
+                    yield record, zf.read(name[:-5] + ".img")
+
+
+_writer = None
+_lock = threading.Lock()
+
+
+def start_writer():
+    """No-op kalau CAPTURE_RATE=0."""
+    global _writer
+    if CAPTURE_RATE <= 0:
+        return None
+    with _lock:
+        if _writer is None:
+            install_tesseract_hook()
+            _writer = CaptureWriter()
+            _writer.start()
+    return _writer
+
+
+def stop_writer():
+    if _writer is not None:
+        _writer.stop()
+
+
+def stats():
+    if _writer is None:
+        return {"enabled": False}
+    return dict(_writer.stats, enabled=True, rate=CAPTURE_RATE, pending=_writer._queue.qsize())
@@ -0,0 +1,188 @@
+"""
+Deteksi near-duplicate antar submission (kartu yang sama difoto ulang
+beberapa detik kemudian) dengan perceptual hash.
+
+- pHash 64-bit dari gray (DCT 32x32 -> 8x8)
+- index multi-index hashing: hash dipecah jadi (max_distance + 1) potongan,
+  dua hash dengan jarak Hamming <= max_distance pasti identik di minimal
+  satu potongan (pigeonhole) -> kandidat cukup diambil dari bucket
+- di-scope per client/session, memori dibatasi (max_entries), TTL eviction
+
+pHash saja tidak cukup: kartu orang lain dengan template yang sama (state
+sama, layout sama) jaraknya bisa 0-4 bit. Hasil lama hanya dipakai ulang /
+di-merge kalau nomor dokumen (licenseNumber / passportNumber) foto baru
+sama persis dengan hasil lama, lihat same_document().
+"""
+import os
+import copy
+import time
+import uuid
+import threading
+from collections import OrderedDict
+import cv2
+import numpy as np
+
+DEDUP_ENABLED = os.getenv("DEDUP_ENABLED", "0") == "1"
+DEDUP_MAX_DISTANCE = int(os.getenv("DEDUP_MAX_DISTANCE", "2"))
+DEDUP_TTL_S = int(os.getenv("DEDUP_TTL_S", "120"))
+DEDUP_MAX_ENTRIES = int(os.getenv("DEDUP_MAX_ENTRIES", "1024"))
+
+HASH_BITS = 64
+
+# field nomor dokumen per doc type, dicocokkan exact sebelum reuse / merge
+ID_FIELDS = {"driving_license": "licenseNumber", "passport": "passportNumber"}
+
+
+def phash(gray):
+    small = cv2.resize(gray, (32, 32), interpolation=cv2.INTER_AREA).astype(np.float32)
+    low = cv2.dct(small)[:8, :8].flatten()
+    # DC (low[0]) tidak ikut menentukan median
+    bits = low > np.median(low[1:])
+    return int("".join("1" if b else "0" for b in bits), 2)
+
+
+def hamming(a, b):
+    return bin(a ^ b).count("1")
+
+
+class Entry:
+    __slots__ = ("id", "scope", "hash", "result", "created", "expires", "hits")
+
+    def __init__(self, scope, h, result, ttl_s):
+        self.id = uuid.uuid4().hex[:12]
+        self.scope = scope
+        self.hash = h
+        self.result = result
+        self.created = time.time()
+        self.expires = self.created + ttl_s
+        self.hits = 0
+
+
+class NearDupIndex:
+    def __init__(self, max_distance=DEDUP_MAX_DISTANCE, ttl_s=DEDUP_TTL_S, max_entries=DEDUP_MAX_ENTRIES):
+        self.max_distance = max_distance
+        self.ttl_s = ttl_s
+        self.max_entries = max_entries
+
+        n = max_distance + 1
+        size, rem = divmod(HASH_BITS, n)
+        self.chunks = []
+        shift = 0
+        for i in range(n):
+            width = size + (1 if i < rem else 0)
+            self.chunks.append((shift, (1 << width) - 1))
+            shift += width
+
+        self._entries = OrderedDict()   # urut waktu insert -> eviction FIFO/TTL
+        self._buckets = {}
+        self._lock = threading.Lock()
+        self._stats = {"lookups": 0, "hits": 0, "reused": 0, "merged": 0, "id_mismatch": 0,
+                       "evictions": 0}
+
+    def _keys(self, scope, h):
+        return [(scope, i, (h >> shift) & mask) for i, (shift, mask) in enumerate(self.chunks)]
+
+    def _remove(self, entry):
+        self._entries.pop(entry.id, None)
+        for key in self._keys(entry.scope, entry.hash):
+            bucket = self._buckets.get(key)
+            if bucket is not None:
+                bucket.discard(entry.id)
+                if not bucket:
+                    del self._buckets[key]
+
+    def _evict(self, now):
+        while self._entries:
+            entry = next(iter(self._entries.values()))
+            if entry.expires > now and len(self._entries) <= self.max_entries:
+                break
+            self._remove(entry)
+            self._stats["evictions"] += 1
+
+    def lookup(self, scope, h):
+        """Entry terdekat (jarak <= max_distance) di scope yang sama, atau None."""
+        now = time.time()
+        with self._lock:
+            self._evict(now)
+            self._stats["lookups"] += 1
+
+            candidates = set()
+            for key in self._keys(scope, h):
+                candidates |= self._buckets.get(key, set())
+
+            best, best_d = None, self.max_distance + 1
+            for entry_id in candidates:
+                entry = self._entries[entry_id]
+                d = hamming(entry.hash, h)
+                if d < best_d:
+                    best, best_d = entry, d
+
+            if best is None:
+                return None, None
+            best.hits += 1
+            self._stats["hits"] += 1
+            return best, best_d
+
+    def add(self, scope, h, result):
+        entry = Entry(scope, h, copy.deepcopy(result), self.ttl_s)
+        with self._lock:
+            self._entries[entry.id] = entry
+            for key in self._keys(scope, h):
+                self._buckets.setdefault(key, set()).add(entry.id)
+            self._evict(time.time())
+        return entry
+
+    def update(self, entry, result):
+        with self._lock:
+            entry.result = copy.deepcopy(result)
+            entry.expires = time.time() + self.ttl_s
+
+    def count(self, name):
+        with self._lock:
+            self._stats[name] += 1
+
+    def stats(self):
+        with self._lock:
+            s = dict(self._stats)
+            s["entries"] = len(self._entries)
+        s["hit_rate"] = round(s["hits"] / s["lookups"], 4) if s["lookups"] else None
+        return s
+
+
+def document_id(result):
+    """Nomor dokumen di hasil pipeline ("" kalau kosong / doc type tidak dikenal)."""
+    field = ID_FIELDS.get(result.get("detected_type"))
+    if not field:
+        return ""
+    return (result.get("parsed", {}).get(field) or "").strip().upper()
+
+
+def same_document(old, doc_id):
+    """Foto baru (nomor dokumen doc_id) dokumen yang sama dengan hasil `old`."""
+    doc_id = (doc_id or "").strip().upper()
+    return bool(doc_id) and doc_id == document_id(old)
+
+
+def is_complete(result):
+    """Hasil lama bisa dipakai ulang utuh: tidak partial dan semua field terisi."""
+    if result.get("partial"):
+        return False
+    return all(v for v in result.get("parsed", {}).values())
+
+
+def merge_fields(new, old):
+    """Isi field kosong di `new` dari `old`. Returns list field yang diisi."""
+    filled = []
+    for k, v in old.get("parsed", {}).items():
+        if v and not new["parsed"].get(k):
+            new["parsed"][k] = v
+            filled.append(k)
+            if k in old.get("field_confidence", {}):
+                new.setdefault("field_confidence", {})[k] = old["field_confidence"][k]
+    if not new.get("face") and old.get("face"):
+        new["face"] = old["face"]
+        new["face_media_type"] = old.get("face_media_type")
+    return filled
+
+
+index = NearDupIndex()
@@ -0,0 +1,74 @@
+import os
+import time
+import uuid
+import threading
+from collections import OrderedDict
+
+FACE_TTL_S = int(os.getenv("FACE_TTL_S", "120"))
+FACE_STORE_MAX = int(os.getenv("FACE_STORE_MAX", "512"))
+# jumlah proses worker server (uvicorn / gunicorn membaca env yang sama)
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", "1"))
+
+
+class FaceStore:
+    """
+    Penyimpanan foto wajah berumur pendek (in-memory, per proses) supaya
+    response /detect cukup berisi URL, bukan base64.
+
+    Hanya untuk satu proses: dengan beberapa worker, GET /faces/{id} bisa
+    jatuh ke proses lain yang tidak punya foto itu (404). Lihat
+    url_mode_available().
+    """
+
+    def __init__(self, ttl_s=FACE_TTL_S, max_items=FACE_STORE_MAX):
+        self.ttl_s = ttl_s
+        self.max_items = max_items
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _evict(self, now):
+        while self._items:
+            key, (_, _, expires) = next(iter(self._items.items()))
+            if expires > now and len(self._items) <= self.max_items:
+                break
+            self._items.popitem(last=False)
+
+    def put(self, data, media_type="image/jpeg"):
+        face_id = uuid.uuid4().hex
+        now = time.time()
+        with self._lock:
+            self._items[face_id] = (data, media_type, now + self.ttl_s)
+            self._evict(now)
+        return face_id
+
+    def get(self, face_id):
+        """(bytes, media_type) atau None kalau tidak ada / expired."""
+        now = time.time()
+        with self._lock:
+            self._evict(now)
+            item = self._items.get(face_id)
+        if item is None:
+            return None
+        return item[0], item[1]
+
+
+faces = FaceStore()
+
+
+_multi_warned = False
+
+
+def url_mode_available(workers=None):
+    """
+    False kalau server jalan dengan beberapa proses worker (WEB_CONCURRENCY
+    > 1); caller kembali ke foto inline.
+    """
+    global _multi_warned
+    workers = WEB_CONCURRENCY if workers is None else workers
+    if workers <= 1:
+        return True
+    if not _multi_warned:
+        _multi_warned = True
+        print(f"[FACES] face=url tidak tersedia dengan {workers} worker "
+              "(store per proses), foto dikirim inline")
+    return False
@@ -0,0 +1,258 @@
+"""
+Inference di proses terpisah (opsional), dengan hand-off gambar lewat
+shared memory (runtime/shm_pool.py).
+
+    INFERENCE_PROCS=0  -> pipeline di proses API seperti biasa (default)
+    INFERENCE_PROCS=2  -> 2 proses worker, masing-masing load model sendiri
+
+Proses API: baca upload -> decode ke slot shared memory -> kirim
+FrameHandle lewat queue worker dengan antrian paling pendek. Worker:
+attach slot (zero-copy) -> run_pipeline -> kirim hasil (JSON kecil +
+bytes wajah) balik. Slot punya dua referensi: sisi API (dilepas saat
+run() selesai, termasuk kalau request dibatalkan) dan sisi worker
+(dilepas saat hasil diterima); slot baru dipakai ulang setelah keduanya.
+
+Thread collector juga memantau worker: kalau proses mati (OOM, segfault
+di native code) atau satu request-nya melewati INFERENCE_MAX_WAIT_S
+(worker dianggap macet dan di-terminate), semua request yang di-assign
+ke worker itu gagal dengan 503 / 504, slot-nya di-release, dan worker
+di-spawn ulang.
+"""
+import os
+import time
+import uuid
+import queue
+import threading
+import multiprocessing as mp
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from runtime.shm_pool import ShmPool, SlotTooSmall
+from runtime.budget import Budget
+
+INFERENCE_PROCS = int(os.getenv("INFERENCE_PROCS", "0"))
+# batas keras satu request di worker (termasuk antri); lewat ini worker di-terminate
+INFERENCE_MAX_WAIT_S = float(os.getenv("INFERENCE_MAX_WAIT_S", "120"))
+# jeda minimum antar spawn ulang worker yang sama (worker yang crash saat start)
+INFERENCE_RESPAWN_S = float(os.getenv("INFERENCE_RESPAWN_S", "5"))
+
+_pool = None
+
+
+def _worker_main(index, requests, results):
+    # import di proses worker: thread env + model registry milik proses ini
+    import main
+    from fastapi import HTTPException
+    from runtime import models
+
+    models.warm_up(main.PIPELINE_LOCK)
+    results.put(("ready", index, models.is_ready()))
+
+    while True:
+        item = requests.get()
+        if item is None:
+            break
+        req_id, frame, deadline_ms, face_format, dedup_scope = item
+        budget = Budget(deadline_ms)
+        try:
+            with main.PIPELINE_LOCK, models.pin():
+                result = main.run_pipeline(frame, budget, face_format, dedup_scope)
+            results.put((req_id, result, None))
+        except HTTPException as e:
+            results.put((req_id, None, (e.status_code, e.detail)))
+        except Exception as e:
+            results.put((req_id, None, (500, str(e))))
+
+
+class _Worker:
+    def __init__(self, ctx, index, results):
+        self.index = index
+        self.requests = ctx.Queue()
+        self.process = ctx.Process(target=_worker_main, args=(index, self.requests, results),
+                                   name=f"inference-{index}", daemon=True)
+        self.spawned_at = 0.0
+        self.dead = False
+
+    def start(self):
+        self.spawned_at = time.monotonic()
+        self.process.start()
+
+
+class InferencePool:
+    def __init__(self, procs=INFERENCE_PROCS, shm=None, max_wait_s=INFERENCE_MAX_WAIT_S):
+        # spawn: jangan fork proses yang thread pool torch / OpenCV-nya sudah jalan
+        self._ctx = mp.get_context("spawn")
+        self.shm = shm or ShmPool()
+        self.max_wait_s = max_wait_s
+        self._results = self._ctx.Queue()
+        self._workers = [_Worker(self._ctx, i, self._results) for i in range(procs)]
+        # req_id -> (Future, FrameHandle | None, index worker, waktu submit)
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._ready = {}
+        self._halt = threading.Event()
+        self.stats = {"died": 0, "timed_out": 0, "respawned": 0}
+        self._collector = threading.Thread(target=self._collect, name="inference-results", daemon=True)
+
+    def start(self):
+        for w in self._workers:
+            w.start()
+        self._collector.start()
+        return self
+
+    def _collect(self):
+        last_check = time.monotonic()
+        while not self._halt.is_set():
+            try:
+                msg = self._results.get(timeout=0.5)
+            except queue.Empty:
+                msg = False
+            # dicek juga saat hasil terus berdatangan
+            if time.monotonic() - last_check >= 0.5:
+                self._check_workers()
+                last_check = time.monotonic()
+            if msg is False:
+                continue
+            if msg is None:
+                return
+            if msg[0] == "ready":
+                self._ready[msg[1]] = msg[2]
+                continue
+            req_id, result, error = msg
+            self._finish(req_id, (result, error))
+
+    def _finish(self, req_id, outcome):
+        with self._lock:
+            fut, frame, _, _ = self._pending.pop(req_id, (None, None, None, None))
+        if frame is not None:
+            self.shm.release(frame)
+        if fut is not None and not fut.done():
+            fut.set_result(outcome)
+
+    def _check_workers(self):
+        """Worker mati / macet: gagalkan request-nya, lepas referensi slot, spawn ulang."""
+        now = time.monotonic()
+        for w in self._workers:
+            with self._lock:
+                assigned = [(rid, t) for rid, (_, _, i, t) in self._pending.items() if i == w.index]
+
+            if w.process.is_alive():
+                if not assigned or now - min(t for _, t in assigned) <= self.max_wait_s:
+                    continue
+                print(f"[INFERENCE] worker {w.index} macet > {self.max_wait_s:.0f}s, terminate")
+                self.stats["timed_out"] += 1
+                w.process.terminate()
+                w.process.join(timeout=5)
+                error = (504, "Inference worker timed out")
+            else:
+                if not w.dead:
+                    print(f"[INFERENCE] worker {w.index} mati (exit {w.process.exitcode})")
+                    self.stats["died"] += 1
+                error = (503, "Inference worker died")
+
+            w.dead = True
+            self._ready.pop(w.index, None)
+            for rid, _ in assigned:
+                self._finish(rid, (None, error))
+            if now - w.spawned_at >= INFERENCE_RESPAWN_S and not self._halt.is_set():
+                self._respawn(w.index)
+
+    def _respawn(self, index):
+        self._workers[index] = _Worker(self._ctx, index, self._results)
+        self._workers[index].start()
+        self.stats["respawned"] += 1
+
+    def _pick_worker(self):
+        """Worker hidup dengan request terassign paling sedikit."""
+        with self._lock:
+            load = {w.index: 0 for w in self._workers if w.process.is_alive()}
+            for _, _, i, _ in self._pending.values():
+                if i in load:
+                    load[i] += 1
+        if not load:
+            return None
+        return self._workers[min(load, key=load.get)]
+
+    def run(self, contents, budget: Budget, face_format="base64", dedup_scope=None):
+        """
+        Blocking (panggil dari threadpool). Returns (result, error) dengan
+        error = (status_code, detail) atau None. PoolExhausted kalau semua
+        slot terpakai.
+        """
+        worker = self._pick_worker()
+        if worker is None:
+            return None, (503, "No inference worker alive")
+
+        with budget.stage("decode"):
+            try:
+                frame = self.shm.decode(contents)
+                payload = frame
+            except SlotTooSmall:
+                # gambar raksasa (mis. PNG tanpa reduce): kirim file apa adanya
+                frame, payload = None, bytes(contents)
+        if payload is None:
+            return None, (400, "Invalid image file")
+
+        try:
+            req_id = uuid.uuid4().hex
+            fut = Future()
+            if frame is not None:
+                # referensi sisi worker, dilepas di _finish
+                self.shm.incref(frame)
+            with self._lock:
+                self._pending[req_id] = (fut, frame, worker.index, time.monotonic())
+            remaining = budget.remaining_ms()
+            deadline_ms = None if remaining == float("inf") else max(1, int(remaining))
+            worker.requests.put((req_id, payload, deadline_ms, face_format, dedup_scope))
+
+            # worker tidak bisa dibatalkan dari sini; budget-nya sendiri yang
+            # menghentikan stage opsional, referensi worker dilepas saat hasil
+            # datang (atau saat collector menyatakan worker mati / macet)
+            give_up = time.monotonic() + self.max_wait_s + 10
+            while time.monotonic() < give_up:
+                budget.check()
+                try:
+                    return fut.result(timeout=0.1)
+                except FutureTimeout:
+                    continue
+            # collector tidak jalan: jangan tahan thread request selamanya
+            return None, (504, "Inference worker timed out")
+        finally:
+            if frame is not None:
+                self.shm.release(frame)     # referensi sisi API
+
+    def status(self):
+        alive = sum(w.process.is_alive() for w in self._workers)
+        return dict(
+            self.stats,
+            procs=len(self._workers),
+            alive=alive,
+            ready=len(self._ready) == len(self._workers) and all(self._ready.values()),
+            pending=len(self._pending),
+            shm=self.shm.status(),
+        )
+
+    def stop(self):
+        self._halt.set()
+        for w in self._workers:
+            w.requests.put(None)
+        for w in self._workers:
+            w.process.join(timeout=10)
+        self._results.put(None)
+        self.shm.close()
+
+
+def get_pool():
+    return _pool
+
+
+def start():
+    global _pool
+    if INFERENCE_PROCS > 0 and _pool is None:
+        _pool = InferencePool().start()
+    return _pool
+
+
+def stop():
+    global _pool
+    if _pool is not None:
+        _pool.stop()
+        _pool = None
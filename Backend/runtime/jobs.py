@@ -0,0 +1,329 @@
+"""
+Job queue lokal (SQLite) untuk verifikasi async.
+
+    POST /jobs          -> job_id langsung (202)
+    GET  /jobs/{id}     -> status / hasil, ?wait=N untuk long-poll
+
+Worker = thread di proses API (JOB_WORKERS) dan/atau proses terpisah
+yang berbagi file SQLite yang sama (scale horizontal di satu host):
+
+    python -m runtime.jobs --workers 2
+"""
+import os
+import json
+import time
+import uuid
+import socket
+import sqlite3
+import threading
+import urllib.parse
+import urllib.request
+from contextlib import contextmanager
+
+JOB_DB_PATH = os.getenv("JOB_DB_PATH", "jobs.sqlite3")
+# 0 = tidak ada worker di proses API (jalankan `python -m runtime.jobs`)
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "0"))
+# job "running" lebih lama dari ini dianggap worker-nya mati -> di-queue ulang
+JOB_STALE_S = int(os.getenv("JOB_STALE_S", "600"))
+# job yang sudah di-claim sekian kali dan worker-nya mati lagi -> failed
+# (job yang selalu membuat worker crash tidak di-queue ulang selamanya)
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+JOB_RETENTION_S = int(os.getenv("JOB_RETENTION_S", str(24 * 3600)))
+# host yang boleh menerima callback (hasil berisi PII), pisah koma;
+# ".example.com" = semua subdomain. Kosong = callback_url ditolak.
+JOB_CALLBACK_HOSTS = [h.strip().lower() for h in os.getenv("JOB_CALLBACK_HOSTS", "").split(",") if h.strip()]
+
+PRIORITIES = {
+    "interactive": 10,   # scan dari CameraCapture
+    "normal": 5,
+    "bulk": 0,           # re-verifikasi massal
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id           TEXT PRIMARY KEY,
+    status       TEXT NOT NULL,
+    priority     INTEGER NOT NULL,
+    created_at   REAL NOT NULL,
+    started_at   REAL,
+    finished_at  REAL,
+    worker       TEXT,
+    deadline_ms  INTEGER,
+    callback_url TEXT,
+    payload      BLOB,
+    result       TEXT,
+    error        TEXT,
+    attempts     INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_queue ON jobs (status, priority DESC, created_at);
+"""
+
+
+def parse_priority(value):
+    """Nama atau angka, di-clamp ke rentang PRIORITIES. ValueError kalau tidak valid."""
+    if value is None:
+        return PRIORITIES["normal"]
+    if str(value).lower() in PRIORITIES:
+        return PRIORITIES[str(value).lower()]
+    prio = int(str(value).strip())
+    return min(max(prio, min(PRIORITIES.values())), max(PRIORITIES.values()))
+
+
+def callback_allowed(url, hosts=None):
+    """Hanya http(s) ke host di JOB_CALLBACK_HOSTS."""
+    hosts = JOB_CALLBACK_HOSTS if hosts is None else hosts
+    try:
+        parts = urllib.parse.urlsplit(url)
+        host = (parts.hostname or "").lower()
+    except ValueError:
+        return False
+    if parts.scheme not in ("http", "https") or not host:
+        return False
+    return any(host == h or (h.startswith(".") and host.endswith(h)) for h in hosts)
+
+
+class JobQueue:
+    def __init__(self, path=JOB_DB_PATH):
+        self.path = path
+        with self._db() as db:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.executescript(SCHEMA)
+            # DB dari versi sebelum kolom attempts
+            columns = {r["name"] for r in db.execute("PRAGMA table_info(jobs)")}
+            if "attempts" not in columns:
+                db.execute("ALTER TABLE jobs ADD COLUMN attempts INTEGER NOT NULL DEFAULT 0")
+
+    @contextmanager
+    def _db(self):
+        # satu koneksi per operasi: aman dipakai dari banyak thread / proses
+        db = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        db.row_factory = sqlite3.Row
+        try:
+            yield db
+        finally:
+            db.close()
+
+    def enqueue(self, payload, priority=PRIORITIES["normal"], callback_url=None, deadline_ms=None):
+        job_id = uuid.uuid4().hex
+        with self._db() as db:
+            db.execute(
+                "INSERT INTO jobs (id, status, priority, created_at, deadline_ms, callback_url, payload) "
+                "VALUES (?, 'queued', ?, ?, ?, ?, ?)",
+                (job_id, priority, time.time(), deadline_ms, callback_url, sqlite3.Binary(payload))
+            )
+        return job_id
+
+    def claim(self, worker_id):
+        """Ambil job prioritas tertinggi secara atomik. None kalau kosong."""
+        with self._db() as db:
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                row = db.execute(
+                    "SELECT id, priority, deadline_ms, callback_url, payload FROM jobs "
+                    "WHERE status = 'queued' ORDER BY priority DESC, created_at LIMIT 1"
+                ).fetchone()
+                if row is not None:
+                    db.execute(
+                        "UPDATE jobs SET status = 'running', worker = ?, started_at = ?, "
+                        "attempts = attempts + 1 WHERE id = ?",
+                        (worker_id, time.time(), row["id"])
+                    )
+                db.execute("COMMIT")
+            except Exception:
+                db.execute("ROLLBACK")
+                raise
+        return dict(row) if row is not None else None
+
+    def complete(self, job_id, result):
+        with self._db() as db:
+            db.execute(
+                "UPDATE jobs SET status = 'done', finished_at = ?, result = ?, payload = NULL WHERE id = ?",
+                (time.time(), json.dumps(result), job_id)
+            )
+
+    def fail(self, job_id, error):
+        with self._db() as db:
+            db.execute(
+                "UPDATE jobs SET status = 'failed', finished_at = ?, error = ?, payload = NULL WHERE id = ?",
+                (time.time(), str(error), job_id)
+            )
+
+    def get(self, job_id):
+        with self._db() as db:
+            row = db.execute(
+                "SELECT id, status, priority, created_at, started_at, finished_at, attempts, result, error "
+                "FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        if row is None:
+            return None
+
+        job = dict(row)
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        if job["status"] == "queued":
+            job["queue_position"] = self.position(job_id, row["priority"], row["created_at"])
+        return job
+
+    def position(self, job_id, priority, created_at):
+        with self._db() as db:
+            return db.execute(
+                "SELECT COUNT(*) FROM jobs WHERE status = 'queued' AND "
+                "(priority > ? OR (priority = ? AND created_at < ?))",
+                (priority, priority, created_at)
+            ).fetchone()[0]
+
+    def maintenance(self, max_attempts=JOB_MAX_ATTEMPTS):
+        """
+        Queue ulang job milik worker mati (failed kalau sudah max_attempts
+        kali) + hapus job lama. Returns list job yang di-fail
+        ({id, callback_url, error}) supaya worker bisa mengirim callback.
+        """
+        now = time.time()
+        with self._db() as db:
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                stale = "status = 'running' AND started_at < ?"
+                failed = [dict(r) for r in db.execute(
+                    f"SELECT id, callback_url, attempts FROM jobs WHERE {stale} AND attempts >= ?",
+                    (now - JOB_STALE_S, max_attempts)
+                )]
+                for job in failed:
+                    job["error"] = f"Worker died on all {job.pop('attempts')} attempts"
+                    db.execute(
+                        "UPDATE jobs SET status = 'failed', finished_at = ?, error = ?, payload = NULL "
+                        "WHERE id = ?", (now, job["error"], job["id"])
+                    )
+                db.execute(
+                    f"UPDATE jobs SET status = 'queued', worker = NULL, started_at = NULL WHERE {stale}",
+                    (now - JOB_STALE_S,)
+                )
+                db.execute(
+                    "DELETE FROM jobs WHERE status IN ('done', 'failed') AND finished_at < ?",
+                    (now - JOB_RETENTION_S,)
+                )
+                db.execute("COMMIT")
+            except Exception:
+                db.execute("ROLLBACK")
+                raise
+        return failed
+
+
+# =========================
+# WORKER
+# =========================
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    # redirect bisa membawa hasil ke host di luar allowlist
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+_callback_opener = urllib.request.build_opener(_NoRedirect)
+
+
+def send_callback(url, body, retries=3):
+    if not callback_allowed(url):
+        print(f"[JOBS] callback ditolak (host tidak di JOB_CALLBACK_HOSTS): {url}")
+        return False
+    data = json.dumps(body).encode()
+    for attempt in range(retries):
+        try:
+            req = urllib.request.Request(
+                url, data=data, method="POST", headers={"Content-Type": "application/json"}
+            )
+            _callback_opener.open(req, timeout=10).read()
+            return True
+        except Exception as e:
+            print(f"[JOBS] callback gagal ({attempt + 1}/{retries}) {url}: {e}")
+            time.sleep(2 ** attempt)
+    return False
+
+
+class JobWorker(threading.Thread):
+    """
+    handler(payload_bytes, deadline_ms) -> dict hasil
+    """
+
+    def __init__(self, queue, handler, poll_interval=0.5, name=None):
+        super().__init__(daemon=True)
+        self.queue = queue
+        self.handler = handler
+        self.poll_interval = poll_interval
+        self.worker_id = name or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self._halt = threading.Event()
+
+    def run(self):
+        last_maintenance = 0.0
+        while not self._halt.is_set():
+            try:
+                if time.time() - last_maintenance > 60:
+                    for dead in self.queue.maintenance():
+                        if dead["callback_url"]:
+                            send_callback(dead["callback_url"], {
+                                "job_id": dead["id"], "status": "failed", "error": dead["error"]
+                            })
+                    last_maintenance = time.time()
+                job = self.queue.claim(self.worker_id)
+            except sqlite3.Error as e:
+                print(f"[JOBS] queue error: {e}")
+                job = None
+
+            if job is None:
+                self._halt.wait(self.poll_interval)
+                continue
+            self.process(job)
+
+    def process(self, job):
+        try:
+            result = self.handler(job["payload"], job["deadline_ms"])
+            self.queue.complete(job["id"], result)
+            body = {"job_id": job["id"], "status": "done", "result": result}
+        except Exception as e:
+            detail = getattr(e, "detail", None) or str(e)
+            self.queue.fail(job["id"], detail)
+            body = {"job_id": job["id"], "status": "failed", "error": detail}
+
+        if job["callback_url"]:
+            send_callback(job["callback_url"], body)
+
+    def stop(self):
+        self._halt.set()
+
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def get_queue():
+    """Singleton lazy: file SQLite baru dibuat saat pertama dipakai."""
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = JobQueue()
+    return _queue
+
+
+def start_workers(queue, handler, count=JOB_WORKERS):
+    workers = [JobWorker(queue, handler) for _ in range(count)]
+    for w in workers:
+        w.start()
+    return workers
+
+
+if __name__ == "__main__":
+    import argparse
+
+    ap = argparse.ArgumentParser(description="Job worker standalone (berbagi JOB_DB_PATH)")
+    ap.add_argument("--workers", type=int, default=1)
+    args = ap.parse_args()
+
+    import main
+    from runtime import models
+    models.warm_up(main.PIPELINE_LOCK)
+
+    workers = start_workers(get_queue(), main.run_job, args.workers)
+    print(f"[JOBS] {args.workers} worker jalan, db={JOB_DB_PATH}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        for w in workers:
+            w.stop()
@@ -0,0 +1,135 @@
+"""
+Live scan lewat WebSocket: client kirim frame kamera terus-menerus,
+server hanya memproses frame terbaru (frame lain di-drop), frame buram /
+gelap ditolak murah sebelum pipeline, dan field dikumpulkan antar frame
+(per field simpan value dengan confidence tertinggi).
+"""
+import os
+import cv2
+
+LIVE_MIN_SHARPNESS = float(os.getenv("LIVE_MIN_SHARPNESS", "80"))
+LIVE_MIN_BRIGHTNESS = float(os.getenv("LIVE_MIN_BRIGHTNESS", "50"))
+LIVE_MAX_BRIGHTNESS = float(os.getenv("LIVE_MAX_BRIGHTNESS", "225"))
+LIVE_DEADLINE_MS = int(os.getenv("LIVE_DEADLINE_MS", "2000"))
+LIVE_MAX_FRAMES = int(os.getenv("LIVE_MAX_FRAMES", "60"))
+LIVE_MAX_FRAME_BYTES = int(os.getenv("LIVE_MAX_FRAME_BYTES", str(4 * 1024 * 1024)))
+
+# confidence untuk field yang diisi fallback (tidak ada box YOLO)
+LIVE_FALLBACK_CONF = float(os.getenv("LIVE_FALLBACK_CONF", "0.3"))
+
+QUALITY_WIDTH = 320
+
+
+def frame_quality(buf):
+    """
+    Gate murah (decode grayscale 1/4 + thumbnail): kecerahan & ketajaman
+    (variance Laplacian). Returns dict {ok, reason, score, sharpness, brightness}.
+    """
+    gray = cv2.imdecode(buf, cv2.IMREAD_REDUCED_GRAYSCALE_4)
+    if gray is None:
+        return {"ok": False, "reason": "invalid_image", "score": 0.0}
+
+    h, w = gray.shape
+    if w > QUALITY_WIDTH:
+        gray = cv2.resize(gray, (QUALITY_WIDTH, max(1, round(h * QUALITY_WIDTH / w))),
+                          interpolation=cv2.INTER_AREA)
+
+    brightness = float(gray.mean())
+    sharpness = float(cv2.Laplacian(gray, cv2.CV_32F).var())
+
+    info = {
+        "sharpness": round(sharpness, 1),
+        "brightness": round(brightness, 1),
+        # 0..1, dipakai sebagai bobot confidence field dari frame ini
+        "score": round(min(1.0, sharpness / (2 * LIVE_MIN_SHARPNESS)), 3),
+    }
+
+    if brightness < LIVE_MIN_BRIGHTNESS:
+        info.update(ok=False, reason="too_dark")
+    elif brightness > LIVE_MAX_BRIGHTNESS:
+        info.update(ok=False, reason="too_bright")
+    elif sharpness < LIVE_MIN_SHARPNESS:
+        info.update(ok=False, reason="blurry")
+    else:
+        info.update(ok=True, reason=None)
+    return info
+
+
+class FieldAccumulator:
+    """
+    Gabungan field antar frame. confidence field = confidence box YOLO
+    (atau LIVE_FALLBACK_CONF) x skor kualitas frame.
+    """
+
+    def __init__(self):
+        self.doc_type = None
+        self.fields = {}        # name -> {"value", "confidence", "frame"}
+        self.expected = None    # semua key parsed (kecuali faceImage)
+        self.wants_face = False
+        self.face = None
+        self.face_media_type = None
+        self.face_score = -1.0
+
+    def reset(self):
+        self.__init__()
+
+    def update(self, result, quality_score, frame_no):
+        """Masukkan hasil run_pipeline. Returns list field yang berubah."""
+        doc_type = result.get("detected_type")
+        if self.doc_type is not None and doc_type != self.doc_type:
+            # classifier berubah pikiran: frame ini bukan dokumen yang sama,
+            # pertahankan akumulasi yang ada
+            return []
+        self.doc_type = doc_type
+
+        parsed = result.get("parsed", {})
+        if self.expected is None:
+            self.expected = [k for k in parsed if k != "faceImage"]
+            self.wants_face = "faceImage" in parsed
+
+        field_conf = result.get("field_confidence", {})
+        changed = []
+        for k in self.expected:
+            value = parsed.get(k)
+            if not value:
+                continue
+            conf = field_conf.get(k, LIVE_FALLBACK_CONF) * quality_score
+            best = self.fields.get(k)
+            if best is None or conf > best["confidence"]:
+                if best is None or best["value"] != value:
+                    changed.append(k)
+                self.fields[k] = {"value": value, "confidence": round(conf, 3), "frame": frame_no}
+
+        if result.get("face") and quality_score > self.face_score:
+            self.face = result["face"]
+            self.face_media_type = result.get("face_media_type")
+            self.face_score = quality_score
+            changed.append("faceImage")
+
+        return changed
+
+    @property
+    def missing(self):
+        if self.expected is None:
+            return None
+        return [k for k in self.expected if k not in self.fields]
+
+    @property
+    def complete(self):
+        if self.expected is None or self.missing:
+            return False
+        return self.face is not None or not self.wants_face
+
+    def snapshot(self, include_face=True):
+        """include_face=False: foto wajah (base64) tidak dikirim ulang tiap frame."""
+        parsed = {k: f["value"] for k, f in self.fields.items()}
+        if self.wants_face:
+            parsed["faceImage"] = self.face if include_face and self.face else ""
+        return {
+            "detected_type": self.doc_type,
+            "parsed": parsed,
+            "field_confidence": {k: f["confidence"] for k, f in self.fields.items()},
+            "missing": self.missing,
+            "has_face": self.face is not None,
+            "face_media_type": self.face_media_type,
+        }
@@ -0,0 +1,350 @@
+"""
+Registry model berversi: lazy load, warm-up, hot-reload & rollback.
+
+Import modul ini (atau main.py) tidak me-load apa pun; YOLO / EasyOCR
+baru di-load saat pertama dipakai atau saat warm-up.
+
+Hot-reload: versi baru di-load + warm-up di background thread, lalu
+di-swap atomik. Request yang sedang jalan memegang snapshot versinya
+sendiri (pin()), jadi versi lama tetap hidup sampai request itu selesai.
+Satu versi sebelumnya disimpan di memori untuk rollback instan.
+"""
+import os
+import time
+import hashlib
+import threading
+from contextlib import contextmanager, nullcontext
+import numpy as np
+from runtime import capture
+
+PASSPORT_MODEL_PATH = os.getenv("PASSPORT_MODEL_PATH", "models/passport_model.pt")
+DL_MODEL_PATH = os.getenv("DL_MODEL_PATH", "models/dl_model.pt")
+OCR_LANGS = os.getenv("OCR_LANGS", "en").split(",")
+
+# MODEL_WARMUP=0 -> tanpa warm-up, /readyz langsung ready (cold start di request pertama)
+WARMUP_ENABLED = os.getenv("MODEL_WARMUP", "1") != "0"
+
+MODEL_NAMES = ("passport", "driving", "reader")
+DEFAULT_PATHS = {
+    "passport": PASSPORT_MODEL_PATH,
+    "driving": DL_MODEL_PATH,
+    "reader": None,
+}
+
+_locks = {name: threading.Lock() for name in MODEL_NAMES}
+_registry_lock = threading.Lock()
+_active = {}      # name -> ModelVersion
+_previous = {}    # name -> ModelVersion (untuk rollback)
+_retired = []     # versi yang sudah di-swap tapi masih dipakai request
+_reloads = {}     # name -> status reload terakhir
+_local = threading.local()
+
+_thread_config = None
+_thread_lock = threading.Lock()
+
+_warmup = {
+    "state": "pending" if WARMUP_ENABLED else "disabled",
+    "error": None,
+    "seconds": None,
+}
+_ready = threading.Event()
+if not WARMUP_ENABLED:
+    _ready.set()
+
+
+def configure_threads(cfg):
+    """Thread budget (runtime/threads.py) di-apply sekali sebelum model pertama load."""
+    global _thread_config
+    _thread_config = cfg
+
+
+def _apply_threads_once():
+    global _thread_config
+    if _thread_config is None:
+        return
+    with _thread_lock:
+        if _thread_config is None:
+            return
+        from runtime.threads import apply_thread_libraries
+        apply_thread_libraries(_thread_config)
+        _thread_config = None
+
+
+# =========================
+# VERSIONS
+# =========================
+def _file_version(path):
+    """sha256 (12 hex) isi file; file yang ditimpa di tempat dapat versi baru."""
+    h = hashlib.sha256()
+    try:
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+    except OSError:
+        return f"{os.path.basename(path)}@missing"
+    return f"{os.path.basename(path)}@{h.hexdigest()[:12]}"
+
+
+def _reader_version():
+    try:
+        import easyocr
+        lib = getattr(easyocr, "__version__", "")
+    except ImportError:
+        lib = ""
+    return f"easyocr{lib and '-' + lib}:{'+'.join(OCR_LANGS)}"
+
+
+class ModelVersion:
+    def __init__(self, name, path=None):
+        self.name = name
+        self.path = path
+        self.version = _reader_version() if name == "reader" else _file_version(path)
+        self.instance = None
+        self.loaded_at = None
+        self.load_seconds = None
+        self.in_flight = 0
+
+    def load(self):
+        _apply_threads_once()
+        start = time.perf_counter()
+        if self.name == "reader":
+            import easyocr
+            self.instance = easyocr.Reader(OCR_LANGS)
+        else:
+            from ultralytics import YOLO
+            self.instance = YOLO(self.path)
+        self.load_seconds = round(time.perf_counter() - start, 3)
+        self.loaded_at = time.time()
+        print(f"[MODELS] {self.name} {self.version} loaded in {self.load_seconds:.2f}s")
+        return self
+
+    def warm_up(self):
+        dummy = np.full((640, 640, 3), 255, dtype=np.uint8)
+        if self.name == "reader":
+            self.instance.readtext(dummy[:64, :256], detail=0)
+        else:
+            self.instance.predict(dummy, verbose=False)
+
+    def info(self):
+        return {
+            "version": self.version,
+            "path": self.path,
+            "loaded_at": self.loaded_at,
+            "load_seconds": self.load_seconds,
+            "in_flight": self.in_flight,
+        }
+
+
+def _get(name):
+    # request yang direkam / di-replay (runtime/capture.py): proxy model
+    session = capture.current()
+    if session is not None:
+        return session.model(name, lambda: _instance(name))
+    return _instance(name)
+
+
+def _instance(name):
+    pinned = getattr(_local, "snapshot", None)
+    if pinned is not None and name in pinned:
+        return pinned[name].instance
+
+    mv = _active.get(name)
+    if mv is not None:
+        return mv.instance
+
+    with _locks[name]:
+        mv = _active.get(name)
+        if mv is None:
+            mv = ModelVersion(name, DEFAULT_PATHS[name]).load()
+            with _registry_lock:
+                _active[name] = mv
+    return mv.instance
+
+
+def passport_model():
+    return _get("passport")
+
+
+def driving_model():
+    return _get("driving")
+
+
+def reader():
+    return _get("reader")
+
+
+def loaded():
+    return sorted(_active)
+
+
+def versions():
+    """Versi aktif (atau yang di-pin request ini)."""
+    pinned = getattr(_local, "snapshot", None) or {}
+    return {
+        name: (pinned.get(name) or _active.get(name)).version
+        for name in MODEL_NAMES
+        if name in pinned or name in _active
+    }
+
+
+@contextmanager
+def pin():
+    """
+    Snapshot versi aktif untuk satu request: swap di tengah request tidak
+    mengubah model yang dipakai request itu.
+    """
+    if getattr(_local, "snapshot", None) is not None:
+        yield _local.snapshot       # nested: pakai snapshot luar
+        return
+
+    # load lazy dulu supaya snapshot lengkap
+    for name in MODEL_NAMES:
+        _get(name)
+
+    with _registry_lock:
+        snapshot = dict(_active)
+        for mv in snapshot.values():
+            mv.in_flight += 1
+    _local.snapshot = snapshot
+    try:
+        yield snapshot
+    finally:
+        _local.snapshot = None
+        with _registry_lock:
+            for mv in snapshot.values():
+                mv.in_flight -= 1
+            _retired[:] = [mv for mv in _retired if mv.in_flight > 0]
+
+
+# =========================
+# HOT-RELOAD / ROLLBACK
+# =========================
+def _swap(name, new):
+    with _registry_lock:
+        old = _active.get(name)
+        _active[name] = new
+        dropped = _previous.get(name)
+        if old is not None:
+            _previous[name] = old
+        # versi yang keluar dari slot rollback dilepas; kalau masih ada
+        # request yang memegangnya, referensinya hidup sampai request selesai
+        for mv in (old, dropped):
+            if mv is not None and mv.in_flight > 0 and mv not in _retired:
+                _retired.append(mv)
+    return old
+
+
+def _do_reload(name, path):
+    status = _reloads[name]
+    try:
+        mv = ModelVersion(name, path).load()
+        status["state"] = "warming"
+        mv.warm_up()
+        old = _swap(name, mv)
+        status.update(state="done", version=mv.version, replaced=old.version if old else None)
+    except Exception as e:
+        status.update(state="failed", error=str(e))
+        print(f"[MODELS] reload {name} gagal: {e}")
+    finally:
+        status["finished_at"] = time.time()
+
+
+def reload(name, path=None):
+    """
+    Load + warm-up versi baru di background, lalu swap atomik.
+    path None -> path yang sama (mis. file .pt ditimpa hasil training baru).
+    """
+    if name not in MODEL_NAMES:
+        raise ValueError(f"unknown model: {name}")
+    if name == "reader":
+        path = None
+    else:
+        path = path or (_active[name].path if name in _active else DEFAULT_PATHS[name])
+        if not os.path.exists(path):
+            raise ValueError(f"model file not found: {path}")
+
+    with _registry_lock:
+        current = _reloads.get(name)
+        if current and current["state"] in ("loading", "warming"):
+            raise RuntimeError(f"reload {name} masih berjalan")
+        _reloads[name] = {"state": "loading", "path": path, "started_at": time.time(), "error": None}
+
+    threading.Thread(target=_do_reload, args=(name, path), name=f"reload-{name}", daemon=True).start()
+    return dict(_reloads[name])
+
+
+def rollback(name):
+    """Kembali ke versi sebelumnya (masih di memori). Returns versi yang aktif sekarang."""
+    if name not in MODEL_NAMES:
+        raise ValueError(f"unknown model: {name}")
+    with _registry_lock:
+        prev = _previous.get(name)
+        if prev is None:
+            raise RuntimeError(f"tidak ada versi sebelumnya untuk {name}")
+        current = _active[name]
+        _active[name], _previous[name] = prev, current
+        if current.in_flight > 0 and current not in _retired:
+            _retired.append(current)
+    print(f"[MODELS] rollback {name}: {current.version} -> {prev.version}")
+    return prev.version
+
+
+# =========================
+# WARM-UP
+# =========================
+def warm_up(lock=None):
+    """
+    Load semua model + dummy inference (JIT / graph warm-up).
+    lock: lock pipeline, supaya warm-up tidak bentrok dengan request.
+    """
+    if not WARMUP_ENABLED:
+        return
+
+    _warmup["state"] = "running"
+    start = time.perf_counter()
+    try:
+        dummy = np.full((640, 640, 3), 255, dtype=np.uint8)
+        with lock or nullcontext():
+            passport_model().predict(dummy, verbose=False)
+            driving_model().predict(dummy, verbose=False)
+            reader().readtext(dummy[:64, :256], detail=0)
+
+        _warmup["state"] = "done"
+        _ready.set()
+    except Exception as e:
+        _warmup["state"] = "failed"
+        _warmup["error"] = str(e)
+        print(f"[MODELS] warm-up gagal: {e}")
+    finally:
+        _warmup["seconds"] = round(time.perf_counter() - start, 3)
+
+
+def start_warmup(lock=None):
+    t = threading.Thread(target=warm_up, args=(lock,), name="model-warmup", daemon=True)
+    t.start()
+    return t
+
+
+def is_ready():
+    return _ready.is_set()
+
+
+def status():
+    with _registry_lock:
+        registry = {
+            name: {
+                "active": _active[name].info() if name in _active else None,
+                "previous": _previous[name].info() if name in _previous else None,
+                "reload": dict(_reloads[name]) if name in _reloads else None,
+            }
+            for name in MODEL_NAMES
+        }
+        retired = [dict(mv.info(), name=mv.name) for mv in _retired]
+    return {
+        "ready": is_ready(),
+        "warmup": dict(_warmup),
+        "loaded": loaded(),
+        "versions": versions(),
+        "models": registry,
+        "retired_in_flight": retired,
+    }
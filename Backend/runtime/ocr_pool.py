@@ -0,0 +1,64 @@
+"""
+Thread pool opsional untuk OCR crop dalam satu dokumen.
+
+Tesseract (subprocess) dan sebagian besar torch melepas GIL, jadi 6-8
+crop bisa di-OCR paralel di host dengan banyak core. Hasil selalu
+dikembalikan urut input, sehingga aturan merge di processor ("first
+wins", "longest wins") tetap deterministik.
+
+EasyOCR (torch + CRAFT) tidak thread-safe dan Reader-nya dipakai bersama,
+jadi readtext() selalu lewat EASYOCR_LOCK: yang benar-benar paralel hanya
+Tesseract, crop dan preprocessing.
+
+    OCR_THREADS=0  -> sekuensial (default)
+    OCR_THREADS=4  -> maksimal 4 crop paralel per proses
+"""
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from runtime import capture
+
+OCR_THREADS = int(os.getenv("OCR_THREADS", "0"))
+
+# satu readtext pada satu waktu per proses (lihat docstring modul)
+EASYOCR_LOCK = threading.Lock()
+
+_pool = None
+_lock = threading.Lock()
+
+
+def get_pool():
+    global _pool
+    if OCR_THREADS <= 1:
+        return None
+    with _lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=OCR_THREADS, thread_name_prefix="ocr")
+    return _pool
+
+
+def readtext(reader, img, **kwargs):
+    """reader.readtext di bawah EASYOCR_LOCK; dipakai semua OCR crop."""
+    with EASYOCR_LOCK:
+        return reader.readtext(img, **kwargs)
+
+
+def map_ordered(fn, items):
+    """[fn(x) for x in items], paralel kalau pool aktif; exception pertama di-raise ulang."""
+    items = list(items)
+    pool = get_pool()
+    if pool is None or len(items) <= 1:
+        return [fn(x) for x in items]
+
+    # request yang direkam: Tesseract di thread pool ikut session-nya
+    session = capture.current()
+    if session is not None:
+        fn = capture.bind(fn, session)
+
+    futures = [pool.submit(fn, x) for x in items]
+    try:
+        return [f.result() for f in futures]
+    finally:
+        # mis. PipelineCancelled di satu crop: sisa crop yang belum mulai dibatalkan
+        for f in futures:
+            f.cancel()
@@ -0,0 +1,159 @@
+"""
+Profiling on-demand untuk SATU request (/detect?profile=1, admin saja).
+
+Sampling profiler tanpa dependency: thread sampler membaca stack thread
+request (dan thread pool OCR yang sedang menjalankan kode repo) lewat
+sys._current_frames() setiap PROFILE_INTERVAL_MS. Overhead hanya ada
+selama request yang di-profile; request lain tidak menyentuh modul ini.
+
+Output "collapsed stacks" (satu baris per stack: `a;b;c <jumlah>`),
+langsung bisa dibuka di flamegraph.pl, speedscope atau inferno. Frame
+paling atas adalah stage Budget yang sedang berjalan ([decode],
+[process_document], ...), jadi flamegraph juga terbagi per stage.
+"""
+import os
+import sys
+import time
+import uuid
+import threading
+from collections import Counter, OrderedDict
+from contextlib import contextmanager
+
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "5"))
+# kosong -> profile hanya disimpan di memori (PROFILE_KEEP terakhir)
+PROFILE_DIR = os.getenv("PROFILE_DIR", "")
+PROFILE_KEEP = int(os.getenv("PROFILE_KEEP", "32"))
+# sampler berhenti sendiri setelah ini, walaupun request belum selesai
+PROFILE_MAX_S = float(os.getenv("PROFILE_MAX_S", "120"))
+
+# thread runtime/ocr_pool ikut di-sample
+POOL_THREAD_PREFIX = "ocr"
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_profiles = OrderedDict()
+_lock = threading.Lock()
+_labels = {}
+
+
+def _label(code):
+    label = _labels.get(code)
+    if label is None:
+        path = code.co_filename
+        if path.startswith(REPO_ROOT):
+            path = os.path.relpath(path, REPO_ROOT)
+        else:
+            path = os.path.basename(path)
+        # `;` adalah pemisah frame di format collapsed
+        label = f"{code.co_name} ({path}:{code.co_firstlineno})".replace(";", ":")
+        _labels[code] = label
+    return label
+
+
+def collapse(frame):
+    """Returns (stack root -> leaf, ada frame dari repo)."""
+    labels, in_repo = [], False
+    while frame is not None:
+        code = frame.f_code
+        labels.append(_label(code))
+        in_repo = in_repo or code.co_filename.startswith(REPO_ROOT)
+        frame = frame.f_back
+    labels.reverse()
+    return labels, in_repo
+
+
+class StackSampler(threading.Thread):
+    def __init__(self, thread_id, budget=None, interval_ms=PROFILE_INTERVAL_MS):
+        super().__init__(name="profiler", daemon=True)
+        self.thread_id = thread_id
+        self.budget = budget
+        self.interval = interval_ms / 1000.0
+        self.counts = Counter()
+        self.samples = 0
+        self.started = None
+        self.duration_s = 0.0
+        self._halt = threading.Event()
+
+    def _sample(self):
+        frames = sys._current_frames()
+        stage = getattr(self.budget, "current", None) or "pipeline"
+        pool = [t.ident for t in threading.enumerate() if t.name.startswith(POOL_THREAD_PREFIX)]
+
+        for ident, root in [(self.thread_id, "request")] + [(i, "ocr_pool") for i in pool]:
+            frame = frames.get(ident)
+            if frame is None:
+                continue
+            labels, in_repo = collapse(frame)
+            if root == "ocr_pool" and not in_repo:
+                continue            # worker pool yang sedang idle
+            self.counts[";".join([f"[{stage}]", root] + labels)] += 1
+        self.samples += 1
+
+    def run(self):
+        self.started = time.perf_counter()
+        deadline = self.started + PROFILE_MAX_S
+        while not self._halt.wait(self.interval) and time.perf_counter() < deadline:
+            self._sample()
+        self.duration_s = time.perf_counter() - self.started
+
+    def stop(self):
+        self._halt.set()
+        self.join()
+
+    def folded(self):
+        return "\n".join(f"{stack} {n}" for stack, n in self.counts.most_common()) + "\n"
+
+    def top(self, n=10):
+        """Fungsi dengan self-time terbesar (leaf stack), dalam persen sample."""
+        leaves = Counter()
+        for stack, count in self.counts.items():
+            leaves[stack.rsplit(";", 1)[-1]] += count
+        total = sum(leaves.values()) or 1
+        return [{"frame": f, "self_pct": round(100.0 * c / total, 1)} for f, c in leaves.most_common(n)]
+
+
+@contextmanager
+def sample(budget=None, interval_ms=PROFILE_INTERVAL_MS):
+    """Profile thread pemanggil selama blok ini."""
+    sampler = StackSampler(threading.get_ident(), budget, interval_ms)
+    sampler.start()
+    try:
+        yield sampler
+    finally:
+        sampler.stop()
+
+
+def save(sampler, timings):
+    """Simpan profile (memori + PROFILE_DIR). Returns ringkasan untuk response."""
+    profile_id = uuid.uuid4().hex
+    folded = sampler.folded()
+    summary = {
+        "id": profile_id,
+        "format": "collapsed",
+        "interval_ms": round(sampler.interval * 1000.0, 2),
+        "samples": sampler.samples,
+        "duration_ms": round(sampler.duration_s * 1000.0, 2),
+        "timings": timings,
+        "top": sampler.top(),
+    }
+
+    with _lock:
+        _profiles[profile_id] = (folded, summary)
+        while len(_profiles) > PROFILE_KEEP:
+            _profiles.popitem(last=False)
+
+    if PROFILE_DIR:
+        try:
+            os.makedirs(PROFILE_DIR, exist_ok=True)
+            path = os.path.join(PROFILE_DIR, f"{profile_id}.folded")
+            with open(path, "w") as f:
+                f.write(folded)
+            summary["path"] = path
+        except OSError as e:
+            print(f"[PROFILE] gagal menulis {profile_id}: {e}")
+    return summary
+
+
+def get(profile_id):
+    """(collapsed stacks, ringkasan) atau None."""
+    with _lock:
+        return _profiles.get(profile_id)
@@ -0,0 +1,150 @@
+"""
+Encoding response /detect: format dinegosiasi lewat Accept, kompresi
+lewat Accept-Encoding.
+
+  Accept: application/json      -> orjson (fallback json)
+  Accept: application/msgpack   -> msgpack, foto wajah sebagai bytes mentah
+  Accept: multipart/mixed       -> part JSON + part gambar wajah
+
+orjson / msgpack / brotli opsional; kalau tidak ter-install, format
+tersebut tidak ditawarkan.
+"""
+import gzip
+import json
+import uuid
+import base64
+
+from fastapi.responses import Response
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+MSGPACK_TYPES = ("application/msgpack", "application/x-msgpack", "application/vnd.msgpack")
+MIN_COMPRESS_BYTES = 1024
+
+
+def parse_accept(header):
+    """
+    Header Accept / Accept-Encoding -> [value, ...] urut q menurun (urutan
+    asli untuk q sama); value dengan q=0 ("tidak boleh") dibuang.
+    """
+    items = []
+    for i, item in enumerate((header or "").split(",")):
+        value, *params = [p.strip() for p in item.split(";")]
+        if not value:
+            continue
+        q = 1.0
+        for param in params:
+            name, _, raw = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(raw)
+                except ValueError:
+                    q = 0.0
+        if q > 0:
+            items.append((-q, i, value.lower()))
+    return [value for _, _, value in sorted(items)]
+
+
+def negotiate_format(accept):
+    for media in parse_accept(accept):
+        if media in MSGPACK_TYPES and msgpack is not None:
+            return "msgpack"
+        if media == "multipart/mixed":
+            return "multipart"
+        if media in ("application/json", "application/*", "*/*"):
+            return "json"
+    return "json"
+
+
+def dumps_json(payload):
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload).encode()
+
+
+def compress(body, accept_encoding):
+    """(body, content-encoding) sesuai Accept-Encoding; br > gzip > identity."""
+    if len(body) < MIN_COMPRESS_BYTES:
+        return body, None
+
+    accepted = set(parse_accept(accept_encoding))
+    if "br" in accepted and brotli is not None:
+        return brotli.compress(body, quality=4), "br"
+    if "gzip" in accepted:
+        return gzip.compress(body, compresslevel=5), "gzip"
+    return body, None
+
+
+def _with_face(result, value):
+    """Isi `face` dan `parsed.faceImage` (kalau ada) dengan value yang sama."""
+    out = dict(result)
+    out["face"] = value
+    if "faceImage" in out.get("parsed", {}):
+        out["parsed"] = dict(out["parsed"])
+        out["parsed"]["faceImage"] = value if value is not None else ""
+    return out
+
+
+def build_detect_response(result, face_bytes, request, face_mode="inline", face_url=None,
+                          face_media_type="image/jpeg"):
+    """
+    result     : hasil run_pipeline (tanpa foto wajah)
+    face_bytes : gambar wajah terenkode (lihat FACE_CODEC) atau None
+    face_mode  : inline (base64, kompatibel) | url | omit
+    face_url   : callable(bytes) -> URL, dipakai kalau face_mode == "url"
+    """
+    fmt = negotiate_format(request.headers.get("accept"))
+    headers = {"Vary": "Accept, Accept-Encoding"}
+
+    if fmt == "multipart":
+        boundary = uuid.uuid4().hex
+        payload = _with_face(result, "cid:face" if face_bytes else None)
+        parts = [
+            f"--{boundary}\r\nContent-Type: application/json\r\n\r\n".encode(),
+            dumps_json(payload),
+        ]
+        if face_bytes:
+            parts += [
+                f"\r\n--{boundary}\r\nContent-Type: {face_media_type}\r\nContent-ID: <face>\r\n\r\n".encode(),
+                face_bytes,
+            ]
+        parts.append(f"\r\n--{boundary}--\r\n".encode())
+        body = b"".join(parts)
+        media_type = f"multipart/mixed; boundary={boundary}"
+
+    else:
+        if face_bytes is None or face_mode == "omit":
+            face_value = None
+        elif face_mode == "url" and face_url is not None:
+            face_value = face_url(face_bytes)
+        elif fmt == "msgpack":
+            face_value = face_bytes          # bin msgpack, tanpa base64
+        else:
+            face_value = base64.b64encode(face_bytes).decode("ascii")
+
+        payload = _with_face(result, face_value)
+        if fmt == "msgpack":
+            body = msgpack.packb(payload, use_bin_type=True)
+            media_type = "application/msgpack"
+        else:
+            body = dumps_json(payload)
+            media_type = "application/json"
+
+    body, encoding = compress(body, request.headers.get("accept-encoding"))
+    if encoding:
+        headers["Content-Encoding"] = encoding
+
+    return Response(content=body, media_type=media_type, headers=headers)
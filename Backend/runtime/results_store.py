@@ -0,0 +1,264 @@
+"""
+Penyimpanan hasil parsing (opsional) untuk audit & cek identitas ganda,
+tanpa OCR ulang arsip gambar.
+
+    RESULTS_STORE=sqlite:///results.sqlite3   (relatif; sqlite:////abs/path, kosong = mati)
+
+Request path hanya memasukkan record ke queue; thread writer menulis
+per batch. Backend lain cukup implement ResultStore dan didaftarkan di
+BACKENDS.
+"""
+import os
+import abc
+import json
+import time
+import uuid
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+RESULTS_STORE = os.getenv("RESULTS_STORE", "")
+RESULTS_BATCH_SIZE = int(os.getenv("RESULTS_BATCH_SIZE", "50"))
+RESULTS_FLUSH_S = float(os.getenv("RESULTS_FLUSH_S", "1.0"))
+# queue penuh -> record di-drop (dihitung), request tidak pernah menunggu disk
+RESULTS_QUEUE_MAX = int(os.getenv("RESULTS_QUEUE_MAX", "10000"))
+
+# kolom terindeks, diambil dari parsed DL / paspor
+NAME_FIELDS = {
+    "first_name": ("firstName", "givenNames"),
+    "last_name": ("lastName", "surname"),
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    id              TEXT PRIMARY KEY,
+    created_at      REAL NOT NULL,
+    source          TEXT,
+    doc_type        TEXT,
+    license_number  TEXT,
+    passport_number TEXT,
+    dob             TEXT,
+    first_name      TEXT,
+    last_name       TEXT,
+    state           TEXT,
+    parsed          TEXT NOT NULL,
+    model_versions  TEXT,
+    timings         TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_results_license ON results (license_number);
+CREATE INDEX IF NOT EXISTS idx_results_passport ON results (passport_number);
+CREATE INDEX IF NOT EXISTS idx_results_dob ON results (dob);
+CREATE INDEX IF NOT EXISTS idx_results_name ON results (last_name, first_name);
+"""
+
+COLUMNS = ("id", "created_at", "source", "doc_type", "license_number", "passport_number",
+           "dob", "first_name", "last_name", "state", "parsed", "model_versions", "timings")
+
+QUERY_FIELDS = ("license_number", "passport_number", "dob", "first_name", "last_name", "doc_type")
+
+
+def _norm(value):
+    return " ".join(str(value or "").upper().split()) or None
+
+
+def to_record(result, source, model_versions=None):
+    """Hasil run_pipeline -> dict kolom. Foto wajah tidak disimpan."""
+    parsed = {k: v for k, v in result.get("parsed", {}).items() if k != "faceImage"}
+    record = {
+        "id": uuid.uuid4().hex,
+        "created_at": time.time(),
+        "source": source,
+        "doc_type": result.get("detected_type"),
+        "license_number": _norm(parsed.get("licenseNumber")),
+        "passport_number": _norm(parsed.get("passportNumber")),
+        "dob": _norm(parsed.get("dateOfBirth")),
+        "state": _norm(parsed.get("StateName")),
+        "parsed": parsed,
+        "model_versions": model_versions or result.get("model_versions"),
+        "timings": result.get("timings"),
+    }
+    for col, keys in NAME_FIELDS.items():
+        record[col] = next((_norm(parsed[k]) for k in keys if parsed.get(k)), None)
+    return record
+
+
+class ResultStore(abc.ABC):
+    """Interface backend."""
+
+    @abc.abstractmethod
+    def write_batch(self, records):
+        """Tulis list record (hasil to_record) dalam satu batch."""
+
+    @abc.abstractmethod
+    def query(self, limit=50, **filters):
+        """Record terbaru yang cocok dengan filter QUERY_FIELDS."""
+
+    @abc.abstractmethod
+    def get(self, result_id):
+        """Satu record by id, None kalau tidak ada."""
+
+
+class SQLiteResultStore(ResultStore):
+    def __init__(self, path):
+        self.path = path
+        with self._db() as db:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.executescript(SCHEMA)
+
+    @contextmanager
+    def _db(self):
+        db = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        db.row_factory = sqlite3.Row
+        try:
+            yield db
+        finally:
+            db.close()
+
+    def write_batch(self, records):
+        rows = [
+            tuple(
+                json.dumps(r[c]) if c in ("parsed", "model_versions", "timings") else r[c]
+                for c in COLUMNS
+            )
+            for r in records
+        ]
+        with self._db() as db:
+            db.execute("BEGIN")
+            db.executemany(
+                f"INSERT INTO results ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})",
+                rows
+            )
+            db.execute("COMMIT")
+
+    @staticmethod
+    def _row(row):
+        out = dict(row)
+        for c in ("parsed", "model_versions", "timings"):
+            out[c] = json.loads(out[c]) if out[c] else None
+        return out
+
+    def query(self, limit=50, **filters):
+        where, args = [], []
+        for col in QUERY_FIELDS:
+            if filters.get(col):
+                where.append(f"{col} = ?")
+                args.append(filters[col] if col == "doc_type" else _norm(filters[col]))
+        sql = "SELECT * FROM results"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY created_at DESC LIMIT ?"
+        with self._db() as db:
+            rows = db.execute(sql, args + [limit]).fetchall()
+        return [self._row(r) for r in rows]
+
+    def get(self, result_id):
+        with self._db() as db:
+            row = db.execute("SELECT * FROM results WHERE id = ?", (result_id,)).fetchone()
+        return self._row(row) if row is not None else None
+
+
+BACKENDS = {
+    "sqlite": lambda target: SQLiteResultStore(target or "results.sqlite3"),
+}
+
+
+def open_store(url=RESULTS_STORE):
+    """'sqlite:///path' / 'sqlite:path' / path .sqlite3 -> store, '' -> None."""
+    if not url:
+        return None
+    scheme, sep, target = url.partition(":")
+    if not sep or scheme not in BACKENDS:
+        scheme, target = "sqlite", url
+    return BACKENDS[scheme](target[3:] if target.startswith("///") else target)
+
+
+# =========================
+# BACKGROUND WRITER
+# =========================
+class ResultWriter(threading.Thread):
+    def __init__(self, store, batch_size=RESULTS_BATCH_SIZE, flush_s=RESULTS_FLUSH_S,
+                 max_queue=RESULTS_QUEUE_MAX):
+        super().__init__(name="results-writer", daemon=True)
+        self.store = store
+        self.batch_size = batch_size
+        self.flush_s = flush_s
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._halt = threading.Event()
+        self.stats = {"queued": 0, "written": 0, "dropped": 0, "errors": 0}
+
+    def submit(self, record):
+        try:
+            self._queue.put_nowait(record)
+            self.stats["queued"] += 1
+        except queue.Full:
+            self.stats["dropped"] += 1
+
+    def _drain(self, first):
+        batch = [first]
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        try:
+            self.store.write_batch(batch)
+            self.stats["written"] += len(batch)
+        except Exception as e:
+            self.stats["errors"] += 1
+            print(f"[RESULTS] gagal menulis {len(batch)} record: {e}")
+
+    def run(self):
+        while not (self._halt.is_set() and self._queue.empty()):
+            try:
+                first = self._queue.get(timeout=self.flush_s)
+            except queue.Empty:
+                continue
+            self._drain(first)
+
+    def stop(self, timeout=5.0):
+        self._halt.set()
+        self.join(timeout)
+
+
+_store = None
+_writer = None
+_lock = threading.Lock()
+
+
+def get_store():
+    global _store
+    with _lock:
+        if _store is None:
+            _store = open_store()
+    return _store
+
+
+def start_writer():
+    global _writer
+    store = get_store()
+    if store is None:
+        return None
+    with _lock:
+        if _writer is None:
+            _writer = ResultWriter(store)
+            _writer.start()
+    return _writer
+
+
+def stop_writer():
+    if _writer is not None:
+        _writer.stop()
+
+
+def record(result, source, model_versions=None):
+    """Dipanggil dari request path: non-blocking, no-op kalau store mati."""
+    if _writer is None or not result.get("success"):
+        return
+    _writer.submit(to_record(result, source, model_versions))
+
+
+def stats():
+    if _writer is None:
+        return {"enabled": False}
+    return dict(_writer.stats, enabled=True, pending=_writer._queue.qsize())
@@ -0,0 +1,168 @@
+"""
+Pool buffer shared memory untuk hand-off gambar API -> proses inference.
+
+Proses API men-decode upload langsung ke satu slot (konversi warna
+ditulis ke shared memory, tanpa salinan tambahan), worker hanya menerima
+FrameHandle (nama segment, shape, dtype, ...) dan membaca image_rgb / gray
+sebagai view ndarray zero-copy. Tidak ada pickling array puluhan MB.
+
+Layout satu slot:  [ rgb HxWx3 | gray HxW | file asli (untuk crop full-res) ]
+
+- slot dipakai ulang, segment tidak dibuat ulang per request
+- slot di-refcount: acquire = 1 referensi (sisi API), incref saat frame
+  diserahkan ke worker (referensi sisi worker, dilepas proses API begitu
+  hasil worker datang atau worker dinyatakan mati). Slot baru kembali ke
+  pool setelah SEMUA referensi di-release, jadi request yang dibatalkan di
+  sisi API tidak membebaskan slot yang masih dibaca worker
+- jumlah slot (SHM_SLOTS) = batas request yang sedang di-hand-off;
+  kalau habis, acquire menunggu SHM_ACQUIRE_TIMEOUT_S lalu PoolExhausted
+  (backpressure, API membalas 503 + Retry-After)
+"""
+import os
+import threading
+from collections import namedtuple
+from multiprocessing import shared_memory
+import numpy as np
+from processors.image_io import decode_image, HiResSource
+
+SHM_SLOTS = int(os.getenv("SHM_SLOTS", "4"))
+SHM_SLOT_MB = int(os.getenv("SHM_SLOT_MB", "32"))
+SHM_ACQUIRE_TIMEOUT_S = float(os.getenv("SHM_ACQUIRE_TIMEOUT_S", "1"))
+
+FrameHandle = namedtuple("FrameHandle", "name shape dtype factor file_len")
+
+
+class PoolExhausted(Exception):
+    """Semua slot sedang dipakai (backpressure)."""
+
+
+class SlotTooSmall(Exception):
+    """Gambar + file asli tidak muat di satu slot (SHM_SLOT_MB)."""
+
+
+def frame_views(buf, shape, file_len, dtype="uint8"):
+    """(rgb, gray, file) sebagai view ke buffer slot."""
+    h, w = shape[:2]
+    dt = np.dtype(dtype)
+    rgb = np.ndarray((h, w, 3), dt, buffer=buf, offset=0)
+    gray = np.ndarray((h, w), dt, buffer=buf, offset=rgb.nbytes)
+    data = np.ndarray((file_len,), np.uint8, buffer=buf, offset=rgb.nbytes + gray.nbytes)
+    return rgb, gray, data
+
+
+class ShmPool:
+    def __init__(self, slots=SHM_SLOTS, slot_bytes=SHM_SLOT_MB << 20):
+        self.slot_bytes = slot_bytes
+        self._segments = [None] * slots      # dibuat lazy, lalu dipakai ulang
+        self._free = list(range(slots))
+        self._refs = {}                      # slot dipakai -> jumlah referensi
+        self._by_name = {}                   # nama segment -> slot
+        self._cond = threading.Condition()
+        self.stats = {"acquired": 0, "exhausted": 0, "too_small": 0}
+
+    def _segment(self, slot):
+        seg = self._segments[slot]
+        if seg is None:
+            seg = shared_memory.SharedMemory(create=True, size=self.slot_bytes)
+            self._segments[slot] = seg
+            self._by_name[seg.name] = slot
+        return seg
+
+    def acquire(self, timeout=SHM_ACQUIRE_TIMEOUT_S):
+        """Returns nomor slot; PoolExhausted kalau tidak ada yang bebas."""
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._free, timeout):
+                self.stats["exhausted"] += 1
+                raise PoolExhausted()
+            slot = self._free.pop()
+            self._refs[slot] = 1
+            self.stats["acquired"] += 1
+        return slot
+
+    def incref(self, handle):
+        """Tambah satu referensi ke slot handle (mis. sebelum diserahkan ke worker)."""
+        slot = self._by_name[handle.name]
+        with self._cond:
+            if slot not in self._refs:
+                raise ValueError(f"slot {slot} sudah bebas")
+            self._refs[slot] += 1
+
+    def release(self, handle):
+        """Lepas satu referensi; slot bebas lagi kalau referensinya habis."""
+        self._release_slot(self._by_name[handle.name])
+
+    def _release_slot(self, slot):
+        with self._cond:
+            refs = self._refs.get(slot)
+            if refs is None:
+                return
+            if refs > 1:
+                self._refs[slot] = refs - 1
+                return
+            del self._refs[slot]
+            self._free.append(slot)
+            self._cond.notify()
+
+    def refs(self, handle):
+        with self._cond:
+            return self._refs.get(self._by_name[handle.name], 0)
+
+    def decode(self, buf):
+        """
+        Decode upload langsung ke slot bebas. Returns FrameHandle, atau None
+        kalau bukan gambar. Handle membawa satu referensi: pemanggil wajib
+        release(handle) setelah selesai.
+        """
+        if not isinstance(buf, np.ndarray):
+            buf = np.frombuffer(buf, np.uint8)
+        slot = self.acquire()
+        try:
+            seg = self._segment(slot)
+
+            def alloc(h, w):
+                if h * w * 4 + buf.nbytes > self.slot_bytes:
+                    self.stats["too_small"] += 1
+                    raise SlotTooSmall(f"{w}x{h} + {buf.nbytes} B > {self.slot_bytes} B")
+                rgb, gray, _ = frame_views(seg.buf, (h, w), buf.nbytes)
+                return rgb, gray
+
+            img_rgb, _, hires = decode_image(buf, alloc=alloc)
+            if img_rgb is None:
+                self._release_slot(slot)
+                return None
+            frame_views(seg.buf, img_rgb.shape, buf.nbytes)[2][:] = buf
+            return FrameHandle(seg.name, img_rgb.shape, str(img_rgb.dtype), hires.factor, buf.nbytes)
+        except BaseException:
+            self._release_slot(slot)
+            raise
+
+    def in_use(self):
+        with self._cond:
+            return len(self._refs)
+
+    def status(self):
+        return dict(self.stats, slots=len(self._segments), in_use=self.in_use(),
+                    slot_mb=self.slot_bytes >> 20)
+
+    def close(self):
+        for seg in self._segments:
+            if seg is not None:
+                seg.close()
+                seg.unlink()
+        self._segments = [None] * len(self._segments)
+
+
+# =========================
+# SISI WORKER
+# =========================
+# segment dibuka sekali per proses; nama slot tetap, jadi cache tidak tumbuh
+_attached = {}
+
+
+def attach(handle):
+    """Returns (image_rgb, gray, hires) sebagai view zero-copy ke slot."""
+    seg = _attached.get(handle.name)
+    if seg is None:
+        seg = _attached[handle.name] = shared_memory.SharedMemory(name=handle.name)
+    rgb, gray, data = frame_views(seg.buf, handle.shape, handle.file_len, handle.dtype)
+    return rgb, gray, HiResSource(data, handle.factor)
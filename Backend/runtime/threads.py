@@ -0,0 +1,95 @@
+"""
+Thread budget per worker untuk torch (YOLO + EasyOCR), OpenCV dan Tesseract.
+
+Urutan prioritas:
+  1. env var (TORCH_INTRA_THREADS, TORCH_INTEROP_THREADS, CV2_THREADS,
+     TESSERACT_OMP_THREADS)
+  2. file JSON hasil autotuner (THREAD_CONFIG, default runtime/thread_config.json)
+  3. default: cpu_count / WEB_CONCURRENCY
+
+OMP_NUM_THREADS, MKL_NUM_THREADS dan OMP_THREAD_LIMIT dari environment
+selalu menang (setdefault), mis. limit dari container / orchestrator.
+
+PENTING: apply_thread_env() harus dipanggil SEBELUM import torch / cv2,
+karena runtime OpenMP membaca env hanya sekali saat load.
+"""
+import os
+import json
+
+CONFIG_PATH = os.getenv(
+    "THREAD_CONFIG",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "thread_config.json")
+)
+
+KEYS = ("torch_intra", "torch_interop", "cv2", "tesseract_omp")
+
+
+def default_config():
+    workers = max(1, int(os.getenv("WEB_CONCURRENCY", "1")))
+    per_worker = max(1, (os.cpu_count() or 1) // workers)
+    return {
+        "torch_intra": per_worker,
+        "torch_interop": 1,
+        "cv2": per_worker,
+        # Tesseract dipanggil per crop kecil, multi-thread justru lebih lambat
+        "tesseract_omp": 1,
+    }
+
+
+def load_config(path=CONFIG_PATH):
+    cfg = default_config()
+
+    if path and os.path.exists(path):
+        with open(path) as f:
+            saved = json.load(f)
+        cfg.update({k: int(saved[k]) for k in KEYS if k in saved})
+
+    env_map = {
+        "torch_intra": "TORCH_INTRA_THREADS",
+        "torch_interop": "TORCH_INTEROP_THREADS",
+        "cv2": "CV2_THREADS",
+        "tesseract_omp": "TESSERACT_OMP_THREADS",
+    }
+    for key, env in env_map.items():
+        if os.getenv(env):
+            cfg[key] = int(os.getenv(env))
+
+    return cfg
+
+
+def save_config(cfg, path=CONFIG_PATH):
+    with open(path, "w") as f:
+        json.dump({k: cfg[k] for k in KEYS}, f, indent=2)
+
+
+def apply_thread_env(cfg=None):
+    """
+    Set env OpenMP/MKL. Panggil sebelum import torch / cv2.
+    OMP_NUM_THREADS / MKL_NUM_THREADS yang sudah di-set operator tidak ditimpa.
+    """
+    cfg = cfg or load_config()
+
+    os.environ.setdefault("OMP_NUM_THREADS", str(cfg["torch_intra"]))
+    os.environ.setdefault("MKL_NUM_THREADS", str(cfg["torch_intra"]))
+    return cfg
+
+
+def apply_thread_libraries(cfg):
+    """Set thread pool torch & OpenCV (setelah import)."""
+    import cv2
+    import torch
+
+    cv2.setNumThreads(cfg["cv2"])
+    torch.set_num_threads(cfg["torch_intra"])
+    try:
+        # hanya bisa di-set sekali, sebelum ada kerja inter-op
+        torch.set_num_interop_threads(cfg["torch_interop"])
+    except RuntimeError:
+        pass
+
+    # pytesseract menjalankan binary tesseract sebagai subprocess yang
+    # mewarisi env ini; torch sudah load jadi tidak ikut terpengaruh
+    os.environ.setdefault("OMP_THREAD_LIMIT", str(cfg["tesseract_omp"]))
+
+    print(f"[THREADS] {cfg}")
+    return cfg
@@ -0,0 +1,121 @@
+import threading
+import time
+
+import pytest
+
+from runtime import admission
+from runtime.admission import AdmissionController, Rejected, client_key
+
+
+def test_token_bucket_rate_limits_and_refills(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(admission.time, "monotonic", lambda: now[0])
+    ctl = AdmissionController(clients={"k": {"rate": 2, "burst": 3, "max_concurrent": 10}})
+
+    for _ in range(3):
+        ctl.release(ctl.admit("key:k"))
+    with pytest.raises(Rejected) as e:
+        ctl.admit("key:k")
+    assert e.value.reason == "rate_limited" and e.value.retry_after == 1
+
+    # 0.5 detik x 2/detik = 1 token
+    now[0] += 0.5
+    ctl.release(ctl.admit("key:k"))
+    with pytest.raises(Rejected):
+        ctl.admit("key:k")
+    assert ctl.stats["admitted"] == 4 and ctl.stats["rate_limited"] == 2
+
+
+def test_concurrency_limit_per_client():
+    ctl = AdmissionController(clients={"k": {"max_concurrent": 2}})
+    a, b = ctl.admit("key:k"), ctl.admit("key:k")
+    with pytest.raises(Rejected) as e:
+        ctl.admit("key:k")
+    assert e.value.reason == "concurrency_limited"
+    # client lain tidak terpengaruh
+    ctl.release(ctl.admit("ip:1.2.3.4"))
+    ctl.release(a)
+    ctl.release(a)          # release dua kali tidak mengurangi dua kali
+    ctl.release(ctl.admit("key:k"))
+    ctl.release(b)
+
+
+def wait_until(cond, timeout=5):
+    deadline = time.time() + timeout
+    while not cond():
+        assert time.time() < deadline
+        time.sleep(0.005)
+
+
+def test_wfq_weighted_order():
+    ctl = AdmissionController(slots=1, clients={"bulk": {"weight": 1}, "app": {"weight": 4}})
+    order = []
+    gate = threading.Event()
+
+    def run(key, name):
+        ticket = ctl.admit(key)
+        with ctl.turn(ticket):
+            order.append(name)
+            if name == "holder":
+                gate.wait(5)
+        ctl.release(ticket)
+
+    threads = []
+    # holder memegang satu-satunya slot; sisanya antri dengan urutan datang tetap
+    for key, name in [("ip:h", "holder"), ("key:bulk", "b1"), ("key:bulk", "b2"),
+                      ("key:bulk", "b3"), ("key:app", "a1"), ("key:app", "a2")]:
+        t = threading.Thread(target=run, args=(key, name))
+        t.start()
+        threads.append(t)
+        if name == "holder":
+            wait_until(lambda: order)
+        else:
+            wait_until(lambda: len(ctl._waiting) == len(threads) - 1)
+
+    gate.set()
+    for t in threads:
+        t.join(5)
+    # app (weight 4) datang belakangan tapi finish tag-nya lebih kecil
+    assert order == ["holder", "a1", "a2", "b1", "b2", "b3"]
+
+
+def test_turn_cancelled_by_budget_leaves_queue():
+    ctl = AdmissionController(slots=1)
+
+    class Expired(Exception):
+        pass
+
+    class Budget:
+        def check(self):
+            raise Expired()
+
+    holder = ctl.admit("ip:a")
+    waiter = ctl.admit("ip:b")
+    with ctl.turn(holder):
+        with pytest.raises(Expired):
+            with ctl.turn(waiter, Budget()):
+                pass
+    ctl.release(waiter)
+    # antrian bersih: request berikutnya langsung jalan
+    nxt = ctl.admit("ip:c")
+    with ctl.turn(nxt):
+        assert ctl.status()["running"] == 1
+    assert ctl.status()["waiting"] == 0
+
+
+def test_client_key_ignores_unknown_api_keys(monkeypatch):
+    monkeypatch.setattr(admission, "ADMIT_TRUST_FORWARDED", False)
+    headers = {"x-api-key": "random", "x-forwarded-for": "9.9.9.9"}
+    assert client_key(headers, "1.2.3.4", {"mobile-app": {}}) == "ip:1.2.3.4"
+    assert client_key({"x-api-key": "mobile-app"}, "1.2.3.4", {"mobile-app": {}}) == "key:mobile-app"
+    assert client_key({}, None) == "ip:unknown"
+    monkeypatch.setattr(admission, "ADMIT_TRUST_FORWARDED", True)
+    assert client_key({"x-forwarded-for": "9.9.9.9, 10.0.0.1"}, "1.2.3.4") == "ip:9.9.9.9"
+
+
+def test_untrusted_proxy_warns_once(monkeypatch, capsys):
+    monkeypatch.setattr(admission, "ADMIT_TRUST_FORWARDED", False)
+    monkeypatch.setattr(admission, "_proxy_warned", False)
+    for ip in ("9.9.9.9", "8.8.8.8"):
+        assert client_key({"x-forwarded-for": ip}, "10.0.0.1") == "ip:10.0.0.1"
+    assert capsys.readouterr().out.count("ADMIT_TRUST_FORWARDED") == 1
@@ -0,0 +1,70 @@
+import numpy as np
+
+from processors.boxes import select_candidates, crop_box, boxes_to_numpy
+
+NAMES = {0: "address", 1: "firstName", 2: "lastName", 3: "signature"}
+FIELDS = ["firstName", "lastName", "address"]
+
+
+def dets(rows):
+    """rows: (x1, y1, x2, y2, conf, cls)"""
+    a = np.array(rows, dtype=np.float32).reshape(-1, 6)
+    return a[:, :4].astype(np.int32), a[:, 4], a[:, 5].astype(np.int32)
+
+
+def test_candidates_sorted_limited_and_filtered():
+    xyxy, conf, cls = dets([
+        (0, 0, 10, 10, 0.4, 1),
+        (20, 0, 30, 10, 0.9, 1),
+        (40, 0, 50, 10, 0.6, 1),
+        (0, 50, 10, 60, 0.8, 3),
+        (0, 20, 10, 30, 0.7, 2),
+    ])
+    out = select_candidates(xyxy, conf, cls, NAMES, FIELDS, limit=2)
+    # class di luar fields dibuang, class tanpa box tidak muncul
+    assert list(out) == ["firstName", "lastName"]
+    assert [c for c, _ in out["firstName"]] == [np.float32(0.9), np.float32(0.6)]
+    assert out["firstName"][0][1] == (20, 0, 30, 10)
+    assert all(isinstance(v, int) for v in out["firstName"][0][1])
+    assert len(out["lastName"]) == 1
+
+
+def test_ties_keep_detection_order():
+    xyxy, conf, cls = dets([(0, 0, 1, 1, 0.5, 1), (5, 5, 6, 6, 0.5, 1)])
+    out = select_candidates(xyxy, conf, cls, NAMES, FIELDS, limit=2)
+    assert [b for _, b in out["firstName"]] == [(0, 0, 1, 1), (5, 5, 6, 6)]
+
+
+def test_merge_classes_union_touching_boxes():
+    xyxy, conf, cls = dets([
+        (10, 100, 200, 120, 0.7, 0),
+        (10, 122, 180, 140, 0.9, 0),   # baris kedua, jarak 2px < MERGE_PAD
+        (300, 300, 400, 320, 0.5, 0),  # jauh -> kandidat sendiri
+    ])
+    out = select_candidates(xyxy, conf, cls, NAMES, FIELDS, merge_classes={"address"}, limit=3)
+    assert out["address"] == [(np.float32(0.9), (10, 100, 200, 140)), (np.float32(0.5), (300, 300, 400, 320))]
+
+    # tanpa merge_classes: box terpisah
+    out = select_candidates(xyxy, conf, cls, NAMES, FIELDS, limit=3)
+    assert len(out["address"]) == 3
+
+
+def test_empty_detections():
+    xyxy, conf, cls = boxes_to_numpy(None)
+    assert xyxy.shape == (0, 4)
+    assert select_candidates(xyxy, conf, cls, NAMES, FIELDS) == {}
+
+
+def test_crop_box_clips_to_image():
+    img = np.arange(20 * 30 * 3, dtype=np.uint8).reshape(20, 30, 3)
+    assert crop_box(img, (-5, -5, 10, 8)).shape == (8, 10, 3)
+    assert crop_box(img, (25, 15, 40, 40)).shape == (5, 5, 3)
+    assert crop_box(img, (40, 40, 50, 50)).size == 0
+
+
+def test_unlimited_classes_keep_every_candidate():
+    xyxy, conf, cls = dets([(i * 10, 0, i * 10 + 5, 5, 0.9 - i * 0.1, 1) for i in range(4)]
+                           + [(i * 10, 20, i * 10 + 5, 25, 0.9 - i * 0.1, 2) for i in range(4)])
+    out = select_candidates(xyxy, conf, cls, NAMES, FIELDS, limit=2, unlimited={"firstName"})
+    assert len(out["firstName"]) == 4
+    assert len(out["lastName"]) == 2
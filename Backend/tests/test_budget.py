@@ -0,0 +1,79 @@
+import time
+
+import pytest
+
+from runtime.budget import Budget, PipelineCancelled
+
+
+def test_no_deadline_allows_everything():
+    budget = Budget()
+    assert budget.remaining_ms() == float("inf")
+    assert budget.allow("face")
+    assert not budget.partial
+
+
+def test_expired_deadline_skips_optional_stage_once():
+    budget = Budget(deadline_ms=1)
+    time.sleep(0.005)
+    assert budget.expired()
+    assert not budget.allow("face")
+    assert not budget.allow("face")
+    assert budget.skipped == ["face"]
+    assert budget.partial
+
+
+def test_min_ms_reserves_time():
+    budget = Budget(deadline_ms=10_000)
+    assert budget.allow("fallback", min_ms=100)
+    assert not budget.allow("fallback", min_ms=60_000)
+    assert budget.skipped == ["fallback"]
+
+
+def test_denied_stage_is_not_reported_as_skipped():
+    budget = Budget()
+    budget.denied.add("tesseract_retry")
+    assert not budget.allow("tesseract_retry")
+    assert budget.skipped == []
+    assert not budget.partial
+
+
+def test_cancel_raises_on_check_and_allow():
+    budget = Budget()
+    budget.check()
+    budget.cancel()
+    with pytest.raises(PipelineCancelled):
+        budget.check()
+    with pytest.raises(PipelineCancelled):
+        budget.allow("face")
+
+
+def test_stage_timings_accumulate_and_track_current():
+    budget = Budget()
+    with budget.stage("ocr"):
+        assert budget.current == "ocr"
+        with budget.stage("tesseract"):
+            assert budget.current == "tesseract"
+        assert budget.current == "ocr"
+    with budget.stage("ocr"):
+        time.sleep(0.002)
+    assert budget.current is None
+    assert set(budget.timings) == {"ocr", "tesseract"}
+    assert budget.timings["ocr"] >= 2.0
+
+
+def test_stage_records_timing_when_body_raises():
+    budget = Budget()
+    with pytest.raises(ValueError):
+        with budget.stage("decode"):
+            raise ValueError()
+    assert "decode" in budget.timings
+    assert budget.current is None
+
+
+def test_timings_ms_adds_total():
+    budget = Budget()
+    with budget.stage("decode"):
+        pass
+    timings = budget.timings_ms()
+    assert "total" in timings and "total" not in budget.timings
+    assert timings["total"] >= timings["decode"]
@@ -0,0 +1,35 @@
+from runtime.burst import vote_fields, best_frame, UNSCORED_CONF
+
+
+def test_majority_by_confidence():
+    frames = [
+        ({"name": "JOHN", "dob": "01/02/1990"}, {"name": 0.9, "dob": 0.8}),
+        ({"name": "J0HN", "dob": "01/02/1990"}, {"name": 0.6, "dob": 0.7}),
+        ({"name": "J0HN", "dob": ""}, {"name": 0.5}),
+    ]
+    merged, votes = vote_fields(frames)
+    # 0.6 + 0.5 > 0.9
+    assert merged == {"name": "J0HN", "dob": "01/02/1990"}
+    assert votes["name"] == {"value": "J0HN", "frames": [1, 2], "score": 1.1}
+    assert votes["dob"]["frames"] == [0, 1]
+
+
+def test_tie_goes_to_earliest_frame():
+    frames = [({"x": "A"}, {"x": 0.5}), ({"x": "B"}, {"x": 0.5})]
+    assert vote_fields(frames)[0] == {"x": "A"}
+    assert vote_fields(frames[::-1])[0] == {"x": "B"}
+
+
+def test_unscored_and_empty_fields():
+    frames = [({"x": "A", "y": ""}, {}), ({"x": "B", "z": ""}, {"x": UNSCORED_CONF + 0.01})]
+    merged, votes = vote_fields(frames)
+    assert merged == {"x": "B", "y": "", "z": ""}
+    assert set(votes) == {"x"}
+
+
+def test_best_frame():
+    votes = {"a": {"frames": [1, 2]}, "b": {"frames": [2]}, "c": {"frames": [0]}}
+    assert best_frame(votes, 3) == 2
+    # seri -> frame paling awal
+    assert best_frame({"a": {"frames": [0, 1]}}, 2) == 0
+    assert best_frame({}, 3) == 0
@@ -0,0 +1,120 @@
+import numpy as np
+
+from runtime import dedup
+from runtime.dedup import NearDupIndex, phash, hamming, is_complete, merge_fields
+
+
+def flip(h, *bits):
+    for b in bits:
+        h ^= 1 << b
+    return h
+
+
+def test_lookup_within_distance_and_scope():
+    idx = NearDupIndex(max_distance=5, ttl_s=60, max_entries=10)
+    h = 0x0123456789ABCDEF
+    entry = idx.add("client-a", h, {"parsed": {"x": "1"}})
+
+    found, d = idx.lookup("client-a", flip(h, 0, 17, 33, 63))
+    assert found is entry and d == 4
+    # jarak 6 > max_distance
+    assert idx.lookup("client-a", flip(h, 0, 10, 20, 30, 40, 50)) == (None, None)
+    # scope lain tidak pernah melihat entry client-a
+    assert idx.lookup("client-b", h) == (None, None)
+
+
+def test_lookup_returns_closest():
+    idx = NearDupIndex(max_distance=5, ttl_s=60, max_entries=10)
+    h = 0xFFFF0000FFFF0000
+    idx.add("s", flip(h, 1, 2, 3), {})
+    near = idx.add("s", flip(h, 4), {})
+    found, d = idx.lookup("s", h)
+    assert found is near and d == 1
+
+
+def test_max_entries_evicts_oldest():
+    idx = NearDupIndex(max_distance=2, ttl_s=60, max_entries=2)
+    first = idx.add("s", 0x00000000000000FF, {})
+    idx.add("s", 0x0000FF0000000000, {})
+    idx.add("s", 0xFF00000000000000, {})
+    assert idx.stats()["entries"] == 2
+    assert idx.stats()["evictions"] == 1
+    assert idx.lookup("s", first.hash) == (None, None)
+    # bucket entry yang dibuang ikut bersih
+    assert all(first.id not in b for b in idx._buckets.values())
+
+
+def test_ttl_eviction(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(dedup.time, "time", lambda: now[0])
+    idx = NearDupIndex(max_distance=2, ttl_s=10, max_entries=10)
+    entry = idx.add("s", 42, {})
+
+    now[0] += 9
+    assert idx.lookup("s", 42)[0] is entry
+    # update memperpanjang TTL
+    idx.update(entry, {"parsed": {}})
+    now[0] += 9
+    assert idx.lookup("s", 42)[0] is entry
+    now[0] += 11
+    assert idx.lookup("s", 42) == (None, None)
+    assert idx.stats()["entries"] == 0
+
+
+def test_result_is_copied():
+    idx = NearDupIndex()
+    result = {"parsed": {"name": "A"}}
+    entry = idx.add("s", 7, result)
+    result["parsed"]["name"] = "B"
+    assert entry.result["parsed"]["name"] == "A"
+
+
+def test_phash_stable_under_small_noise():
+    rng = np.random.default_rng(0)
+    gray = rng.integers(0, 255, (240, 320), dtype=np.uint8)
+    noisy = np.clip(gray.astype(int) + rng.integers(-3, 4, gray.shape), 0, 255).astype(np.uint8)
+    assert hamming(phash(gray), phash(noisy)) <= 5
+    assert hamming(phash(gray), phash(255 - gray)) > 5
+
+
+def test_is_complete_and_merge_fields():
+    assert is_complete({"parsed": {"a": "1", "b": "2"}})
+    assert not is_complete({"parsed": {"a": "1", "b": ""}})
+    assert not is_complete({"parsed": {"a": "1"}, "partial": True})
+
+    new = {"parsed": {"a": "", "b": "new"}, "field_confidence": {}}
+    old = {"parsed": {"a": "old", "b": "stale"}, "field_confidence": {"a": 0.9},
+           "face": "xx", "face_media_type": "image/jpeg"}
+    assert merge_fields(new, old) == ["a"]
+    assert new["parsed"] == {"a": "old", "b": "new"}
+    assert new["field_confidence"] == {"a": 0.9}
+    assert new["face"] == "xx"
+
+
+def test_same_template_different_cards_not_same_document():
+    import random
+    import cv2
+    from bench.synthetic import make_dl_fields, render_driving_license
+
+    rng = random.Random(1)
+    idx = NearDupIndex(max_distance=dedup.DEDUP_MAX_DISTANCE)
+    a, b = make_dl_fields(rng, "MARYLAND"), make_dl_fields(rng, "MARYLAND")
+    assert a["licenseNumber"] != b["licenseNumber"]
+    hashes = [phash(cv2.cvtColor(np.array(render_driving_license(f, width=800)), cv2.COLOR_RGB2GRAY))
+              for f in (a, b)]
+
+    old = {"detected_type": "driving_license", "parsed": dict(a)}
+    idx.add("s", hashes[0], old)
+    # pHash kartu orang lain dengan template sama tetap "near-duplicate" ...
+    dup, _ = idx.lookup("s", hashes[1])
+    assert dup is not None
+    # ... jadi reuse / merge bergantung pada nomor dokumen
+    assert not dedup.same_document(dup.result, b["licenseNumber"])
+    assert dedup.same_document(dup.result, a["licenseNumber"].lower())
+    assert not dedup.same_document(dup.result, "")
+    assert not dedup.same_document({"detected_type": "driving_license", "parsed": {}}, "")
+
+
+def test_document_id():
+    assert dedup.document_id({"detected_type": "passport", "parsed": {"passportNumber": " a1234567 "}}) == "A1234567"
+    assert dedup.document_id({"detected_type": "unknown", "parsed": {"licenseNumber": "X"}}) == ""
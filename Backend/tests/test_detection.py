@@ -0,0 +1,78 @@
+import numpy as np
+
+from processors import detection
+from processors.detection import detect_fields, missing_classes
+
+
+class FakeBoxes:
+    def __init__(self, rows):
+        self.data = FakeTensor(np.array(rows, np.float32).reshape(-1, 6))
+
+    def __len__(self):
+        return len(self.data.a)
+
+
+class FakeTensor:
+    def __init__(self, a):
+        self.a = a
+
+    def cpu(self):
+        return self
+
+    def numpy(self):
+        return self.a
+
+
+class FakeModel:
+    """Model YOLO tiruan: mencatat argumen predict, box per imgsz."""
+    names = {0: "a", 1: "b"}
+
+    def __init__(self, rows_by_imgsz, overrides=None):
+        self.rows_by_imgsz = rows_by_imgsz
+        self.overrides = overrides or {}
+        self.calls = []
+
+    def predict(self, image, **kwargs):
+        self.calls.append(kwargs)
+        rows = self.rows_by_imgsz[kwargs.get("imgsz")]
+        return [type("R", (), {"boxes": FakeBoxes(rows)})()]
+
+
+FULL = [(0, 0, 10, 10, 0.9, 0), (0, 20, 10, 30, 0.8, 1)]
+
+
+def test_default_passes_no_imgsz(monkeypatch):
+    monkeypatch.setattr(detection, "DETECT_IMGSZ", 0)
+    monkeypatch.setattr(detection, "COARSE_IMGSZ", 0)
+    model = FakeModel({None: FULL}, overrides={"imgsz": 1024})
+    _, _, cls_ids, info = detect_fields(model, None, ["a", "b"], 0.35, 0.45)
+    assert "imgsz" not in model.calls[0]
+    assert info == {"imgsz": 1024, "passes": 1}
+    assert list(cls_ids) == [0, 1]
+
+
+def test_explicit_imgsz_is_passed(monkeypatch):
+    monkeypatch.setattr(detection, "DETECT_IMGSZ", 800)
+    monkeypatch.setattr(detection, "COARSE_IMGSZ", 0)
+    model = FakeModel({800: FULL})
+    detect_fields(model, None, ["a", "b"], 0.35, 0.45)
+    assert model.calls[0]["imgsz"] == 800
+
+
+def test_coarse_then_model_default(monkeypatch):
+    monkeypatch.setattr(detection, "DETECT_IMGSZ", 0)
+    monkeypatch.setattr(detection, "COARSE_IMGSZ", 416)
+    # pass kecil kehilangan class "b" -> pass penuh tanpa imgsz
+    model = FakeModel({416: FULL[:1], None: FULL})
+    _, _, cls_ids, info = detect_fields(model, None, ["a", "b"], 0.35, 0.45)
+    assert [c.get("imgsz") for c in model.calls] == [416, None]
+    assert info == {"imgsz": 640, "passes": 2, "coarse_missing": ["b"]}
+
+    model = FakeModel({416: FULL})
+    _, _, _, info = detect_fields(model, None, ["a", "b"], 0.35, 0.45)
+    assert info == {"imgsz": 416, "passes": 1}
+
+
+def test_missing_classes():
+    scores, cls_ids = np.array([0.9, 0.3]), np.array([0, 1])
+    assert missing_classes(scores, cls_ids, FakeModel.names, ["a", "b"], 0.5) == ["b"]
@@ -0,0 +1,66 @@
+import random
+
+import cv2
+import numpy as np
+import pytest
+
+from bench.synthetic import make_dl_fields, make_passport_fields, render_driving_license, render_passport, degrade
+from processors import doc_classifier
+from processors.doc_classifier import (
+    classify_doc_type, confidence, document_aspect, MIN_CONFIDENCE, NO_MRZ_MAX_CONF, _thumbnail
+)
+
+
+@pytest.fixture(autouse=True)
+def default_weights(monkeypatch):
+    monkeypatch.setattr(doc_classifier, "_weights", dict(doc_classifier.DEFAULT_WEIGHTS))
+
+
+def on_table(img, margin=0.3):
+    """Dokumen di atas meja: background di sekeliling, sedikit miring."""
+    rgb = np.array(degrade(img, rotation=4))
+    h, w = rgb.shape[:2]
+    return cv2.copyMakeBorder(rgb, int(h * margin), int(h * margin), int(w * margin), int(w * margin),
+                              cv2.BORDER_CONSTANT, value=(96, 84, 72))
+
+
+@pytest.fixture(scope="module")
+def passport_img():
+    return render_passport(make_passport_fields(random.Random(5)), width=900)
+
+
+@pytest.fixture(scope="module")
+def license_img():
+    return render_driving_license(make_dl_fields(random.Random(5), "VIRGINIA"), width=900)
+
+
+def test_document_aspect_ignores_background(passport_img, license_img):
+    # aspect gambar (dengan meja) jauh dari aspect dokumen
+    assert document_aspect(_thumbnail(on_table(license_img))) == pytest.approx(85.6 / 54, abs=0.03)
+    assert document_aspect(_thumbnail(on_table(passport_img))) == pytest.approx(125 / 88, abs=0.03)
+    # dokumen memenuhi frame: tidak ada region, fitur pakai aspect gambar
+    assert document_aspect(_thumbnail(np.array(license_img))) is None
+
+
+def test_passport_with_mrz_is_confident(passport_img):
+    doc_type, conf, feats = classify_doc_type(on_table(passport_img))
+    assert doc_type == "passport" and conf >= MIN_CONFIDENCE
+    assert feats["mrz_lines"] >= 1
+
+
+def test_no_mrz_never_confident(passport_img, license_img):
+    # MRZ terpotong / tidak terbaca: paspor tanpa MRZ tidak boleh jadi SIM yakin
+    rgb = np.array(passport_img)
+    no_mrz = rgb[: int(rgb.shape[0] * 0.8)]
+    doc_type, conf, feats = classify_doc_type(no_mrz)
+    assert feats["mrz_lines"] == 0
+    assert doc_type == "passport" or conf <= NO_MRZ_MAX_CONF < MIN_CONFIDENCE
+
+    doc_type, conf, _ = classify_doc_type(on_table(license_img))
+    assert doc_type == "driving_license" and conf <= NO_MRZ_MAX_CONF
+
+
+def test_confidence_cap_only_without_mrz():
+    assert confidence(0.04, {"mrz_lines": 0.0}) == ("driving_license", NO_MRZ_MAX_CONF)
+    assert confidence(0.04, {"mrz_lines": 1.0}) == ("driving_license", pytest.approx(0.96))
+    assert confidence(0.9, {"mrz_lines": 0.0}) == ("passport", 0.9)
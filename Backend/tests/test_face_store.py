@@ -0,0 +1,44 @@
+import json
+import base64
+
+from runtime import face_store
+from runtime.face_store import FaceStore, url_mode_available
+from runtime.responses import build_detect_response
+
+
+class FakeRequest:
+    headers = {"accept": "application/json"}
+
+
+def test_put_get_and_expiry(monkeypatch):
+    store = FaceStore(ttl_s=10, max_items=2)
+    now = [1000.0]
+    monkeypatch.setattr(face_store.time, "time", lambda: now[0])
+
+    a = store.put(b"a")
+    b = store.put(b"b", "image/webp")
+    assert store.get(a) == (b"a", "image/jpeg")
+    assert store.get(b) == (b"b", "image/webp")
+
+    store.put(b"c")                       # max_items -> yang paling lama keluar
+    assert store.get(a) is None
+    now[0] += 11
+    assert store.get(b) is None
+
+
+def test_url_mode_only_single_process(monkeypatch):
+    monkeypatch.setattr(face_store, "_multi_warned", False)
+    assert url_mode_available(1)
+    assert not url_mode_available(4)
+    monkeypatch.setattr(face_store, "WEB_CONCURRENCY", 2)
+    assert not url_mode_available()
+
+
+def test_url_mode_without_store_falls_back_inline():
+    result = {"success": True, "parsed": {}}
+    resp = build_detect_response(dict(result), b"face", FakeRequest(), face_mode="url", face_url=None)
+    assert json.loads(resp.body)["face"] == base64.b64encode(b"face").decode()
+
+    resp = build_detect_response(dict(result), b"face", FakeRequest(), face_mode="url",
+                                 face_url=lambda data: "http://x/faces/1")
+    assert json.loads(resp.body)["face"] == "http://x/faces/1"
@@ -0,0 +1,83 @@
+import io
+import tempfile
+
+import cv2
+import numpy as np
+
+from processors.image_io import jpeg_size, choose_reduction, decode_image, read_upload_buffer
+
+
+def _jpeg(w, h):
+    img = np.zeros((h, w, 3), np.uint8)
+    img[:, : w // 2] = (0, 0, 255)        # BGR merah di kiri
+    return cv2.imencode(".jpg", img)[1].tobytes()
+
+
+def test_jpeg_size_reads_sof_header():
+    assert jpeg_size(_jpeg(640, 480)) == (640, 480)
+    assert jpeg_size(np.frombuffer(_jpeg(33, 17), np.uint8)) == (33, 17)
+
+
+def test_jpeg_size_rejects_non_jpeg_and_truncated():
+    png = cv2.imencode(".png", np.zeros((8, 8, 3), np.uint8))[1].tobytes()
+    assert jpeg_size(png) is None
+    assert jpeg_size(b"") is None
+    assert jpeg_size(_jpeg(640, 480)[:20]) is None
+
+
+def test_choose_reduction_keeps_target_edge():
+    assert choose_reduction((4000, 3000), 1600) == 2
+    assert choose_reduction((12800, 9600), 1600) == 8
+    assert choose_reduction((1600, 1200), 1600) == 1
+    assert choose_reduction(None, 1600) == 1
+    assert choose_reduction((4000, 3000), 0) == 1
+
+
+def test_decode_image_reduces_large_jpeg():
+    rgb, gray, hires = decode_image(_jpeg(3400, 2000), target_edge=1600)
+    assert hires.factor == 2
+    assert rgb.shape == (1000, 1700, 3)
+    assert gray.shape == (1000, 1700)
+    # BGR -> RGB: kiri merah
+    assert rgb[500, 10, 0] > 200 and rgb[500, 10, 2] < 50
+
+
+def test_decode_image_full_res_crop_for_small_boxes():
+    rgb, _, hires = decode_image(_jpeg(3400, 2000), target_edge=1600)
+    small = hires.crop(rgb, 100, 100, 200, 110)       # 10 px < MIN_OCR_CROP_PX
+    assert small.shape == (20, 200, 3)
+    big = hires.crop(rgb, 100, 100, 200, 300)
+    assert big.shape == (200, 100, 3)
+
+
+def test_decode_image_small_and_invalid():
+    rgb, gray, hires = decode_image(_jpeg(320, 200))
+    assert rgb.shape == (200, 320, 3) and hires.factor == 1
+    assert decode_image(b"not an image") == (None, None, None)
+
+
+def test_decode_image_into_caller_buffers():
+    bufs = {}
+
+    def alloc(h, w):
+        bufs["rgb"] = np.empty((h, w, 3), np.uint8)
+        bufs["gray"] = np.empty((h, w), np.uint8)
+        return bufs["rgb"], bufs["gray"]
+
+    rgb, gray, _ = decode_image(_jpeg(320, 200), alloc=alloc)
+    assert rgb is bufs["rgb"] and gray is bufs["gray"]
+
+
+def test_read_upload_buffer_memory_and_spooled_to_disk():
+    data = _jpeg(320, 240)
+    # max_size kecil -> di-spool ke disk, seperti upload besar di UploadFile
+    for spool in (1024 * 1024, 64):
+        with tempfile.SpooledTemporaryFile(max_size=spool) as f:
+            f.write(data)
+            buf = read_upload_buffer(f)
+            assert buf.dtype == np.uint8 and buf.tobytes() == data
+
+    bio = io.BytesIO(data)
+    buf = read_upload_buffer(bio)
+    assert buf.tobytes() == data
+    assert np.shares_memory(buf, np.frombuffer(bio.getbuffer(), np.uint8))
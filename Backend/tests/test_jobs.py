@@ -0,0 +1,105 @@
+import pytest
+
+from runtime.jobs import JobQueue, PRIORITIES, parse_priority, callback_allowed
+
+
+def test_parse_priority_names_and_default():
+    assert parse_priority(None) == PRIORITIES["normal"]
+    assert parse_priority("Interactive") == PRIORITIES["interactive"]
+    assert parse_priority("bulk") == PRIORITIES["bulk"]
+
+
+def test_parse_priority_clamps_integers():
+    assert parse_priority("7") == 7
+    assert parse_priority("1000") == max(PRIORITIES.values())
+    assert parse_priority("-3") == min(PRIORITIES.values())
+
+
+@pytest.mark.parametrize("value", ["urgent", "1.5", "", "10; drop"])
+def test_parse_priority_rejects_garbage(value):
+    with pytest.raises(ValueError):
+        parse_priority(value)
+
+
+@pytest.mark.parametrize("url, ok", [
+    ("https://hooks.example.com/done", True),
+    ("http://api.partner.io/cb", True),
+    ("https://example.com/done", False),           # hanya subdomain
+    ("https://hooks.example.com.evil.io/", False),
+    ("file:///etc/passwd", False),
+    ("ftp://api.partner.io/", False),
+    ("http://169.254.169.254/latest/meta-data", False),
+    ("http://10.0.0.5/", False),
+    ("not a url", False),
+])
+def test_callback_allowed(url, ok):
+    assert callback_allowed(url, [".example.com", "api.partner.io"]) is ok
+
+
+def test_callback_disabled_without_allowlist():
+    assert not callback_allowed("https://hooks.example.com/done", [])
+
+
+def test_queue_claims_by_priority_then_age(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.sqlite3"))
+    bulk = queue.enqueue(b"a", PRIORITIES["bulk"])
+    normal = queue.enqueue(b"b", PRIORITIES["normal"])
+    urgent = queue.enqueue(b"c", PRIORITIES["interactive"])
+    assert queue.get(bulk)["queue_position"] == 2
+
+    order = [queue.claim("w")["id"] for _ in range(3)]
+    assert order == [urgent, normal, bulk]
+    assert queue.claim("w") is None
+
+    queue.complete(urgent, {"ok": True})
+    assert queue.get(urgent)["result"] == {"ok": True}
+
+
+def test_maintenance_fails_job_after_max_attempts(tmp_path, monkeypatch):
+    from runtime import jobs
+
+    now = [1000.0]
+    monkeypatch.setattr(jobs.time, "time", lambda: now[0])
+    queue = JobQueue(str(tmp_path / "jobs.sqlite3"))
+    job_id = queue.enqueue(b"crash", callback_url="https://hooks.example.com/cb")
+
+    # worker mati di tengah job: di-queue ulang sampai max_attempts
+    for attempt in (1, 2):
+        assert queue.claim("w")["id"] == job_id
+        now[0] += jobs.JOB_STALE_S + 1
+        assert queue.maintenance(max_attempts=3) == []
+        job = queue.get(job_id)
+        assert job["status"] == "queued" and job["attempts"] == attempt
+
+    assert queue.claim("w")["id"] == job_id
+    now[0] += jobs.JOB_STALE_S + 1
+    failed = queue.maintenance(max_attempts=3)
+    assert [(f["id"], f["callback_url"]) for f in failed] == [(job_id, "https://hooks.example.com/cb")]
+    job = queue.get(job_id)
+    assert job["status"] == "failed" and job["attempts"] == 3
+    assert "3 attempts" in job["error"]
+    assert queue.claim("w") is None
+
+
+def test_running_job_not_requeued_before_stale(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.sqlite3"))
+    job_id = queue.enqueue(b"x")
+    queue.claim("w")
+    assert queue.maintenance() == []
+    assert queue.get(job_id)["status"] == "running"
+
+
+def test_old_database_gets_attempts_column(tmp_path):
+    import sqlite3
+
+    path = str(tmp_path / "old.sqlite3")
+    db = sqlite3.connect(path)
+    db.execute("CREATE TABLE jobs (id TEXT PRIMARY KEY, status TEXT NOT NULL, priority INTEGER NOT NULL, "
+               "created_at REAL NOT NULL, started_at REAL, finished_at REAL, worker TEXT, deadline_ms INTEGER, "
+               "callback_url TEXT, payload BLOB, result TEXT, error TEXT)")
+    db.commit()
+    db.close()
+    queue = JobQueue(path)
+    job_id = queue.enqueue(b"x")
+    queue.claim("w")
+    assert queue.get(job_id)["attempts"] == 1
@@ -0,0 +1,102 @@
+import json
+
+import pytest
+
+from processors import ocr_profiles
+from processors.ocr_profiles import validate, get_profile, load_profiles, tesseract_config, read_field
+from runtime.budget import Budget
+
+
+@pytest.fixture(autouse=True)
+def default_profiles(monkeypatch):
+    monkeypatch.setattr(ocr_profiles, "OCR_PROFILES_ENABLED", True)
+    monkeypatch.setattr(ocr_profiles, "_profiles", load_profiles(path=None))
+
+
+@pytest.mark.parametrize("txt, field, state, expected", [
+    ("M 1234 5678 9012", "licenseNumber", "MARYLAND", "M123456789012"),
+    ("m-123456789012", "licenseNumber", "maryland", "M123456789012"),
+    ("12345678", "licenseNumber", "MARYLAND", ""),
+    ("DL: 1234 5678", "licenseNumber", "PENNSYLVANIA", "12345678"),
+    ("A1-23", "licenseNumber", None, ""),
+    ("AB12-345", "licenseNumber", None, "AB12345"),
+    ("DOB 01/02/1990", "dateOfBirth", None, "01/02/1990"),
+    ("01 02 1990", "dateOfBirth", None, ""),
+    ("m", "sex", None, "M"),
+    ("MF", "sex", None, ""),
+])
+def test_validate(txt, field, state, expected):
+    assert validate(txt, get_profile("driving_license", field, state)) == expected
+
+
+def test_get_profile_merges_state_override():
+    base = get_profile("driving_license", "licenseNumber")
+    pa = get_profile("driving_license", "licenseNumber", " pennsylvania ")
+    assert pa["pattern"] == r"\d{8}" and pa["allowlist"] == "0123456789 "
+    assert pa["psm"] == base["psm"] and pa["normalize"] == "alnum"
+    # override tidak bocor ke profil default
+    assert get_profile("driving_license", "licenseNumber")["pattern"] == base["pattern"]
+    assert get_profile("driving_license", "address") is None
+    assert get_profile("unknown", "x") is None
+
+
+def test_get_profile_disabled(monkeypatch):
+    monkeypatch.setattr(ocr_profiles, "OCR_PROFILES_ENABLED", False)
+    assert get_profile("driving_license", "sex") is None
+
+
+def test_load_profiles_json_override(tmp_path, monkeypatch):
+    path = tmp_path / "ocr_profiles.json"
+    path.write_text(json.dumps({
+        "driving_license": {"sex": {"psm": 8}},
+        "states": {"OHIO": {"licenseNumber": {"pattern": "[A-Z]{2}\\d{6}"}}},
+    }))
+    monkeypatch.setattr(ocr_profiles, "_profiles", load_profiles(str(path)))
+    assert get_profile("driving_license", "sex")["psm"] == 8
+    assert get_profile("driving_license", "sex")["pattern"] == r"^[MF]$"
+    assert validate("ab 123456", get_profile("driving_license", "licenseNumber", "Ohio")) == "AB123456"
+
+
+def test_tesseract_config_strips_unsafe_chars():
+    cfg = tesseract_config({"psm": 10, "allowlist": "AB '\"-"})
+    assert cfg == "--oem 1 --psm 10 -c tessedit_char_whitelist=AB-"
+    assert tesseract_config({}) == "--oem 1 --psm 7"
+
+
+def engines(monkeypatch, easy, tess):
+    calls = []
+    monkeypatch.setattr(ocr_profiles, "_easyocr", lambda img, reader, p: calls.append("easyocr") or easy)
+    monkeypatch.setattr(ocr_profiles, "_tesseract", lambda img, p: calls.append("tesseract") or tess)
+    return calls
+
+
+def test_read_field_second_engine_only_on_mismatch(monkeypatch):
+    profile = get_profile("driving_license", "licenseNumber", "VIRGINIA")
+    calls = engines(monkeypatch, "A1234 5678", "B87654321")
+    assert read_field(None, None, profile) == "A12345678"
+    assert calls == ["easyocr"]
+
+    calls = engines(monkeypatch, "garbage", "B87654321")
+    assert read_field(None, None, profile) == "B87654321"
+    assert calls == ["easyocr", "tesseract"]
+
+    # tidak ada yang cocok -> teks mentah pertama
+    engines(monkeypatch, "garbage", "other")
+    assert read_field(None, None, profile) == "garbage"
+
+
+def test_read_field_engine_order_and_budget(monkeypatch):
+    calls = engines(monkeypatch, "F", "M")
+    assert read_field(None, None, get_profile("driving_license", "sex")) == "M"
+    assert calls == ["tesseract"]
+
+    profile = get_profile("driving_license", "dateOfBirth")
+    calls = engines(monkeypatch, "bad", "01/02/1990")
+    assert read_field(None, None, profile, allow_tesseract=False) == "bad"
+    assert calls == ["easyocr"]
+
+    budget = Budget()
+    budget.denied.add("tesseract_retry")
+    calls = engines(monkeypatch, "bad", "01/02/1990")
+    assert read_field(None, None, profile, budget) == "bad"
+    assert calls == ["easyocr"]
@@ -0,0 +1,59 @@
+import random
+
+import cv2
+import numpy as np
+import pytest
+
+from bench.synthetic import make_dl_fields, make_passport_fields, render_driving_license, render_passport
+from processors import orientation
+from processors.orientation import estimate_orientation, rotate
+
+
+def gray_of(img):
+    return cv2.cvtColor(np.array(img), cv2.COLOR_RGB2GRAY)
+
+
+@pytest.fixture(scope="module")
+def passport():
+    return gray_of(render_passport(make_passport_fields(random.Random(3)), width=900))
+
+
+@pytest.fixture(scope="module")
+def license_card():
+    return gray_of(render_driving_license(make_dl_fields(random.Random(3), "MARYLAND"), width=900))
+
+
+@pytest.fixture(autouse=True)
+def no_osd(monkeypatch):
+    monkeypatch.setattr(orientation, "ORIENTATION_OSD", False)
+
+
+# foto terputar `turned` derajat searah jarum jam -> perlu diputar balik 360 - turned
+@pytest.mark.parametrize("turned", [0, 90, 180, 270])
+def test_passport_all_rotations(passport, turned):
+    info = estimate_orientation(rotate(passport, turned))
+    assert info["angle"] == (360 - turned) % 360
+    assert rotate(rotate(passport, turned), info["angle"]).shape == passport.shape
+
+
+@pytest.mark.parametrize("turned", [0, 90, 180, 270])
+def test_no_up_down_evidence_is_not_rotated(license_card, turned):
+    # kartu tanpa wajah / MRZ yang terdeteksi: sumbu teks saja tidak cukup
+    info = estimate_orientation(rotate(license_card, turned))
+    assert info["scores"]["upright"] == 0
+    assert info["angle"] == 0
+    if turned:
+        assert info["method"].endswith("+unsure")
+
+
+@pytest.mark.parametrize("turned", [90, 180])
+def test_osd_decides_without_votes(license_card, monkeypatch, turned):
+    monkeypatch.setattr(orientation, "ORIENTATION_OSD", True)
+    # kedua kasus: setelah rotasi sumbu, gambar masih terbalik
+    monkeypatch.setattr(orientation, "osd_angle", lambda thumb: 180)
+    info = estimate_orientation(rotate(license_card, turned))
+    assert info["angle"] == (360 - turned) % 360
+    assert info["method"].endswith("+osd")
+
+    monkeypatch.setattr(orientation, "osd_angle", lambda thumb: None)
+    assert estimate_orientation(rotate(license_card, turned))["angle"] == 0
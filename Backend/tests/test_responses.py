@@ -0,0 +1,45 @@
+import gzip
+
+import pytest
+
+from runtime import responses
+from runtime.responses import negotiate_format, parse_accept, compress
+
+
+def test_parse_accept_orders_by_q_and_drops_zero():
+    assert parse_accept("a/b;q=0.2, c/d, e/f;q=0.5, g/h;q=0") == ["c/d", "e/f", "a/b"]
+    assert parse_accept("A/B ; Q=0.9 ; level=1") == ["a/b"]
+    assert parse_accept("x/y;q=abc") == []
+    assert parse_accept(None) == []
+
+
+@pytest.mark.parametrize("accept, fmt", [
+    (None, "json"),
+    ("", "json"),
+    ("application/json", "json"),
+    ("multipart/mixed", "multipart"),
+    ("text/html, multipart/mixed", "multipart"),
+    ("multipart/mixed;q=0.1, application/json", "json"),
+    ("application/json;q=0.5, multipart/mixed", "multipart"),
+    ("multipart/mixed;q=0", "json"),
+    ("image/png", "json"),
+])
+def test_negotiate_format(accept, fmt):
+    assert negotiate_format(accept) == fmt
+
+
+def test_negotiate_msgpack_only_when_installed(monkeypatch):
+    monkeypatch.setattr(responses, "msgpack", object())
+    assert negotiate_format("application/msgpack, application/json;q=0.9") == "msgpack"
+    assert negotiate_format("application/msgpack;q=0.5, application/json") == "json"
+    monkeypatch.setattr(responses, "msgpack", None)
+    assert negotiate_format("application/msgpack") == "json"
+
+
+def test_compress_respects_q_zero(monkeypatch):
+    monkeypatch.setattr(responses, "brotli", None)
+    body = b"x" * 4096
+    assert compress(body, "gzip;q=0") == (body, None)
+    out, enc = compress(body, "identity, gzip")
+    assert enc == "gzip" and gzip.decompress(out) == body
+    assert compress(b"small", "gzip") == (b"small", None)
@@ -0,0 +1,35 @@
+import pytest
+
+from runtime.results_store import ResultStore, SQLiteResultStore, open_store, to_record
+
+
+def _result(number, last_name):
+    return {
+        "success": True,
+        "detected_type": "driving_license",
+        "parsed": {"licenseNumber": number, "lastName": last_name, "faceImage": "..."},
+    }
+
+
+def test_backend_must_implement_interface():
+    class Partial(ResultStore):
+        def write_batch(self, records):
+            pass
+
+    with pytest.raises(TypeError):
+        Partial()
+
+
+def test_sqlite_round_trip(tmp_path):
+    store = open_store(f"sqlite:///{tmp_path}/results.sqlite3")
+    assert isinstance(store, SQLiteResultStore)
+
+    a, b = to_record(_result("k123 456", "doe"), "detect"), to_record(_result("X1", "Roe"), "job")
+    store.write_batch([a, b])
+
+    row = store.get(a["id"])
+    assert row["license_number"] == "K123 456"
+    assert "faceImage" not in row["parsed"]
+    assert [r["id"] for r in store.query(license_number="k123  456")] == [a["id"]]
+    assert [r["id"] for r in store.query(last_name="roe")] == [b["id"]]
+    assert store.get("missing") is None
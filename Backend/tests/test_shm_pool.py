@@ -0,0 +1,61 @@
+import cv2
+import numpy as np
+import pytest
+
+from runtime.shm_pool import ShmPool, PoolExhausted, attach
+
+
+@pytest.fixture
+def pool():
+    p = ShmPool(slots=2, slot_bytes=1 << 20)
+    yield p
+    p.close()
+
+
+def jpeg(w=64, h=48):
+    img = np.zeros((h, w, 3), np.uint8)
+    img[:, : w // 2] = (0, 0, 255)
+    return cv2.imencode(".jpg", img)[1].tobytes()
+
+
+def test_slot_freed_only_after_all_refs(pool):
+    frame = pool.decode(jpeg())
+    assert pool.refs(frame) == 1
+    pool.incref(frame)                  # diserahkan ke worker
+    pool.release(frame)                 # request API selesai / dibatalkan
+    assert pool.in_use() == 1 and pool.refs(frame) == 1
+    pool.release(frame)                 # hasil worker diterima
+    assert pool.in_use() == 0 and pool.refs(frame) == 0
+    # release berlebih tidak merusak hitungan slot
+    pool.release(frame)
+    assert pool.in_use() == 0
+    with pytest.raises(ValueError):
+        pool.incref(frame)
+
+
+def test_exhausted_until_last_ref_released(pool):
+    a = pool.decode(jpeg())
+    b = pool.decode(jpeg())
+    pool.incref(a)
+    pool.release(a)
+    with pytest.raises(PoolExhausted):
+        pool.acquire(timeout=0.01)
+    pool.release(a)
+    c = pool.decode(jpeg())
+    assert c.name == a.name             # segment dipakai ulang
+    pool.release(b)
+    pool.release(c)
+    assert pool.status()["in_use"] == 0 and pool.stats["exhausted"] == 1
+
+
+def test_attach_views_and_invalid_image(pool):
+    data = jpeg()
+    frame = pool.decode(data)
+    rgb, gray, hires = attach(frame)
+    assert rgb.shape == (48, 64, 3) and gray.shape == (48, 64)
+    assert rgb[10, 5, 0] > 200 and rgb[10, 60, 0] < 50     # merah di kiri (RGB)
+    assert hires.buf.tobytes() == data
+    pool.release(frame)
+
+    assert pool.decode(b"not an image") is None
+    assert pool.in_use() == 0
@@ -0,0 +1,21 @@
+import os
+
+from runtime import threads
+
+CFG = {"torch_intra": 3, "torch_interop": 1, "cv2": 3, "tesseract_omp": 1}
+
+
+def test_apply_thread_env_fills_unset(monkeypatch):
+    monkeypatch.delenv("OMP_NUM_THREADS", raising=False)
+    monkeypatch.delenv("MKL_NUM_THREADS", raising=False)
+    threads.apply_thread_env(dict(CFG))
+    assert os.environ["OMP_NUM_THREADS"] == "3"
+    assert os.environ["MKL_NUM_THREADS"] == "3"
+
+
+def test_apply_thread_env_keeps_operator_values(monkeypatch):
+    monkeypatch.setenv("OMP_NUM_THREADS", "2")
+    monkeypatch.setenv("MKL_NUM_THREADS", "1")
+    assert threads.apply_thread_env(dict(CFG)) == CFG
+    assert os.environ["OMP_NUM_THREADS"] == "2"
+    assert os.environ["MKL_NUM_THREADS"] == "1"